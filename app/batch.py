@@ -0,0 +1,488 @@
+"""
+Offline batch mode: grade recorded presentations without the live app.
+
+Each recording is a video file or a directory of frame images, plus an
+audio file (or the video's own audio track). Frames are sampled and
+decoded one at a time, audio in fixed blocks, so long recordings are never
+fully loaded into memory; each block is cut at speech pauses so
+transcript segments line up with the slide on screen. Recordings run in
+parallel on a process pool.
+
+    PYTHONPATH=. python -m app.batch talk1.mp4 talk2.mp4 --out out/ --workers 4
+    PYTHONPATH=. python -m app.batch frames_dir/ --audio frames_dir=talk.wav --out out/
+
+Output per recording: <out>/<session_id>/session.json (AppState.export()
+shape: qa_history, transcript, slide_events, metrics, ... plus the full
+per-slide OCR text) and transcript.txt.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+VIDEO_EXTS = {".mp4", ".mov", ".mkv", ".webm", ".avi", ".m4v"}
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".bmp", ".webp"}
+AUDIO_EXTS = (".wav", ".flac", ".mp3", ".m4a", ".ogg", ".opus")
+
+
+@dataclass
+class BatchJob:
+    source: str  # video file or frame directory
+    audio: Optional[str] = None  # None: sibling audio file or the video's own track
+    session_id: str = ""
+
+
+@dataclass
+class BatchOptions:
+    out_dir: str = "batch_out"
+    interval_s: float = 2.0  # frame sampling period (also seconds per image for frame dirs)
+    change_threshold: float = 0.001
+    ocr_preprocess: bool = True
+    ocr_target_line_px: int = 24
+    stt_provider: str = "openai"  # "openai" | "faster-whisper" | "none"
+    stt_model: str = "gpt-4o-mini-transcribe"
+    whisper_size: str = "small"
+    audio_block_s: float = 30.0
+    stt_segment_s: float = 10.0  # speech between pauses is packed into STT calls of at most this long
+    llm_provider: str = "openai"
+    llm_model: str = "gpt-4o-mini"
+    llm_temperature: float = 0.25
+    max_questions: int = 6
+    llm_concurrency: int = 4
+    rubric: bool = True
+    rubric_batch_size: int = 8
+    retrieval_budget_tokens: int = 400  # 0 = current slide only
+
+
+@dataclass
+class BatchResult:
+    session_id: str
+    source: str
+    out_path: str = ""
+    frames: int = 0
+    slides: int = 0
+    questions: int = 0
+    transcript_chars: int = 0
+    seconds: float = 0.0
+    error: str = ""
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+# ---------------------------------------------------------
+# Streaming decode
+# ---------------------------------------------------------
+def _av() -> Any:
+    """PyAV, for video files and non-soundfile audio; frame directories + WAV/FLAC work without it."""
+    try:
+        import av  # type: ignore
+    except ImportError as e:
+        raise RuntimeError("PyAV is needed to decode video/compressed audio in batch mode (pip install av)") from e
+    return av
+
+
+def iter_frames(source: str, interval_s: float) -> Iterator[Tuple[float, np.ndarray]]:
+    """Yield (media_time_s, HxWx3 uint8) every `interval_s`, one frame in memory at a time."""
+    path = Path(source)
+    if path.is_dir():
+        from PIL import Image
+
+        files = sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_EXTS)
+        for i, p in enumerate(files):
+            with Image.open(p) as img:
+                yield i * interval_s, np.asarray(img.convert("RGB"))
+        return
+
+    with _av().open(str(path)) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        next_t = 0.0
+        for frame in container.decode(stream):
+            t = float(frame.time or 0.0)
+            if t + 1e-6 < next_t:
+                continue  # decoded but not sampled: never converted to RGB
+            next_t = t + interval_s
+            yield t, frame.to_ndarray(format="rgb24")
+
+
+def _resample(x: np.ndarray, sr: int) -> np.ndarray:
+    from app.services.whisper_pool import _resample as resample
+
+    return resample(x, sr, SAMPLE_RATE)
+
+
+def iter_audio(path: str, block_s: float) -> Iterator[Tuple[float, np.ndarray]]:
+    """Yield (start_s, float32 mono 16 kHz block) without decoding the whole file."""
+    try:
+        import soundfile as sf  # type: ignore
+
+        info = sf.info(path)
+        sr = int(info.samplerate)
+        start = 0
+        for block in sf.blocks(path, blocksize=int(block_s * sr), dtype="float32", always_2d=True):
+            yield start / float(sr), _resample(block.mean(axis=1).astype(np.float32), sr)
+            start += block.shape[0]
+        return
+    except Exception:
+        pass  # not a soundfile format (mp3/m4a/video): fall back to PyAV
+
+    av = _av()
+    with av.open(path) as container:
+        resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLE_RATE)
+        need = int(block_s * SAMPLE_RATE)
+        parts: List[np.ndarray] = []
+        have, emitted = 0, 0
+        for frame in container.decode(audio=0):
+            for out in resampler.resample(frame):
+                arr = out.to_ndarray().reshape(-1).astype(np.float32)
+                parts.append(arr)
+                have += arr.size
+                while have >= need:
+                    buf = np.concatenate(parts)
+                    yield emitted / float(SAMPLE_RATE), buf[:need]
+                    emitted += need
+                    parts, have = [buf[need:]], buf.size - need
+        if have:
+            yield emitted / float(SAMPLE_RATE), np.concatenate(parts)
+
+
+def find_audio(source: str) -> Optional[str]:
+    """Sibling audio with the same stem (talk.mp4 -> talk.wav), else the video itself."""
+    path = Path(source)
+    base = path if path.is_dir() else path.with_suffix("")
+    for ext in AUDIO_EXTS:
+        cand = base.with_name(base.name + ext) if path.is_dir() else base.with_suffix(ext)
+        if cand.exists():
+            return str(cand)
+    if path.is_file() and path.suffix.lower() in VIDEO_EXTS:
+        return str(path)
+    return None
+
+
+def _media_ts(t: float) -> str:
+    t = int(t)
+    return f"{t // 3600:02d}:{t % 3600 // 60:02d}:{t % 60:02d}"
+
+
+# ---------------------------------------------------------
+# One recording (runs inside a pool worker)
+# ---------------------------------------------------------
+def _speech_spans(samples: np.ndarray, vad: Any, max_s: float, silence_s: float = 0.6,
+                  pad_s: float = 0.2) -> List[Tuple[int, int]]:
+    """
+    Sample ranges worth transcribing: voiced runs split at pauses of at
+    least `silence_s`, consecutive ones packed into spans of <= `max_s`
+    (a single longer utterance stays whole). Silence yields no span.
+    """
+    mask = vad.speech_mask(samples, SAMPLE_RATE)
+    voiced = np.flatnonzero(mask)
+    if voiced.size == 0:
+        return []
+    n = vad.frame_len(SAMPLE_RATE)
+    breaks = np.flatnonzero(np.diff(voiced) > max(1, int(silence_s * 1000 / vad.frame_ms)))
+    starts = np.concatenate(([voiced[0]], voiced[breaks + 1])) * n
+    ends = (np.concatenate((voiced[breaks], [voiced[-1]])) + 1) * n
+    pad, max_len = int(pad_s * SAMPLE_RATE), int(max_s * SAMPLE_RATE)
+    spans: List[Tuple[int, int]] = []
+    for s, e in zip(starts.tolist(), ends.tolist()):
+        s, e = max(0, s - pad), min(samples.size, e + pad)
+        if spans and e - spans[-1][0] <= max_len:
+            spans[-1] = (spans[-1][0], e)
+        else:
+            spans.append((s, e))
+    return spans
+
+
+def _transcribe_blocks(audio: str, opts: BatchOptions, out: List[Tuple[float, float, str, float, str]]) -> None:
+    from app.capture.audio import EnergyVad, to_wav_bytes
+    from app.services.stt import transcribe_audio_array, transcribe_audio_bytes
+
+    vad = EnergyVad()  # one per recording: the noise floor carries across blocks
+    for block_t0, block in iter_audio(audio, opts.audio_block_s):
+        for s, e in _speech_spans(block, vad, opts.stt_segment_s):
+            samples = block[s:e]
+            if opts.stt_provider == "faster-whisper":
+                text, ms, err = transcribe_audio_array(samples, whisper_size=opts.whisper_size)
+            else:
+                text, ms, err = transcribe_audio_bytes(
+                    to_wav_bytes(samples), filename="segment.wav", provider=opts.stt_provider, model=opts.stt_model,
+                )
+            out.append((block_t0 + s / float(SAMPLE_RATE), block_t0 + e / float(SAMPLE_RATE), text.strip(), ms, err))
+
+
+def _slide_for(t0: float, t1: float, slides: Sequence[Dict[str, Any]]) -> Optional[int]:
+    """Number of the slide whose time range overlaps [t0, t1) the most (earlier wins ties); None if none."""
+    best, best_overlap = None, 0.0
+    for s in slides:
+        overlap = min(t1, s["end_s"]) - max(t0, s["start_s"])
+        if overlap > best_overlap:
+            best, best_overlap = s["slide"], overlap
+    return best
+
+
+def process_recording(job: BatchJob, opts: BatchOptions) -> BatchResult:
+    from app.capture.change import ChangeDetector
+    from app.logic.llm_interviewer import generate_question
+    from app.logic.retrieval import ContextIndex
+    from app.logic.rubric import RubricEngine
+    from app.services.llm_cache import get_llm_cache
+    from app.services.llm_scorer import score_answers
+    from app.logic.orchestrator import FALLBACK_QUESTION, _highlights, _next_difficulty
+    from app.services.ocr import OCR_UNAVAILABLE, run_ocr
+    from app.services.ocr_preprocess import OcrPreprocessor
+    from app.state import AppState, QARecord
+
+    t_start = time.monotonic()
+    src = Path(job.source)
+    state = AppState()
+    state.session_id = job.session_id or f"batch_{src.stem or src.name}"
+    res = BatchResult(session_id=state.session_id, source=job.source)
+    for name in ("stt_provider", "stt_model", "whisper_size", "llm_provider", "llm_model",
+                 "llm_temperature", "max_questions", "ocr_preprocess", "ocr_target_line_px", "change_threshold"):
+        setattr(state, name, getattr(opts, name))
+    state.screenshot_interval_sec = opts.interval_s
+    state.capture_backend = "batch"
+    state.status = "RUNNING"
+    out_dir = Path(opts.out_dir) / state.session_id
+    state.attach_spill(out_dir / "spill")
+
+    try:
+        # -------------------
+        # Audio -> STT, overlapped with frame decode + OCR
+        # -------------------
+        audio = job.audio or (find_audio(job.source) if state.stt_provider != "none" else None)
+        segments: List[Tuple[float, float, str, float, str]] = []
+        stt_error: List[str] = []
+
+        def _stt() -> None:
+            try:
+                _transcribe_blocks(audio, opts, segments)  # type: ignore[arg-type]
+            except Exception as e:
+                stt_error.append(f"{type(e).__name__}: {e}")
+
+        stt_thread = None
+        if audio and state.stt_provider != "none":
+            stt_thread = threading.Thread(target=_stt, name="batch-stt", daemon=True)
+            stt_thread.start()
+
+        # -------------------
+        # Frames -> change gate -> OCR; one slide per detected transition
+        # -------------------
+        detector = ChangeDetector(threshold=opts.change_threshold)
+        pre = OcrPreprocessor(target_line_px=opts.ocr_target_line_px) if opts.ocr_preprocess else None
+        slides: List[Dict[str, Any]] = []
+        t_last = 0.0
+        for t, pixels in iter_frames(job.source, opts.interval_s):
+            res.frames += 1
+            t_last = t
+            state.latest_frame_size = (int(pixels.shape[1]), int(pixels.shape[0]))
+            change = detector.check(pixels)
+            if not change.changed:
+                state.ocr_skips += 1
+                continue
+            text, ms = run_ocr(pre(pixels) if pre is not None else pixels)
+            if text == OCR_UNAVAILABLE:
+                text = ""
+            else:
+                state.ocr_calls += 1
+                state.ocr_latency_ms = ms
+            if change.slide_transition or not slides:
+                state.slide_index += 1
+                state.slide_events.append({"slide": state.slide_index, "ts": _media_ts(t), "score": round(change.score, 4)})
+                slides.append({"slide": state.slide_index, "start_s": t, "end_s": t, "ocr_text": text})
+            elif text:
+                slides[-1]["ocr_text"] = text  # same slide, more content revealed
+        for i, s in enumerate(slides):
+            s["end_s"] = slides[i + 1]["start_s"] if i + 1 < len(slides) else t_last + opts.interval_s
+        if slides:
+            state.ocr_text = slides[-1]["ocr_text"]
+            state.ocr_highlights = _highlights(state.ocr_text)
+        state.latest_frame_ts = _media_ts(t_last)
+
+        if stt_thread is not None:
+            stt_thread.join()
+        for err in stt_error:
+            state.log_error(f"STT failed: {err}")
+        for t0, _t1, text, ms, err in segments:
+            if err:
+                state.log_error(f"STT failed at {_media_ts(t0)}: {err}")
+                continue
+            state.stt_calls += 1
+            state.stt_latency_ms = ms
+            if text:
+                state.transcript.append(text)
+        state.transcript_tail = state.transcript.tail(800)
+
+        # -------------------
+        # Questions: spread over the slides, answered by what was said during each
+        # -------------------
+        picked = [s for s in slides if s["ocr_text"]] or slides
+        n_q = min(int(opts.max_questions), len(picked))
+        if n_q:
+            idx = np.linspace(0, len(picked) - 1, num=n_q).round().astype(int)
+            picked = [picked[i] for i in sorted(set(idx.tolist()))]
+
+        difficulties = [_next_difficulty(state, i) for i in range(len(picked))]
+
+        # Whole-recording index: each question also sees the related slides/speech from elsewhere in the talk
+        index = ContextIndex()
+        for s in slides:
+            index.add_ocr(s["ocr_text"], slide=s["slide"], ts=_media_ts(s["start_s"]))
+        # Each segment belongs to exactly one slide, so no answer repeats speech from its neighbours
+        said_on: Dict[int, List[str]] = {}
+        for t0, t1, text, _ms, err in segments:
+            if not err and text:
+                slide_no = _slide_for(t0, t1, slides)
+                if slide_no is not None:
+                    said_on.setdefault(slide_no, []).append(text)
+                index.add_transcript(text, slide=slide_no or 0, ts=_media_ts(t0))
+        index.flush_transcript()
+        contexts = [
+            index.context(s["ocr_text"], budget_tokens=opts.retrieval_budget_tokens, exclude=[s["ocr_text"]])
+            if opts.retrieval_budget_tokens > 0 else ""
+            for s in picked
+        ]
+
+        def _ask(i: int, slide: Dict[str, Any]) -> Tuple[str, float, str]:
+            return generate_question(
+                model=state.llm_model, temperature=state.llm_temperature, ocr_context=slide["ocr_text"],
+                difficulty=difficulties[i], question_index=i + 1, max_questions=len(picked),
+                provider=state.llm_provider, retrieved_context=contexts[i],
+            )
+
+        with ThreadPoolExecutor(max_workers=max(1, opts.llm_concurrency)) as pool:
+            answers = list(pool.map(lambda a: _ask(*a), list(enumerate(picked))))
+
+        for i, (slide, (q, ms, err)) in enumerate(zip(picked, answers)):
+            if err:
+                state.log_error(f"LLM failed ({err})")
+                q = FALLBACK_QUESTION
+            else:
+                state.llm_calls += 1
+                state.llm_latency_ms = ms
+            said = " ".join(said_on.get(slide["slide"], []))
+            state.qa_history.append(QARecord(
+                question=q, difficulty=difficulties[i], answer=said,
+                asked_ts=_media_ts(slide["start_s"]), answered_ts=_media_ts(slide["end_s"]),
+                slide_index=slide["slide"],
+            ))
+
+        # -------------------
+        # Rubric: every answer in as few scoring calls as possible
+        # -------------------
+        if opts.rubric:
+            rubric = RubricEngine(score_answers, model=state.llm_model, provider=state.llm_provider,
+                                  batch_size=opts.rubric_batch_size, cache=get_llm_cache())
+            for rec in state.qa_history:
+                rubric.submit(rec.question, rec.answer, rec)
+            rubric.flush(wait_s=120.0)
+            if rubric.last_error:
+                state.log_warn(f"Rubric scoring failed ({rubric.last_error}); keeping provisional scores.")
+            kept = rubric.finalize()
+            if kept:
+                state.log_info(f"{kept} answer(s) left unscored by the LLM keep their heuristic score.")
+            state.rubric = rubric.rubric()
+            state.rubric_provisional = rubric.provisional
+            rubric.shutdown()
+
+        state.status = "STOPPED"
+        state.log_info(f"Batch done: {res.frames} frames, {len(slides)} slides, {len(state.qa_history)} questions.")
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        doc = state.export()
+        doc["slides"] = slides
+        doc["source"] = {"video_or_frames": job.source, "audio": audio}
+        (out_dir / "session.json").write_text(json.dumps(doc, indent=2, ensure_ascii=False), encoding="utf-8")
+        (out_dir / "transcript.txt").write_text(state.transcript.text(), encoding="utf-8")
+
+        res.out_path = str(out_dir / "session.json")
+        res.slides = len(slides)
+        res.questions = len(state.qa_history)
+        res.transcript_chars = len(state.transcript)
+        res.stats = {k: getattr(state, k) for k in ("ocr_calls", "ocr_skips", "stt_calls", "llm_calls")}
+    except Exception as e:
+        res.error = f"{type(e).__name__}: {e}"
+    finally:
+        shutil.rmtree(out_dir / "spill", ignore_errors=True)  # only needed until session.json is written
+    res.seconds = round(time.monotonic() - t_start, 2)
+    return res
+
+
+# ---------------------------------------------------------
+# Many recordings
+# ---------------------------------------------------------
+def run_batch(jobs: Sequence[BatchJob], opts: BatchOptions, workers: int = 0) -> List[BatchResult]:
+    """Process recordings in parallel (spawned worker processes); results in completion order."""
+    workers = int(workers) or max(1, min(len(jobs), (mp.cpu_count() or 2) - 1))
+    if workers <= 1 or len(jobs) <= 1:
+        return [process_recording(j, opts) for j in jobs]
+    results: List[BatchResult] = []
+    # spawn: workers start clean (no inherited threads / provider pools)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+        futs = {pool.submit(process_recording, j, opts): j for j in jobs}
+        for fut in as_completed(futs):
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                j = futs[fut]
+                results.append(BatchResult(session_id=j.session_id, source=j.source, error=f"{type(e).__name__}: {e}"))
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("sources", nargs="+", help="video files and/or frame directories")
+    ap.add_argument("--audio", action="append", default=[], metavar="SOURCE=AUDIO",
+                    help="audio file for a source (default: sibling file with the same stem, or the video's track)")
+    ap.add_argument("--out", default="batch_out")
+    ap.add_argument("--workers", type=int, default=0, help="parallel recordings (0 = auto)")
+    ap.add_argument("--interval", type=float, default=2.0, help="frame sampling period in seconds")
+    ap.add_argument("--stt-provider", default="openai", choices=["openai", "faster-whisper", "none"])
+    ap.add_argument("--whisper-size", default="small")
+    ap.add_argument("--llm-provider", default="openai", choices=["openai", "ollama"])
+    ap.add_argument("--llm-model", default="gpt-4o-mini")
+    ap.add_argument("--max-questions", type=int, default=6)
+    ap.add_argument("--no-preprocess", action="store_true")
+    ap.add_argument("--no-rubric", action="store_true", help="skip answer scoring")
+    ap.add_argument("--context-tokens", type=int, default=400,
+                    help="budget for related slides/speech retrieved into each question prompt (0 = off)")
+    args = ap.parse_args(argv)
+
+    audio_map = dict(a.split("=", 1) for a in args.audio)
+    jobs = [BatchJob(source=s, audio=audio_map.get(s)) for s in args.sources]
+    seen: Dict[str, int] = {}
+    for j in jobs:
+        stem = Path(j.source).stem or Path(j.source).name
+        seen[stem] = seen.get(stem, 0) + 1
+        j.session_id = f"batch_{stem}" + (f"_{seen[stem]}" if seen[stem] > 1 else "")
+
+    opts = BatchOptions(
+        out_dir=args.out, interval_s=args.interval, stt_provider=args.stt_provider, whisper_size=args.whisper_size,
+        llm_provider=args.llm_provider, llm_model=args.llm_model, max_questions=args.max_questions,
+        ocr_preprocess=not args.no_preprocess, rubric=not args.no_rubric,
+        retrieval_budget_tokens=args.context_tokens,
+    )
+    t0 = time.monotonic()
+    results = run_batch(jobs, opts, args.workers)
+    for r in results:
+        status = f"ERROR {r.error}" if r.error else f"{r.frames} frames, {r.slides} slides, {r.questions} questions"
+        print(f"[{r.session_id}] {status} ({r.seconds:.1f}s) -> {r.out_path or '-'}")
+    Path(args.out).mkdir(parents=True, exist_ok=True)
+    (Path(args.out) / "batch_summary.json").write_text(json.dumps([asdict(r) for r in results], indent=2), encoding="utf-8")
+    print(f"{len(results)} recordings in {time.monotonic() - t0:.1f}s")
+    return 1 if any(r.error for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
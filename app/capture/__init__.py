@@ -1,2 +1,2 @@
-from .screen import capture_screen  # noqa: F401
+from .screen import Frame, capture_screen, get_source, grab_frame  # noqa: F401
 
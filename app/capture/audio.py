@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import io
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+# ---------------------------------------------------------
+# Ring buffer
+# ---------------------------------------------------------
+class AudioRingBuffer:
+    """
+    Fixed-size float32 ring buffer addressed by absolute sample index.
+    Writers append; readers ask for [start, end) as long as it is still
+    inside the last `capacity` samples.
+    """
+
+    def __init__(self, capacity_s: float = 30.0, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = int(sample_rate)
+        self.capacity = int(capacity_s * sample_rate)
+        self._buf = np.zeros(self.capacity, dtype=np.float32)
+        self._written = 0  # total samples ever written
+        self._lock = threading.Lock()
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    def write(self, samples: np.ndarray) -> None:
+        x = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if x.size > self.capacity:
+            x = x[-self.capacity:]
+        with self._lock:
+            start = self._written % self.capacity
+            first = min(x.size, self.capacity - start)
+            self._buf[start:start + first] = x[:first]
+            if first < x.size:
+                self._buf[: x.size - first] = x[first:]
+            self._written += x.size
+
+    def read(self, start: int, end: Optional[int] = None) -> np.ndarray:
+        with self._lock:
+            end = self._written if end is None else min(end, self._written)
+            start = max(start, self._written - self.capacity, 0)
+            n = end - start
+            if n <= 0:
+                return np.zeros(0, dtype=np.float32)
+            i = start % self.capacity
+            if i + n <= self.capacity:
+                return self._buf[i:i + n].copy()
+            return np.concatenate([self._buf[i:], self._buf[: n - (self.capacity - i)]])
+
+
+# ---------------------------------------------------------
+# Sources (all push mono float32 @ SAMPLE_RATE into a ring)
+# ---------------------------------------------------------
+class AudioSource:
+    name = "base"
+
+    def start(self, ring: AudioRingBuffer) -> None:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        pass
+
+
+class MicSource(AudioSource):
+    """Default input device via sounddevice (callback thread, no polling)."""
+
+    name = "mic"
+
+    def __init__(self, device: Optional[Union[int, str]] = None, block_s: float = 0.1):
+        self.device = device
+        self.block_s = block_s
+        self._stream = None
+
+    def start(self, ring: AudioRingBuffer) -> None:
+        import sounddevice as sd  # type: ignore
+
+        def _cb(indata, _frames, _time, _status) -> None:
+            ring.write(indata[:, 0])
+
+        self._stream = sd.InputStream(
+            samplerate=ring.sample_rate,
+            channels=1,
+            dtype="float32",
+            blocksize=int(ring.sample_rate * self.block_s),
+            device=self.device,
+            callback=_cb,
+        )
+        self._stream.start()
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+class _ThreadedSource(AudioSource):
+    """Feeds pre-computed samples into the ring in real time (or as fast as possible)."""
+
+    def __init__(self, realtime: bool = True, block_s: float = 0.1, loop: bool = False):
+        self.realtime = realtime
+        self.block_s = block_s
+        self.loop = loop
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _samples(self, sample_rate: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def start(self, ring: AudioRingBuffer) -> None:
+        data = self._samples(ring.sample_rate)
+        block = max(1, int(ring.sample_rate * self.block_s))
+
+        def _run() -> None:
+            while not self._stop.is_set():
+                for i in range(0, data.size, block):
+                    if self._stop.is_set():
+                        return
+                    ring.write(data[i:i + block])
+                    if self.realtime:
+                        time.sleep(self.block_s)
+                if not self.loop:
+                    return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=_run, name=f"audio-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+
+class FileSource(_ThreadedSource):
+    """Replays an audio file (path or bytes) as if it were a microphone."""
+
+    name = "file"
+
+    def __init__(self, audio: Union[str, bytes], **kw):
+        super().__init__(**kw)
+        self.audio = audio
+
+    def _samples(self, sample_rate: int) -> np.ndarray:
+        from app.services.whisper_pool import decode_audio
+
+        if isinstance(self.audio, bytes):
+            return decode_audio(self.audio, sample_rate)
+        with open(self.audio, "rb") as f:
+            return decode_audio(f.read(), sample_rate)
+
+
+class SyntheticSource(_ThreadedSource):
+    """Speech-like bursts (modulated tones) separated by silence, for headless tests."""
+
+    name = "synthetic"
+
+    def __init__(self, pattern: Tuple[Tuple[float, float], ...] = ((2.0, 1.0), (3.0, 1.5)), **kw):
+        kw.setdefault("loop", True)
+        super().__init__(**kw)
+        self.pattern = pattern  # (speech_s, silence_s) pairs
+
+    def _samples(self, sample_rate: int) -> np.ndarray:
+        return synth_speech(self.pattern, sample_rate)
+
+
+def synth_speech(pattern, sample_rate: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    parts = []
+    for speech_s, silence_s in pattern:
+        t = np.arange(int(speech_s * sample_rate)) / sample_rate
+        voiced = 0.3 * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+        parts.append(voiced.astype(np.float32))
+        parts.append((rng.standard_normal(int(silence_s * sample_rate)) * 0.002).astype(np.float32))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+def get_audio_source(name: str) -> AudioSource:
+    if name == "mic":
+        return MicSource()
+    if name == "synthetic":
+        return SyntheticSource()
+    raise ValueError(f"Unknown audio source: {name}")
+
+
+def to_wav_bytes(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """In-memory WAV (for API providers that want a file upload)."""
+    import soundfile as sf  # type: ignore
+
+    buf = io.BytesIO()
+    sf.write(buf, samples, sample_rate, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
+
+
+# ---------------------------------------------------------
+# Voice activity detection + utterance chunking
+# ---------------------------------------------------------
+class EnergyVad:
+    """
+    Frame-energy VAD with an adaptive noise floor.
+    A frame is speech when its RMS is `margin_db` above the running floor
+    (and above an absolute minimum, so digital silence never counts).
+    """
+
+    def __init__(self, frame_ms: int = 30, margin_db: float = 9.0, min_rms: float = 0.005):
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.min_rms = min_rms
+        self._floor = None  # running noise floor (RMS)
+
+    def frame_len(self, sample_rate: int = SAMPLE_RATE) -> int:
+        return max(1, int(sample_rate * self.frame_ms / 1000))
+
+    def speech_mask(self, samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+        n = self.frame_len(sample_rate)
+        k = samples.size // n
+        if k == 0:
+            return np.zeros(0, dtype=bool)
+        frames = samples[: k * n].reshape(k, n)
+        rms = np.sqrt((frames.astype(np.float64) ** 2).mean(axis=1)) + 1e-9
+
+        # floor falls fast and rises slowly, so long speech doesn't raise it
+        quiet = float(np.percentile(rms, 10))
+        if self._floor is None or quiet < self._floor:
+            self._floor = quiet
+        else:
+            self._floor += 0.01 * (quiet - self._floor)
+        thresh = max(self.min_rms, self._floor * 10 ** (self.margin_db / 20.0))
+        return rms > thresh
+
+
+@dataclass
+class Chunk:
+    start: int   # absolute sample index in the ring
+    end: int
+    final: bool  # utterance closed (silence or max length) vs. still growing
+    overlap: bool = False  # starts with audio already sent in the previous final chunk (forced split)
+
+
+class UtteranceChunker:
+    """
+    Turns the VAD mask into chunks to transcribe:
+    - while speech continues: a growing partial chunk every `step_s`
+    - after `silence_s` of silence or `max_s` of speech: a final chunk;
+      forced splits carry `overlap_s` into the next utterance so words at
+      the boundary are not cut (duplicates are merged by the transcriber).
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, step_s: float = 0.8, silence_s: float = 0.6,
+                 max_s: float = 8.0, overlap_s: float = 1.0, pad_s: float = 0.2):
+        self.sr = sample_rate
+        self.step = int(step_s * sample_rate)
+        self.silence = int(silence_s * sample_rate)
+        self.max_len = int(max_s * sample_rate)
+        self.overlap = int(overlap_s * sample_rate)
+        self.pad = int(pad_s * sample_rate)
+        self.vad = EnergyVad()
+
+        self._scanned = 0            # samples already run through VAD
+        self._utt_start: Optional[int] = None
+        self._last_voiced = 0
+        self._last_emit = 0
+        self._carried = False        # open utterance began with `overlap_s` from a forced split
+
+    def skip_to(self, pos: int) -> None:
+        """Forget any open utterance and resume scanning at `pos` (e.g. after pause)."""
+        self._scanned = pos
+        self._utt_start = None
+        self._last_emit = pos
+        self._carried = False
+
+    def feed(self, ring: AudioRingBuffer) -> Optional[Chunk]:
+        end = ring.written
+        new = ring.read(self._scanned, end)
+        if new.size == 0:
+            return None
+        start = end - new.size
+        mask = self.vad.speech_mask(new, self.sr)
+        n = self.vad.frame_len(self.sr)
+        self._scanned = start + mask.size * n  # partial trailing frame is re-read next time
+
+        voiced_idx = np.flatnonzero(mask)
+        if voiced_idx.size:
+            if self._utt_start is None:
+                self._utt_start = max(0, start + int(voiced_idx[0]) * n - self.pad)
+                self._last_emit = self._utt_start
+                self._carried = False
+            self._last_voiced = start + (int(voiced_idx[-1]) + 1) * n
+
+        if self._utt_start is None:
+            return None
+
+        s, now, carried = self._utt_start, self._scanned, self._carried
+        if now - self._last_voiced >= self.silence:
+            self._utt_start = None
+            return Chunk(s, min(now, self._last_voiced + self.pad), final=True, overlap=carried)
+        if now - s >= self.max_len:
+            self._utt_start = max(s, now - self.overlap)
+            self._last_emit = self._utt_start
+            self._carried = self.overlap > 0
+            return Chunk(s, now, final=True, overlap=carried)
+        if now - self._last_emit >= self.step:
+            self._last_emit = now
+            return Chunk(s, now, final=False, overlap=carried)
+        return None
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class ChangeResult:
+    changed: bool           # frame differs enough to be worth re-OCR'ing
+    slide_transition: bool  # structural change (new slide / new screen)
+    score: float            # fraction of thumbnail cells that changed, 0..1
+
+
+def _gray(pixels: np.ndarray) -> np.ndarray:
+    if pixels.ndim == 2:
+        return pixels.astype(np.float32)
+    rgb = pixels[..., :3].astype(np.float32)
+    return rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def thumbnail(pixels: np.ndarray, size: Tuple[int, int] = (64, 36)) -> np.ndarray:
+    """Block-mean downsample to (w,h) grayscale. Pure numpy, no resampling lib."""
+    tw, th = size
+    # Strided pre-decimation keeps large (4K) frames cheap; 4 samples/axis per cell remain.
+    sy = max(1, pixels.shape[0] // (th * 4))
+    sx = max(1, pixels.shape[1] // (tw * 4))
+    g = _gray(pixels[::sy, ::sx])
+    h, w = g.shape
+    bh, bw = max(1, h // th), max(1, w // tw)
+    ny, nx = min(th, h // bh), min(tw, w // bw)
+    g = g[: ny * bh, : nx * bw]
+    return g.reshape(ny, bh, nx, bw).mean(axis=(1, 3))
+
+
+def _ink_mask(thumb: np.ndarray, tolerance: float) -> np.ndarray:
+    """Cells that differ from the dominant background level (text, images, UI)."""
+    return np.abs(thumb - np.median(thumb)) > tolerance
+
+
+class ChangeDetector:
+    """
+    Cheap frame-difference gate between capture and OCR.
+
+    - `threshold`: fraction of thumbnail cells (0..1) that must change for the
+      frame to count as changed. A cell changes when its mean gray level moves
+      by more than `cell_tolerance` (absorbs compression/cursor noise).
+    - `transition_fraction`: a change is a slide transition when at least this
+      share of the content ("ink") cells changed, i.e. most of what was on
+      screen is different, not just a new bullet.
+
+    The reference only advances on a detected change, so slow drift still
+    accumulates and eventually triggers.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.001,
+        cell_tolerance: float = 3.0,
+        transition_fraction: float = 0.5,
+        thumb_size: Tuple[int, int] = (64, 36),
+    ):
+        self.threshold = float(threshold)
+        self.cell_tolerance = float(cell_tolerance)
+        self.transition_fraction = float(transition_fraction)
+        self.thumb_size = thumb_size
+        self._ref: Optional[np.ndarray] = None
+        self._force = False
+
+    def reset(self) -> None:
+        self._ref = None
+        self._force = False
+
+    def invalidate(self) -> None:
+        """Treat the next frame as changed (e.g. its OCR failed) without faking a transition."""
+        self._force = True
+
+    def check(self, pixels: np.ndarray) -> ChangeResult:
+        thumb = thumbnail(pixels, self.thumb_size)
+
+        if self._ref is None or self._ref.shape != thumb.shape:
+            self._ref = thumb
+            return ChangeResult(changed=True, slide_transition=True, score=1.0)
+
+        diff = np.abs(thumb - self._ref) > self.cell_tolerance
+        score = float(diff.mean())
+        changed = score > 0.0 and score >= self.threshold
+        if self._force:
+            self._force, changed = False, True
+        transition = False
+        if changed:
+            ink = _ink_mask(thumb, self.cell_tolerance) | _ink_mask(self._ref, self.cell_tolerance)
+            n_ink = int(ink.sum())
+            transition = n_ink == 0 or (diff & ink).sum() / n_ink >= self.transition_fraction
+            self._ref = thumb
+        return ChangeResult(changed=changed, slide_transition=bool(transition), score=score)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Deque
+
+
+class CaptureScheduler:
+    """
+    Adaptive capture interval, driven by screen activity and downstream load.
+
+    - Every unchanged frame stretches the interval by `backoff` (exponential,
+      capped at max); any detected change snaps it back to min.
+    - While a question is being generated the interval is stretched by
+      `busy_factor` (the new OCR text can't be used before it lands anyway).
+
+    The capture thread asks next_interval() / calls on_capture(); the OCR
+    thread reports every change-detector verdict with observe().
+    """
+
+    def __init__(self, backoff: float = 1.5, busy_factor: float = 2.0, rate_window_s: float = 60.0):
+        self.backoff = max(1.0, float(backoff))
+        self.busy_factor = max(1.0, float(busy_factor))
+        self.rate_window_s = float(rate_window_s)
+
+        self._lock = threading.Lock()
+        self._unchanged = 0  # consecutive unchanged frames
+        self._captures: Deque[float] = deque()
+        self._first = 0.0
+
+        self.interval_s = 0.0  # last interval handed out
+        self.changes = 0  # changed frames seen; lets the capture loop cut a long wait short
+        self.captures = 0
+        self.deferred = 0  # captures postponed because OCR was still busy
+
+    def observe(self, changed: bool) -> None:
+        with self._lock:
+            if changed:
+                self._unchanged = 0
+                self.changes += 1
+            else:
+                self._unchanged += 1
+
+    def next_interval(self, min_s: float, max_s: float, llm_busy: bool = False) -> float:
+        min_s = max(0.05, float(min_s))
+        max_s = max(min_s, float(max_s))
+        with self._lock:
+            # cap the exponent: the interval saturates at max_s long before this
+            interval = min_s * self.backoff ** min(self._unchanged, 32)
+        if llm_busy:
+            interval *= self.busy_factor
+        self.interval_s = min(max_s, interval)
+        return self.interval_s
+
+    def on_capture(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not self.captures:
+                self._first = now
+            self.captures += 1
+            self._captures.append(now)
+            while self._captures and self._captures[0] < now - self.rate_window_s:
+                self._captures.popleft()
+
+    @property
+    def rate_per_min(self) -> float:
+        """Effective captures per minute over the last `rate_window_s`."""
+        now = time.monotonic()
+        with self._lock:
+            n = sum(1 for t in self._captures if t >= now - self.rate_window_s)
+            span = min(self.rate_window_s, now - self._first) if self.captures else 0.0
+        return n * 60.0 / max(span, 1.0)
@@ -1,13 +1,198 @@
 from __future__ import annotations
 
+import io
 import subprocess
+import tempfile
+import threading
 import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from PIL import Image
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
 
+Region = Tuple[int, int, int, int]  # x,y,w,h
 
+
+# ---------------------------------------------------------
+# Frame container
+# ---------------------------------------------------------
+@dataclass
+class Frame:
+    """
+    One captured frame kept in memory as an HxWx3 uint8 RGB array.
+    PNG bytes are only produced when something (the UI) asks for them.
+    """
+    pixels: np.ndarray
+    ts_monotonic: float = field(default_factory=time.monotonic)
+    _png: Optional[bytes] = field(default=None, repr=False)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        h, w = self.pixels.shape[:2]
+        return int(w), int(h)
+
+    def to_image(self) -> Image.Image:
+        return Image.fromarray(self.pixels)
+
+    def png_bytes(self) -> bytes:
+        if self._png is None:
+            buf = io.BytesIO()
+            # compress_level=1: this is a preview, not an archive
+            self.to_image().save(buf, format="PNG", compress_level=1)
+            self._png = buf.getvalue()
+        return self._png
+
+
+# ---------------------------------------------------------
+# Frame sources
+# ---------------------------------------------------------
+class FrameSource:
+    """Interface: grab(region) -> HxWx3 uint8 RGB array."""
+
+    name = "base"
+
+    def grab(self, region: Optional[Region]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class MssSource(FrameSource):
+    """
+    Grabs only the requested region straight into memory via mss.
+    mss handles are not thread-safe, so each thread gets its own.
+    """
+
+    name = "mss"
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+
+    def _sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            import mss  # type: ignore
+
+            sct = mss.mss()
+            self._local.sct = sct
+        return sct
+
+    def grab(self, region: Optional[Region]) -> np.ndarray:
+        sct = self._sct()
+        if region is None:
+            mon = sct.monitors[1]
+            box = {"left": mon["left"], "top": mon["top"], "width": mon["width"], "height": mon["height"]}
+        else:
+            x, y, w, h = region
+            box = {"left": int(x), "top": int(y), "width": int(w), "height": int(h)}
+
+        shot = sct.grab(box)
+        bgra = np.frombuffer(shot.bgra, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        return np.ascontiguousarray(bgra[:, :, 2::-1])  # BGRA -> RGB
+
+
+class ScreencaptureSource(FrameSource):
+    """Legacy macOS 'screencapture' path (full screen -> temp file -> crop)."""
+
+    name = "screencapture"
+
+    def grab(self, region: Optional[Region]) -> np.ndarray:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "shot.png"
+            subprocess.run(["screencapture", "-x", str(p)], check=True)
+            if not _wait_for_file(p):
+                raise RuntimeError(f"screencapture produced no valid file at {p}")
+            with Image.open(p) as img:
+                if region is not None:
+                    x, y, w, h = region
+                    img = img.crop((x, y, x + w, y + h))
+                return np.asarray(img.convert("RGB"))
+
+
+class SyntheticSource(FrameSource):
+    """
+    Headless stand-in: renders text "slides" and cycles through them.
+    Pass `slides` (list of slide texts) and how long each stays on screen.
+    """
+
+    name = "synthetic"
+
+    def __init__(
+        self,
+        slides: Optional[Sequence[str]] = None,
+        seconds_per_slide: float = 10.0,
+        clock=time.monotonic,
+    ) -> None:
+        self.slides: List[str] = list(slides or _DEFAULT_SLIDES)
+        self.seconds_per_slide = float(seconds_per_slide)
+        self._clock = clock
+        self._t0 = clock()
+        self._cache: Dict[Tuple[int, int, int], np.ndarray] = {}
+
+    def slide_index(self) -> int:
+        elapsed = self._clock() - self._t0
+        return int(elapsed // max(self.seconds_per_slide, 1e-6)) % len(self.slides)
+
+    def grab(self, region: Optional[Region]) -> np.ndarray:
+        w, h = (1280, 720) if region is None else (int(region[2]), int(region[3]))
+        key = (self.slide_index(), w, h)
+        arr = self._cache.get(key)
+        if arr is None:
+            arr = render_text_frame(self.slides[key[0]], (w, h))
+            if len(self._cache) > 64:
+                self._cache.clear()
+            self._cache[key] = arr
+        return arr.copy()
+
+
+_DEFAULT_SLIDES = [
+    "Project Overview\nReal-time interview assistant\n- Screen capture\n- OCR\n- LLM questions",
+    "Architecture\ncapture -> OCR -> orchestrator -> LLM\nStreamlit dashboard",
+    "def tick(state):\n    res = engine.drain()\n    apply(state, res)",
+    "Results\nLatency p95: 420 ms\nAccuracy: 93%",
+]
+
+
+def render_text_frame(text: str, size: Tuple[int, int], font_px: int = 28) -> np.ndarray:
+    """Draw dark text on a light background; used for synthetic slides."""
+    w, h = size
+    img = Image.new("RGB", (max(1, w), max(1, h)), (245, 245, 245))
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.load_default(size=font_px)
+    except TypeError:  # Pillow < 10.1
+        font = ImageFont.load_default()
+    y = font_px
+    for line in text.splitlines():
+        draw.text((font_px, y), line, fill=(20, 20, 20), font=font)
+        y += int(font_px * 1.5)
+    return np.asarray(img)
+
+
+_SOURCES: Dict[str, FrameSource] = {}
+_SOURCES_LOCK = threading.Lock()
+
+
+def get_source(name: str = "mss") -> FrameSource:
+    """Process-wide source per backend name ("mss" | "screencapture" | "synthetic")."""
+    with _SOURCES_LOCK:
+        src = _SOURCES.get(name)
+        if src is None:
+            factory = {
+                "mss": MssSource,
+                "screencapture": ScreencaptureSource,
+                "synthetic": SyntheticSource,
+            }.get(name)
+            if factory is None:
+                raise ValueError(f"Unknown capture backend: {name}")
+            src = factory()
+            _SOURCES[name] = src
+        return src
+
+
+# ---------------------------------------------------------
+# Public API
+# ---------------------------------------------------------
 def _wait_for_file(path: Path, timeout_s: float = 1.5) -> bool:
     t0 = time.time()
     while time.time() - t0 < timeout_s:
@@ -17,33 +202,27 @@ def _wait_for_file(path: Path, timeout_s: float = 1.5) -> bool:
     return path.exists() and path.stat().st_size > 0
 
 
+def grab_frame(
+    region: Optional[Region] = None,  # x,y,w,h
+    source: Optional[FrameSource] = None,
+) -> Frame:
+    """Capture the region into memory. No files are written."""
+    src = source or get_source("mss")
+    return Frame(pixels=src.grab(region))
+
+
 def capture_screen(
     out_path: str,
-    region: Optional[Tuple[int, int, int, int]] = None,  # x,y,w,h
+    region: Optional[Region] = None,  # x,y,w,h
+    source: Optional[FrameSource] = None,
 ) -> Tuple[str, Tuple[int, int]]:
     """
-    macOS screenshot using 'screencapture'.
-    Captures full screen to out_path then optionally crops region.
+    Capture the region and write it as a PNG (one encode, no re-reads).
+    Kept for callers that need a file; the live loop uses grab_frame().
     Returns (out_path, (width,height)).
     """
     p = Path(out_path)
     p.parent.mkdir(parents=True, exist_ok=True)
-
-    # Capture full screen silently
-    cmd = ["screencapture", "-x", str(p)]
-    subprocess.run(cmd, check=True)
-
-    if not _wait_for_file(p):
-        raise RuntimeError(f"screencapture produced no valid file at {p}")
-
-    # Open + optional crop
-    with Image.open(p) as img:
-        if region is not None:
-            x, y, w, h = region
-            cropped = img.crop((x, y, x + w, y + h))
-            cropped.save(p)
-
-    # Re-open to confirm final size
-    with Image.open(p) as img2:
-        return str(p), (img2.size[0], img2.size[1])
-
+    frame = grab_frame(region, source)
+    p.write_bytes(frame.png_bytes())
+    return str(p), frame.size
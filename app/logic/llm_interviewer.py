@@ -1,12 +1,31 @@
 from __future__ import annotations
 
-import os
 import time
-from typing import Tuple
+from typing import Callable, Optional, Tuple
 
+from app.services.guard import get_guard
+from app.services.llm_cache import cache_key, get_llm_cache
+from app.services.metrics import get_metrics
+from app.services.providers import call_with_retries, get_provider, replay_tokens, stream_with_retries
 
-def _has_key() -> bool:
-    return bool(os.getenv("OPENAI_API_KEY"))
+# Prompt budget: the question prompt stays the same size however long the session runs
+OCR_CONTEXT_CHARS = 1500
+MEMORY_CHARS = 2000
+
+# Runs a zero-argument call in a shared worker slot (app.logic.sessions.SessionGate.runner)
+SlotRunner = Callable[[Callable[[], str]], str]
+
+
+def _in_slot(run_in_slot: Optional[SlotRunner], fn: Callable[[float], str]) -> Callable[[float], str]:
+    """fn(left) for the guard, taking a slot only around the provider request; the slot wait comes out of `left`."""
+    if run_in_slot is None:
+        return fn
+
+    def _slotted(left: float) -> str:
+        t0 = time.monotonic()
+        return run_in_slot(lambda: fn(max(0.0, left - (time.monotonic() - t0))))
+
+    return _slotted
 
 
 def generate_question(
@@ -17,19 +36,38 @@ def generate_question(
     difficulty: str,
     question_index: int,
     max_questions: int,
+    provider: str = "openai",
+    timeout_s: float = 20.0,
+    on_token: Optional[Callable[[str], None]] = None,
+    use_cache: bool = True,
+    project_memory: str = "",
+    retrieved_context: str = "",
+    run_in_slot: Optional[SlotRunner] = None,
 ) -> Tuple[str, float, str]:
     """
     Returns (question, latency_ms, error_message)
     error_message is "" on success.
+    provider: "openai" | "ollama" (pooled client, deadline + jittered retries)
+    on_token: if given, the completion is streamed and each text delta is
+    passed to it as it arrives; latency_ms is still the total time.
+    use_cache: serve repeats of the same (normalized) prompt from the local
+    response cache; skipped automatically for high-temperature sampling.
+    project_memory: bounded rolling summary of the session so far
+    (app.logic.summarizer); OCR context and memory are both capped.
+    retrieved_context: earlier slide/transcript snippets relevant to the
+    current slide (app.logic.retrieval), already within the caller's token
+    budget (sidebar / --context-tokens), so it is not clipped again here.
+    run_in_slot: the session's share of the shared LLM slots. Only the
+    provider request runs in it: cache hits and callers that join an
+    identical in-flight request never hold a slot.
     """
-    if not _has_key():
-        return "", 0.0, "OPENAI_API_KEY not set"
-
     t0 = time.time()
     try:
-        from openai import OpenAI  # type: ignore
-
-        client = OpenAI()
+        llm = get_provider(provider)
+        reason = llm.available()
+        if reason:
+            get_metrics().record("llm", 0.0, error=True)
+            return "", 0.0, reason
 
         system = (
             "You are an AI interviewer for a software/ML project demo. "
@@ -37,26 +75,120 @@ def generate_question(
             "No bullet lists. No multiple questions."
         )
 
+        memory = (project_memory or "").strip()
+        if len(memory) > MEMORY_CHARS:
+            # Session summary comes first and is the most condensed: keep the head
+            memory = memory[:MEMORY_CHARS].rsplit(" ", 1)[0] + " …"
+        retrieved = (retrieved_context or "").strip()
         user = (
             f"Difficulty: {difficulty}\n"
             f"Question {question_index}/{max_questions}\n\n"
-            f"On-screen OCR context (may be noisy):\n{ocr_context}\n\n"
+            + (f"What the presentation has covered so far (summary):\n{memory}\n\n" if memory else "")
+            + (f"Related earlier slides and remarks (retrieved, may be noisy):\n{retrieved}\n\n" if retrieved else "")
+            + f"On-screen OCR context (may be noisy):\n{(ocr_context or '')[:OCR_CONTEXT_CHARS]}\n\n"
             "Ask ONE question that tests architecture + implementation detail."
         )
 
-        resp = client.chat.completions.create(
-            model=model,
-            temperature=float(temperature),
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
-        )
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+
+        cache = get_llm_cache() if use_cache else None
+        key = ""
+        if cache is not None and not cache.bypass(temperature):
+            key = cache_key(provider=provider, model=model, temperature=temperature, prompt=messages)
+            hit = cache.get(key)
+            if hit is not None:
+                if on_token is not None:
+                    replay_tokens(hit, on_token)
+                get_metrics().inc("llm_cache_hits_total")  # not an LLM call: kept out of llm latency
+                return hit, (time.time() - t0) * 1000.0, ""
 
-        q = (resp.choices[0].message.content or "").strip()
+        def _call(left: float) -> str:
+            # `left`: what remains of timeout_s after waiting for a rate-limit token / slot
+            if on_token is not None:
+                return stream_with_retries(
+                    lambda t: llm.stream_chat(messages, model=model, temperature=temperature, timeout_s=t),
+                    on_token,
+                    deadline_s=left,
+                )
+            return call_with_retries(
+                lambda t: llm.chat(messages, model=model, temperature=temperature, timeout_s=t),
+                deadline_s=left,
+            )
+
+        # Same prompt already in flight (another session, or the prefetcher): share that call.
+        # Not for streaming callers: a follower would get no tokens, only the final text.
+        same = ""
+        if on_token is None:
+            same = key or cache_key(provider=provider, model=model, temperature=temperature, prompt=messages)
+        q = get_guard(provider).call(_in_slot(run_in_slot, _call), key=same, timeout_s=timeout_s)
         ms = (time.time() - t0) * 1000.0
+        if key and q:
+            cache.put(key, q, ms)  # type: ignore[union-attr]
+        get_metrics().record("llm", ms)
         return q, ms, ""
     except Exception as e:
         ms = (time.time() - t0) * 1000.0
+        get_metrics().record("llm", ms, error=True)
         return "", ms, f"{type(e).__name__}: {e}"
 
+
+def summarize_notes(
+    text: str,
+    *,
+    model: str,
+    provider: str = "openai",
+    kind: str = "chunk",
+    max_words: int = 80,
+    timeout_s: float = 30.0,
+    run_in_slot: Optional[SlotRunner] = None,
+) -> Tuple[str, float, str]:
+    """
+    Returns (summary, latency_ms, error_message): one level of the rolling
+    session summary. kind: "chunk" (raw OCR/transcript notes), "section"
+    (several chunk summaries) or "session" (running summary + a section).
+    Deterministic (temperature 0), so repeats are served from the response cache.
+    run_in_slot: as for generate_question.
+    """
+    t0 = time.time()
+    try:
+        llm = get_provider(provider)
+        reason = llm.available()
+        if reason:
+            get_metrics().record("summarize", 0.0, error=True)
+            return "", 0.0, reason
+
+        system = (
+            "You maintain running notes about a student's software/ML project presentation. "
+            f"Summarize the {kind} notes below in at most {max_words} words: components, data flow, "
+            "technologies, design decisions and claims made. Plain sentences, no preamble."
+        )
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": text},
+        ]
+        cache = get_llm_cache()
+        key = cache_key(provider=provider, model=model, temperature=0.0, prompt=messages) if cache else ""
+        hit = cache.get(key) if cache else None
+        if hit is not None:
+            return hit, (time.time() - t0) * 1000.0, ""
+
+        out = get_guard(provider).call(
+            _in_slot(run_in_slot, lambda left: call_with_retries(
+                lambda t: llm.chat(messages, model=model, temperature=0.0, timeout_s=t),
+                deadline_s=left,
+            )),
+            key=key or cache_key(provider=provider, model=model, temperature=0.0, prompt=messages),
+            timeout_s=timeout_s,
+        )
+        ms = (time.time() - t0) * 1000.0
+        if cache and out:
+            cache.put(key, out, ms)
+        get_metrics().record("summarize", ms)
+        return out, ms, ""
+    except Exception as e:
+        ms = (time.time() - t0) * 1000.0
+        get_metrics().record("summarize", ms, error=True)
+        return "", ms, f"{type(e).__name__}: {e}"
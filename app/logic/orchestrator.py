@@ -1,12 +1,33 @@
 from __future__ import annotations
 
+import threading
 import time
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-
-from app.state import AppState
-from app.capture.screen import capture_screen
-from app.services.stt import transcribe_audio_bytes
+from typing import List, Optional
+
+from app.state import AppState, QARecord
+from app.capture.audio import get_audio_source, to_wav_bytes
+from app.capture.scheduler import CaptureScheduler
+from app.capture.screen import Frame, get_source, grab_frame
+from app.logic.pipeline import PipelineConfig, PipelineEngine, QuestionRequest
+from app.logic.prefetch import QuestionPrefetcher
+from app.logic.retrieval import ContextIndex
+from app.logic.rubric import RubricEngine
+from app.logic.summarizer import RollingSummarizer
+from app.services.guard import guard_stats
+from app.services.journal import JOURNAL_NAME, KNOB_FIELDS, METRIC_FIELDS, list_journals, open_journal, read_events, replay
+from app.services.llm_cache import get_llm_cache
+from app.services.llm_scorer import score_answers
+from app.services.metrics import get_metrics
+from app.services.ocr_cache import OcrCache
+from app.services.ocr_engine import get_ocr_engine
+from app.services.ocr_preprocess import OcrPreprocessor
+from app.services.ocr_tiles import TiledOcr
+from app.services.stt import transcribe_audio_array, transcribe_audio_bytes
+from app.services.stt_stream import StreamingTranscriber
+from app.services.whisper_pool import get_whisper_registry
 
 # If you have OCR service, keep it. Otherwise it will be caught safely.
 try:
@@ -14,22 +35,32 @@ try:
 except Exception:
     run_ocr = None  # type: ignore
 
-from app.logic.llm_interviewer import generate_question
+from app.logic.llm_interviewer import MEMORY_CHARS, generate_question, summarize_notes
 
 
 ASSETS_DIR = Path(__file__).resolve().parents[1] / "assets"
-LATEST_FRAME = ASSETS_DIR / "latest_frame.png"
+OCR_CACHE_DIR = ASSETS_DIR / "ocr_cache"
+SESSIONS_DIR = ASSETS_DIR / "sessions"
+
+FALLBACK_QUESTION = "Can you briefly explain the overall architecture of this project (modules + data flow)?"
+DEFAULT_FOLLOWUP = "What’s one concrete implementation detail you’re proud of?"
+STOP_SCORING_WAIT_S = 15.0  # stop_session waits this long for the last rubric batch before closing the journal
 
 
 def _now_iso() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
-def _next_difficulty(state: AppState) -> str:
+def _epoch_iso(t: Optional[float]) -> str:
+    return datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S") if t else ""
+
+
+def _next_difficulty(state: AppState, ahead: int = 0) -> str:
+    """Difficulty for the next question (`ahead`=1: the one after that)."""
     if not state.auto_difficulty_ramp:
         return state.current_difficulty or "easy"
 
-    n = len(state.qa_history)
+    n = len(state.qa_history) + ahead
     if n < 2:
         return "easy"
     if n < 4:
@@ -37,32 +68,472 @@ def _next_difficulty(state: AppState) -> str:
     return "hard"
 
 
+# ---------------------------------------------------------
+# Background pipeline wiring
+# ---------------------------------------------------------
+def _gated(state: AppState, kind: str, fn):
+    """Route a heavy call through the session's share of the process-wide pools."""
+    return fn if state._gate is None else state._gate.wrap(kind, fn)
+
+
+def _slotted(state: AppState, fn):
+    """An LLM helper that takes its "llm" slot itself, around the provider request only (run_in_slot)."""
+    return fn if state._gate is None else partial(fn, run_in_slot=state._gate.runner("llm"))
+
+
+def _capture_frame(cfg: PipelineConfig) -> Frame:
+    """Grab the configured region into memory (no PNG round trip)."""
+    return grab_frame(cfg.region, source=get_source(cfg.capture_backend))
+
+
+def _pipeline_config(state: AppState) -> PipelineConfig:
+    return PipelineConfig(
+        region=(state.region_x, state.region_y, state.region_w, state.region_h),
+        interval_sec=float(state.screenshot_interval_sec or 2.0),
+        adaptive_capture=bool(state.capture_adaptive),
+        max_interval_sec=float(state.capture_max_interval_sec),
+        capture_backend=state.capture_backend,
+        change_threshold=float(state.change_threshold),
+    )
+
+
+def _start_pipeline(state: AppState) -> PipelineEngine:
+    disk_dir = OCR_CACHE_DIR / state.session_id if (state.ocr_cache_disk and state.session_id) else None
+    ocr_fn = None
+    if run_ocr is not None:
+        # Warm, shared worker pool instead of one tesseract fork per frame
+        ocr_engine = get_ocr_engine(state.ocr_workers, state.ocr_engine_mode)
+        ocr_fn = _gated(state, "ocr", ocr_engine.ocr)
+        if state.ocr_tiled:
+            # Only re-read line bands that changed since the previous frame
+            ocr_fn = TiledOcr(_gated(state, "ocr", ocr_engine.ocr_many), band_px=state.ocr_band_px)
+    question_fn = _slotted(state, generate_question)
+    preprocess = OcrPreprocessor(target_line_px=state.ocr_target_line_px) if state.ocr_preprocess else None
+    engine = PipelineEngine(
+        capture_fn=_capture_frame,
+        ocr_fn=ocr_fn,
+        question_fn=question_fn,
+        config=_pipeline_config(state),
+        ocr_cache=OcrCache(disk_dir=disk_dir),
+        preprocess_fn=preprocess,
+        scheduler=CaptureScheduler(),
+    )
+    engine.start()
+    state._pipeline = engine
+    if state.prefetch_enabled:
+        state._prefetcher = QuestionPrefetcher(question_fn)
+    return engine
+
+
+def _stop_pipeline(state: AppState) -> None:
+    engine: Optional[PipelineEngine] = state._pipeline
+    prefetcher: Optional[QuestionPrefetcher] = state._prefetcher
+    state._pipeline = None
+    state._prefetcher = None
+    if engine is not None:
+        engine.stop()
+    if prefetcher is not None:
+        prefetcher.shutdown()
+
+
+# ---------------------------------------------------------
+# Rubric scoring
+# ---------------------------------------------------------
+def _start_rubric(state: AppState) -> None:
+    _stop_rubric(state)
+    if state.rubric_enabled:
+        state._rubric = RubricEngine(
+            _gated(state, "llm", score_answers),
+            model=state.llm_model,
+            provider=state.llm_provider,
+            batch_size=int(state.rubric_batch_size),
+            cache=get_llm_cache() if state.llm_cache_enabled else None,
+        )
+
+
+def _stop_rubric(state: AppState) -> None:
+    engine: Optional[RubricEngine] = state._rubric
+    state._rubric = None
+    if engine is not None:
+        engine.shutdown()
+
+
+def _poll_rubric(state: AppState) -> None:
+    engine: Optional[RubricEngine] = state._rubric
+    if engine is None:
+        return
+    err = engine.last_error
+    engine.poll()
+    if engine.version != state._rubric_version:
+        state._rubric_version = engine.version
+        state.rubric = engine.rubric()
+        state.rubric_provisional = engine.provisional
+        _journal(state, "rubric", rubric=state.rubric, provisional=state.rubric_provisional)
+    if engine.last_error and engine.last_error != err:
+        state.log_warn(f"Rubric scoring failed ({engine.last_error}); keeping provisional scores.")
+
+
+# ---------------------------------------------------------
+# Project memory (rolling summary)
+# ---------------------------------------------------------
+def _start_summarizer(state: AppState) -> None:
+    _stop_summarizer(state)
+    if state.summarizer_enabled:
+        state._summarizer = RollingSummarizer(
+            _slotted(state, summarize_notes), model=state.llm_model, provider=state.llm_provider,
+        )
+
+
+def _stop_summarizer(state: AppState) -> None:
+    summarizer: Optional[RollingSummarizer] = state._summarizer
+    state._summarizer = None
+    if summarizer is not None:
+        summarizer.shutdown()
+
+
+def _poll_summarizer(state: AppState) -> None:
+    summarizer: Optional[RollingSummarizer] = state._summarizer
+    if summarizer is None:
+        return
+    err = summarizer.last_error
+    if summarizer.poll():
+        state.project_memory = summarizer.memory(max_chars=MEMORY_CHARS)
+        _journal(state, "memory", **summarizer.snapshot())
+    if summarizer.last_error and summarizer.last_error != err:
+        state.log_warn(f"Summarizer LLM failed ({summarizer.last_error}); used an extractive summary.")
+
+
+# ---------------------------------------------------------
+# Retrieval index (earlier slides / transcript -> prompt)
+# ---------------------------------------------------------
+def _context_index(state: AppState) -> ContextIndex:
+    if state._context_index is None:
+        state._context_index = ContextIndex()
+    return state._context_index
+
+
+def _index_ocr(state: AppState, text: str, ts: Optional[str]) -> None:
+    index = _context_index(state)
+    index.add_ocr(text, slide=state.slide_index, ts=ts or _now_iso())
+    state.context_docs = len(index)
+
+
+def _index_transcript(state: AppState, text: str) -> None:
+    index = _context_index(state)
+    index.add_transcript(text, slide=state.slide_index, ts=_now_iso())
+    state.context_docs = len(index)
+
+
+def _retrieved_context(state: AppState) -> str:
+    """Earlier snippets most relevant to the current slide + what was just said (memoized per index/query)."""
+    index: Optional[ContextIndex] = state._context_index
+    if not state.retrieval_enabled or index is None or not len(index):
+        return ""
+    query = f"{state.ocr_text}\n{state.transcript_tail[-400:]}"
+    text = index.context(query, budget_tokens=int(state.retrieval_budget_tokens), exclude=[state.ocr_text])
+    state.retrieval_ms = index.last_ms
+    return text
+
+
+def _rebuild_index(state: AppState, path: Path) -> None:
+    """Re-index a journaled session (no OCR/STT is redone)."""
+    index = ContextIndex()
+    slide = 0
+    for ev in read_events(path):
+        kind = ev.get("k")
+        if kind == "slide":
+            slide = int(ev.get("slide", slide + 1))
+        elif kind == "ocr":
+            index.add_ocr(ev.get("text", ""), slide=slide, ts=_epoch_iso(ev.get("t")))
+        elif kind == "stt":
+            index.add_transcript(ev.get("text", ""), slide=slide, ts=_epoch_iso(ev.get("t")))
+    state._context_index = index
+    state.context_docs = len(index)
+
+
+# ---------------------------------------------------------
+# Session journal
+# ---------------------------------------------------------
+def _journal(state: AppState, kind: str, **data) -> None:
+    if state._journal is not None:
+        state._journal.record(kind, **data)
+
+
+def _journal_metrics(state: AppState) -> None:
+    _journal(state, "metrics", **{name: getattr(state, name) for name in METRIC_FIELDS})
+
+
+def _open_journal(state: AppState) -> None:
+    if state.journal_enabled and state.session_id:
+        try:
+            state._journal = open_journal(SESSIONS_DIR / state.session_id)
+        except OSError as e:
+            state.log_warn(f"Session journal unavailable: {e}")
+
+
+def _close_journal(state: AppState) -> None:
+    journal = state._journal
+    state._journal = None
+    if journal is not None:
+        journal.close()
+
+
+def _question_request(state: AppState, ahead: int = 0) -> QuestionRequest:
+    return QuestionRequest(
+        model=state.llm_model,
+        temperature=state.llm_temperature,
+        ocr_context=state.ocr_text or "",
+        difficulty=_next_difficulty(state, ahead),
+        question_index=len(state.qa_history) + 1 + ahead,
+        max_questions=int(state.max_questions),
+        provider=state.llm_provider,
+        timeout_s=float(state.llm_timeout_s),
+        stream=bool(state.llm_stream),
+        use_cache=bool(state.llm_cache_enabled),
+        project_memory=state.project_memory,
+        retrieved_context=_retrieved_context(state),
+    )
+
+
+def _set_question(state: AppState, question: str, difficulty: str) -> None:
+    state.current_question = question
+    state.current_difficulty = difficulty
+    state.question_streaming = False
+    state.question_asked_ts = _now_iso()
+    state._answer_start = len(state.transcript)
+    state.followup_queue = [DEFAULT_FOLLOWUP]
+    _journal(state, "question", question=question, difficulty=difficulty,
+             asked_ts=state.question_asked_ts, answer_start=state._answer_start)
+
+
+def _on_slide_change(state: AppState, ts: str, score: float) -> None:
+    """Slide transition hook: other stages key off state.slide_index."""
+    state.slide_index += 1
+    state.slide_events.append({"slide": state.slide_index, "ts": ts, "score": round(score, 4)})
+    del state.slide_events[:-50]
+    _journal(state, "slide", slide=state.slide_index, ts=ts, score=round(score, 4))
+    state.log_info(f"Slide transition -> #{state.slide_index} (change={score:.3f})")
+
+
+def _stream_transcribe_fn(state: AppState):
+    provider, model = state.stt_provider, state.stt_model
+    size, compute_type = state.whisper_size, state.whisper_compute_type
+
+    def _fn(samples):
+        if provider == "faster-whisper":
+            return transcribe_audio_array(samples, whisper_size=size, compute_type=compute_type)
+        return transcribe_audio_bytes(to_wav_bytes(samples), filename="chunk.wav", provider=provider, model=model)
+
+    return _fn
+
+
+def _start_audio(state: AppState) -> None:
+    if not (state.stt_enabled and state.stt_live and state.stt_provider != "none"):
+        return
+    try:
+        stream = StreamingTranscriber(
+            get_audio_source(state.audio_source),
+            _gated(state, "stt", _stream_transcribe_fn(state)),
+            max_chunk_s=float(state.audio_chunk_seconds or 8.0),
+            partials=state.stt_provider == "faster-whisper",  # remote STT: finals only, one request each
+        )
+        stream.start()
+        state._audio_stream = stream
+        state.log_info(f"Live STT started (source={state.audio_source}).")
+    except Exception as e:
+        state.log_error(f"Live STT unavailable: {type(e).__name__}: {e}")
+
+
+def _stop_audio(state: AppState) -> None:
+    stream: Optional[StreamingTranscriber] = state._audio_stream
+    state._audio_stream = None
+    if stream is not None:
+        stream.stop()
+
+
+def _append_transcript(state: AppState, text: str) -> None:
+    state.transcript.append(text)
+    _journal(state, "stt", text=text)
+    if state._summarizer is not None:
+        state._summarizer.feed_transcript(text)
+    _index_transcript(state, text)
+    state.transcript_tail = state.transcript.tail(800)
+
+
+def _warm_whisper(state: AppState) -> None:
+    """Load the local Whisper model in the background so the first chunk is fast."""
+    size, compute_type = state.whisper_size, state.whisper_compute_type
+
+    def _run() -> None:
+        try:
+            get_whisper_registry().warm(size, compute_type=compute_type)
+        except Exception:
+            pass  # surfaced as an STT error on first use
+
+    threading.Thread(target=_run, name="whisper-warm", daemon=True).start()
+
+
+def _highlights(text: str, limit: int = 6) -> List[str]:
+    hl = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if len(line) >= 6:
+            hl.append(line[:120])
+        if len(hl) >= limit:
+            break
+    return hl
+
+
+# ---------------------------------------------------------
+# Session lifecycle
+# ---------------------------------------------------------
 def start_session(state: AppState) -> None:
+    _stop_pipeline(state)
+    _stop_audio(state)
+    _stop_rubric(state)
+    _stop_summarizer(state)
+    _close_journal(state)
     state.reset_runtime()
     state.session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     state.status = "RUNNING"
+    if state.spill_to_disk:
+        state.attach_spill(SESSIONS_DIR / state.session_id)
+    _open_journal(state)
+    _journal(state, "session", session_id=state.session_id, knobs={k: getattr(state, k) for k in KNOB_FIELDS})
+    _journal(state, "status", status=state.status)
+    _start_pipeline(state)
+    _start_rubric(state)
+    _start_summarizer(state)
+    if state.stt_enabled and state.stt_provider == "faster-whisper":
+        _warm_whisper(state)
+    _start_audio(state)
     state.log_info("Session started.")
 
 
+def resume_session(state: AppState, session_id: str) -> bool:
+    """
+    Rebuild a session from its journal (e.g. after a crash or browser reload)
+    and keep running it, appending to the same journal.
+    """
+    path = SESSIONS_DIR / session_id / JOURNAL_NAME
+    if not path.exists():
+        state.log_warn(f"No journal for {session_id}.")
+        return False
+    _stop_pipeline(state)
+    _stop_audio(state)
+    _stop_rubric(state)
+    _stop_summarizer(state)
+    _close_journal(state)
+    state.reset_runtime()
+    t0 = time.perf_counter()
+    if state.spill_to_disk:
+        # Spill files are derived data: the replay below rewrites them
+        for name in ("system_log.jsonl", "transcript.txt", "qa_history.jsonl"):
+            (path.parent / name).unlink(missing_ok=True)
+        state.attach_spill(path.parent)
+    replay(path, state)
+    _rebuild_index(state, path)
+    state.ocr_highlights = _highlights(state.ocr_text)
+    state.session_id = session_id
+    state.status = "RUNNING"
+    _open_journal(state)
+    _journal(state, "status", status=state.status)
+    _start_pipeline(state)
+    _start_rubric(state)
+    if state._rubric is not None:
+        # Already-scored answers come straight from the score cache
+        for rec in state.qa_history:
+            state._rubric.submit(rec.question, rec.answer, rec)
+        _poll_rubric(state)
+    _start_summarizer(state)
+    if state._summarizer is not None and state._memory_snapshot:
+        # Continue the hierarchy from its last journaled levels; nothing is re-summarized
+        state._summarizer.restore(state._memory_snapshot)
+        state.project_memory = state._summarizer.memory(max_chars=MEMORY_CHARS)
+    if state.stt_enabled and state.stt_provider == "faster-whisper":
+        _warm_whisper(state)
+    _start_audio(state)
+    state.log_info(
+        f"Session resumed from journal in {(time.perf_counter() - t0) * 1000.0:.0f} ms "
+        f"({len(state.qa_history)} answered, {len(state.transcript)} transcript chars)."
+    )
+    return True
+
+
+def resumable_sessions() -> List[str]:
+    return list_journals(SESSIONS_DIR)
+
+
 def pause_resume(state: AppState) -> None:
     if state.status == "RUNNING":
         state.status = "PAUSED"
+        if state._pipeline is not None:
+            state._pipeline.pause()
+        if state._audio_stream is not None:
+            state._audio_stream.pause()
+        _journal(state, "status", status=state.status)
         state.log_info("Session paused.")
     elif state.status == "PAUSED":
         state.status = "RUNNING"
+        if state._pipeline is not None:
+            state._pipeline.resume()
+        if state._audio_stream is not None:
+            state._audio_stream.resume()
+        _journal(state, "status", status=state.status)
         state.log_info("Session resumed.")
 
 
 def stop_session(state: AppState) -> None:
+    _stop_pipeline(state)
+    _stop_audio(state)
+    state.flush_spill()
     state.status = "STOPPED"
+    if state._rubric is not None:
+        # Score the remainder now and journal it, so the session file is complete without another tick
+        state._rubric.flush(wait_s=STOP_SCORING_WAIT_S)
+        kept = state._rubric.finalize()
+        if kept:
+            state.log_info(f"{kept} answer(s) left unscored by the LLM keep their heuristic score.")
+        _poll_rubric(state)
+    _journal_metrics(state)
+    _journal(state, "status", status=state.status)
+    _close_journal(state)
     state.log_info("Session stopped.")
 
 
 def clear_state(state: AppState) -> None:
+    _stop_pipeline(state)
+    _stop_audio(state)
+    _stop_rubric(state)
+    _stop_summarizer(state)
+    _close_journal(state)
     state.reset_runtime()
     state.log_info("Cleared runtime state.")
 
 
+def next_question(state: AppState) -> None:
+    """Close the current question: file it with the answer transcript, then move on."""
+    if not state.current_question or state.question_streaming:
+        return
+    answer = state.transcript.since(state._answer_start).strip()
+    record = QARecord(
+        question=state.current_question,
+        difficulty=state.current_difficulty,
+        answer=answer,
+        asked_ts=state.question_asked_ts,
+        answered_ts=_now_iso(),
+        slide_index=state.slide_index,
+    )
+    state.qa_history.append(record)
+    _journal(state, "answer", **record.to_dict())
+    if state._rubric is not None:
+        state._rubric.submit(record.question, record.answer, record)  # provisional score right away
+        _poll_rubric(state)
+    state.current_question = ""
+    state.followup_queue = []
+    state.log_info(f"Q{len(state.qa_history)} answered ({len(answer)} chars).")
+
+
 def process_uploaded_audio(state: AppState, audio_bytes: bytes, filename: str) -> None:
     """Manual STT: upload audio -> transcribe -> append transcript."""
     if not audio_bytes:
@@ -73,13 +544,16 @@ def process_uploaded_audio(state: AppState, audio_bytes: bytes, filename: str) -
         state.log_warn("STT disabled in settings.")
         return
 
-    text, ms, err = transcribe_audio_bytes(
+    text, ms, err = _gated(state, "stt", transcribe_audio_bytes)(
         audio_bytes,
         filename=filename,
         provider=state.stt_provider,
         model=state.stt_model,
+        whisper_size=state.whisper_size,
+        compute_type=state.whisper_compute_type,
     )
 
+    get_metrics().record("stt", ms, error=bool(err))
     if err:
         state.log_error(f"STT failed: {err}")
         return
@@ -88,105 +562,213 @@ def process_uploaded_audio(state: AppState, audio_bytes: bytes, filename: str) -
     state.stt_latency_ms = ms
 
     if text:
-        # append to transcript
-        if state.transcript:
-            state.transcript += "\n"
-        state.transcript += text
-        state.transcript_tail = state.transcript[-800:]
+        _append_transcript(state, text)
         state.log_info(f"STT ok ({ms:.1f} ms): +{len(text)} chars")
     else:
         state.log_warn("STT returned empty text.")
 
 
+def _apply_stt_updates(state: AppState, updates) -> None:
+    metrics = get_metrics()
+    for upd in updates:
+        if not upd.final:
+            # Re-transcriptions of the utterance in progress: counted apart from real STT calls
+            state.stt_partial_calls += 1
+            metrics.observe("stt_partial_ms", upd.latency_ms)
+            if not upd.error:
+                state.transcript_partial = upd.text
+            continue
+        metrics.record("stt", upd.latency_ms, error=bool(upd.error))
+        if upd.error:
+            state.log_warn(f"Live STT failed: {upd.error}")
+            continue
+        state.stt_calls += 1
+        state.stt_latency_ms = upd.latency_ms
+        state.transcript_partial = ""
+        if upd.text:
+            _append_transcript(state, upd.text)
+            state._last_stt_monotonic = time.monotonic()
+
+
 def tick(state: AppState) -> None:
     """
-    Called every Streamlit rerun.
-    - Captures screen periodically (when RUNNING)
-    - Runs OCR (if available)
-    - Generates a question (LLM) when needed
+    Called every Streamlit rerun. Never blocks on capture/OCR/LLM:
+    - Applies the newest capture + OCR results from the background pipeline
+    - Queues a question request when one is needed
     """
+    with get_metrics().span("tick"):
+        _tick(state)
+
+
+def _tick(state: AppState) -> None:
     state.last_tick_ts = _now_iso()
 
+    # Also after stop: a batch that outlived STOP_SCORING_WAIT_S still updates the panel
+    _poll_rubric(state)
+
     if state.status != "RUNNING":
         return
 
-    # -------------------
-    # Capture throttling (monotonic)
-    # -------------------
-    interval = float(state.screenshot_interval_sec or 2.0)
-    now_m = time.monotonic()
+    engine: Optional[PipelineEngine] = state._pipeline
+    if engine is None or not engine.started:
+        # e.g. the process restarted under a RUNNING session
+        engine = _start_pipeline(state)
+    engine.configure(_pipeline_config(state))
 
-    if (now_m - float(state._last_capture_monotonic or 0.0)) < interval:
-        return
+    res = engine.drain()
+
+    for level, msg in res.logs:
+        getattr(state, f"log_{level}", state.log_info)(msg)
 
-    state._last_capture_monotonic = now_m
+    if res.frames_dropped:
+        state.frames_dropped += res.frames_dropped
+    if res.ocr_skipped:
+        state.ocr_skips += res.ocr_skipped
+    metrics = get_metrics()
+    metrics.inc("frames_dropped_total", res.frames_dropped)
+    metrics.inc("ocr_skips_total", res.ocr_skipped)
 
     # -------------------
-    # Capture screenshot
+    # Capture
     # -------------------
-    try:
-        ASSETS_DIR.mkdir(parents=True, exist_ok=True)
-        out_path, (w, h) = capture_screen(
-            str(LATEST_FRAME),
-            region=(state.region_x, state.region_y, state.region_w, state.region_h),
-        )
-        state.latest_frame_path = out_path
-        state.latest_frame_ts = _now_iso()
-        state.latest_frame_size = (w, h)
-        state.log_info(f"Captured frame: {out_path} size=({w},{h})")
-    except Exception as e:
-        state.log_error(f"capture_screen failed: {type(e).__name__}: {e}")
-        return
+    if res.capture is not None:
+        cap = res.capture
+        state.latest_frame = cap.frame
+        state.latest_frame_ts = cap.ts
+        state.latest_frame_size = cap.size
+        _journal(state, "capture", ts=cap.ts, size=cap.size)
+        state.log_info(f"Captured frame: size=({cap.size[0]},{cap.size[1]})")
 
     # -------------------
-    # OCR (optional)
+    # OCR
     # -------------------
-    if run_ocr is not None:
-        try:
-            text, ms = run_ocr(state.latest_frame_path)
-            state.ocr_calls += 1
-            state.ocr_latency_ms = float(ms)
-            state.ocr_text = text or ""
-
-            hl = []
-            for line in (state.ocr_text or "").splitlines():
-                line = line.strip()
-                if len(line) >= 6:
-                    hl.append(line[:120])
-                if len(hl) >= 6:
-                    break
-            state.ocr_highlights = hl
-
-        except Exception as e:
-            state.log_warn(f"OCR failed: {type(e).__name__}: {e}")
-    else:
-        state.ocr_highlights = ["(OCR unavailable)"]
+    if res.ocr is not None:
+        ocr = res.ocr
+        if ocr.slide_transition:
+            _on_slide_change(state, ocr.capture.ts, ocr.change_score)
+        if not ocr.available:
+            state.ocr_highlights = ["(OCR unavailable)"]
+        elif ocr.error:
+            state.log_warn(f"OCR failed: {ocr.error}")
+        else:
+            if not ocr.cache_hit:
+                state.ocr_calls += 1
+                state.ocr_latency_ms = ocr.latency_ms
+            else:
+                metrics.inc("ocr_cache_hits_total")
+            if ocr.text != state.ocr_text:
+                _journal(state, "ocr", text=ocr.text)
+                if state._summarizer is not None:
+                    state._summarizer.feed_ocr(state.slide_index, ocr.text)
+                _index_ocr(state, ocr.text, ocr.capture.ts)
+            state.ocr_text = ocr.text
+            state.ocr_highlights = _highlights(ocr.text)
+
+    if isinstance(engine.ocr_fn, TiledOcr) and engine.ocr_fn.bands_total:
+        tiled = engine.ocr_fn
+        state.ocr_bands_reocr_ratio = tiled.bands_ocrd / tiled.bands_total
+
+    if isinstance(engine.preprocess_fn, OcrPreprocessor):
+        state.ocr_scale_factor = engine.preprocess_fn.last_factor
+        metrics.set_gauge("ocr_scale_factor", state.ocr_scale_factor)
+
+    sched = engine.scheduler
+    if sched is not None:
+        state.capture_interval_s = sched.interval_s
+        state.capture_rate_per_min = sched.rate_per_min
+        state.captures_deferred = sched.deferred
+
+    cache = engine.ocr_cache
+    if cache is not None:
+        state.ocr_cache_hits = cache.hits
+        state.ocr_cache_hit_rate = cache.hit_rate
+        state.ocr_cache_saved_ms = cache.saved_ms
 
     # -------------------
-    # LLM question generation
+    # Live STT
     # -------------------
-    if not state.current_question and len(state.qa_history) < int(state.max_questions):
-        difficulty = _next_difficulty(state)
-        q_index = len(state.qa_history) + 1
+    if state._audio_stream is not None:
+        _apply_stt_updates(state, state._audio_stream.drain())
 
-        q, ms, err = generate_question(
-            model=state.llm_model,
-            temperature=state.llm_temperature,
-            ocr_context=state.ocr_text or "",
-            difficulty=difficulty,
-            question_index=q_index,
-            max_questions=int(state.max_questions),
-        )
+    _poll_summarizer(state)
 
-        if err:
-            state.log_error(f"LLM failed ({err})")
-            q = "Can you briefly explain the overall architecture of this project (modules + data flow)?"
+    # -------------------
+    # LLM question generation
+    # -------------------
+    for qr in res.questions:
+        q = qr.question
+        if qr.error:
+            state.log_error(f"LLM failed ({qr.error})")
+            q = FALLBACK_QUESTION
             state.log_warn("Used fallback question.")
         else:
             state.llm_calls += 1
-            state.llm_latency_ms = ms
-
-        state.current_difficulty = difficulty
-        state.current_question = q
-        state.followup_queue = ["What’s one concrete implementation detail you’re proud of?"]
+            state.llm_latency_ms = qr.latency_ms
+            if qr.ttft_ms:
+                state.llm_ttft_ms = qr.ttft_ms
+
+        _set_question(state, q, qr.request.difficulty)
+
+    if res.question_partial and not res.questions:
+        # tokens so far; replaced by the final text when the stream completes
+        state.current_question = res.question_partial
+        state.question_streaming = True
+        state.current_difficulty = _next_difficulty(state)
+        if res.question_ttft_ms:
+            state.llm_ttft_ms = res.question_ttft_ms
+
+    prefetcher: Optional[QuestionPrefetcher] = state._prefetcher
+
+    if (
+        not state.current_question
+        and not engine.question_in_flight
+        and len(state.qa_history) < int(state.max_questions)
+        # wait for the first OCR pass so the question has on-screen context
+        and engine.ocr_completed > 0
+    ):
+        req = _question_request(state)
+        status, hit = "miss", None
+        if prefetcher is not None and req.question_index > 1:
+            status, hit = prefetcher.take(req, state.slide_index)
+        if status == "hit" and hit is not None:
+            _set_question(state, hit[0], req.difficulty)
+            state.llm_calls += 1
+            state.llm_latency_ms = hit[1]
+            metrics.inc("prefetch_hits_total")
+            state.log_info("Used prefetched question (no LLM wait).")
+        elif status == "miss":
+            engine.request_question(req)
+        # "pending": a fresh prefetch is about to land; don't issue a duplicate call
 
+    # -------------------
+    # Speculative prefetch of the *next* question while this one is answered
+    # -------------------
+    if prefetcher is not None:
+        if (
+            state.current_question
+            and not state.question_streaming
+            and len(state.qa_history) + 1 < int(state.max_questions)
+        ):
+            prefetcher.ensure(_question_request(state, ahead=1), state.slide_index)
+            nxt = prefetcher.ready_text()
+            state.followup_queue = [nxt] if nxt else [DEFAULT_FOLLOWUP]
+        state.prefetch_hits = prefetcher.hits
+        state.prefetch_misses = prefetcher.misses
+        state.prefetch_discarded = prefetcher.discarded
+
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        state.llm_cache_hits = llm_cache.hits
+        state.llm_cache_hit_rate = llm_cache.hit_rate
+
+    for name, g in guard_stats().items():
+        was = state.provider_circuits.get(name, "closed")
+        if g["state"] != was:
+            if g["state"] == "open":
+                state.log_warn(f"{name} circuit open after repeated failures ({g['last_error']}); failing fast.")
+            elif g["state"] == "closed":
+                state.log_info(f"{name} recovered; circuit closed.")
+            state.provider_circuits[name] = g["state"]
+
+    if state._journal is not None and state._journal.due("metrics", 10.0):
+        _journal_metrics(state)
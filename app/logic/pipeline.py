@@ -0,0 +1,477 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+from app.capture.change import ChangeDetector
+from app.capture.scheduler import CaptureScheduler
+from app.capture.screen import Frame
+from app.services.guard import CircuitOpen, get_guard
+from app.services.metrics import get_metrics
+from app.services.ocr import OCR_UNAVAILABLE, OcrUnavailable
+from app.services.ocr_cache import OcrCache, frame_key
+
+
+def _now_iso() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# ---------------------------------------------------------
+# Messages passed between stages / back to tick()
+# ---------------------------------------------------------
+@dataclass
+class PipelineConfig:
+    """Snapshot of the AppState knobs the worker stages need."""
+    region: Tuple[int, int, int, int] = (0, 0, 1280, 720)
+    interval_sec: float = 2.0  # fixed interval, or the fastest one when adaptive
+    adaptive_capture: bool = True
+    max_interval_sec: float = 6.0  # adaptive back-off ceiling
+    capture_backend: str = "mss"
+    change_threshold: float = 0.001
+
+
+@dataclass
+class CaptureResult:
+    frame: Frame
+    ts: str
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.frame.size
+
+
+@dataclass
+class OcrResult:
+    capture: CaptureResult
+    text: str = ""
+    latency_ms: float = 0.0
+    error: str = ""
+    available: bool = True
+    cache_hit: bool = False
+    slide_transition: bool = False
+    change_score: float = 0.0
+
+
+@dataclass
+class QuestionRequest:
+    model: str
+    temperature: float
+    ocr_context: str
+    difficulty: str
+    question_index: int
+    max_questions: int
+    provider: str = "openai"
+    timeout_s: float = 20.0
+    stream: bool = True
+    use_cache: bool = True
+    project_memory: str = ""
+    retrieved_context: str = ""
+
+
+@dataclass
+class QuestionResult:
+    request: QuestionRequest
+    question: str = ""
+    latency_ms: float = 0.0
+    ttft_ms: float = 0.0  # time to first token (streaming only)
+    error: str = ""
+
+
+@dataclass
+class PipelineResults:
+    """Everything produced since the previous drain()."""
+    capture: Optional[CaptureResult] = None
+    ocr: Optional[OcrResult] = None
+    questions: List[QuestionResult] = field(default_factory=list)
+    question_partial: Optional[str] = None  # streamed text so far, if a question is in flight
+    question_ttft_ms: float = 0.0
+    logs: List[Tuple[str, str]] = field(default_factory=list)  # (level, msg)
+    frames_dropped: int = 0
+    ocr_skipped: int = 0  # unchanged frames that bypassed OCR
+
+
+_STOP = object()
+
+
+class LatestQueue:
+    """
+    Bounded queue that drops the *oldest* item when full.
+    Producers never block, so a slow consumer only ever sees fresh data.
+    """
+
+    def __init__(self, maxsize: int = 1):
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(maxsize)))
+        self.dropped = 0
+
+    def put_latest(self, item: Any) -> None:
+        while True:
+            try:
+                self._q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._q.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        return self._q.get(timeout=timeout)
+
+    def qsize(self) -> int:
+        return self._q.qsize()
+
+
+# ---------------------------------------------------------
+# Engine
+# ---------------------------------------------------------
+CaptureFn = Callable[[PipelineConfig], Frame]
+OcrFn = Callable[[Any], Tuple[str, float]]
+PreprocessFn = Callable[[Any], Any]
+QuestionFn = Callable[..., Tuple[str, float, str]]
+
+
+class PipelineEngine:
+    """
+    capture thread -> frame queue -> change gate -> OCR thread -> latest OCR slot
+                                   question queue -> LLM thread -> results
+
+    Lifecycle mirrors the session: start() / pause() / resume() / stop().
+    Workers never touch AppState; tick() pulls results with drain().
+    """
+
+    def __init__(
+        self,
+        *,
+        capture_fn: CaptureFn,
+        ocr_fn: Optional[OcrFn],
+        question_fn: QuestionFn,
+        config: Optional[PipelineConfig] = None,
+        frame_queue_size: int = 1,
+        ocr_cache: Optional[OcrCache] = None,
+        preprocess_fn: Optional[PreprocessFn] = None,
+        scheduler: Optional[CaptureScheduler] = None,
+    ):
+        self._capture_fn = capture_fn
+        self.ocr_fn = ocr_fn
+        self.preprocess_fn = preprocess_fn
+        self._question_fn = question_fn
+        self.ocr_cache = ocr_cache
+        self.scheduler = scheduler
+
+        self._cfg_lock = threading.Lock()
+        self._config = config or PipelineConfig()
+
+        self._detector = ChangeDetector(threshold=self._config.change_threshold)
+        self._frames = LatestQueue(frame_queue_size)
+        self._questions: "queue.Queue[Any]" = queue.Queue(maxsize=1)
+
+        self._out_lock = threading.Lock()
+        self._latest_capture: Optional[CaptureResult] = None
+        self._latest_ocr: Optional[OcrResult] = None
+        self._question_results: List[QuestionResult] = []
+        self._question_partial: Optional[str] = None
+        self._question_ttft_ms = 0.0
+        self._logs: Deque[Tuple[str, str]] = deque(maxlen=200)
+        self._dropped_reported = 0
+
+        self._running = threading.Event()  # cleared while paused
+        self._stopping = threading.Event()
+        self._question_in_flight = threading.Event()
+        self._ocr_busy = threading.Event()  # a frame is between dequeue and OCR result
+        self.ocr_completed = 0  # frames that finished the OCR stage (ok, failed or skipped)
+        self._ocr_skipped = 0
+        self._threads: List[threading.Thread] = []
+
+    # -------------------
+    # Lifecycle
+    # -------------------
+    @property
+    def started(self) -> bool:
+        return bool(self._threads) and not self._stopping.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return self.started and not self._running.is_set()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._running.set()
+        for name, target in (
+            ("capture", self._capture_loop),
+            ("ocr", self._ocr_loop),
+            ("question", self._question_loop),
+        ):
+            t = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def pause(self) -> None:
+        self._running.clear()
+
+    def resume(self) -> None:
+        if not self._stopping.is_set():
+            self._running.set()
+
+    def stop(self, timeout_s: float = 2.0) -> None:
+        """Stop all stages. An in-flight LLM call is abandoned, not awaited."""
+        self._stopping.set()
+        self._running.set()  # wake a paused capture loop so it can exit
+        self._frames.put_latest(_STOP)
+        try:
+            self._questions.put_nowait(_STOP)
+        except queue.Full:
+            pass
+        deadline = time.monotonic() + timeout_s
+        for t in self._threads:
+            t.join(timeout=max(0.0, deadline - time.monotonic()))
+
+    def configure(self, config: PipelineConfig) -> None:
+        with self._cfg_lock:
+            self._config = config
+
+    def _get_config(self) -> PipelineConfig:
+        with self._cfg_lock:
+            return self._config
+
+    # -------------------
+    # tick() side
+    # -------------------
+    @property
+    def question_in_flight(self) -> bool:
+        return self._question_in_flight.is_set()
+
+    def request_question(self, req: QuestionRequest) -> bool:
+        """Queue a question; returns False if one is already being generated."""
+        if self._stopping.is_set() or self._question_in_flight.is_set():
+            return False
+        self._question_in_flight.set()
+        try:
+            self._questions.put_nowait(req)
+        except queue.Full:
+            self._question_in_flight.clear()
+            return False
+        return True
+
+    def drain(self) -> PipelineResults:
+        with self._out_lock:
+            res = PipelineResults(
+                capture=self._latest_capture,
+                ocr=self._latest_ocr,
+                questions=self._question_results,
+                question_partial=self._question_partial,
+                question_ttft_ms=self._question_ttft_ms,
+                logs=list(self._logs),
+                ocr_skipped=self._ocr_skipped,
+            )
+            self._ocr_skipped = 0
+            self._latest_capture = None
+            self._latest_ocr = None
+            self._question_results = []
+            self._logs.clear()
+
+        dropped = self._frames.dropped
+        res.frames_dropped = dropped - self._dropped_reported
+        self._dropped_reported = dropped
+        return res
+
+    def _log(self, level: str, msg: str) -> None:
+        with self._out_lock:
+            self._logs.append((level, msg))
+
+    # -------------------
+    # Worker stages
+    # -------------------
+    def _capture_loop(self) -> None:
+        next_due = 0.0
+        last_capture = 0.0
+        deferred = False
+        seen_changes = 0
+        while not self._stopping.is_set():
+            if not self._running.wait(timeout=0.25):
+                continue
+            if self._stopping.is_set():
+                break
+
+            cfg = self._get_config()
+            sched = self.scheduler
+            now_m = time.monotonic()
+            if sched is not None and sched.changes != seen_changes:
+                # Activity resumed: snap back instead of sitting out a backed-off wait
+                seen_changes = sched.changes
+                next_due = min(next_due, last_capture + float(cfg.interval_sec or 2.0))
+            if now_m < next_due:
+                self._stopping.wait(min(next_due - now_m, 0.05 if sched is not None else 0.25))
+                continue
+
+            if sched is not None and cfg.adaptive_capture:
+                # OCR backlog: a frame grabbed now would only replace the queued
+                # one, so wait for OCR to free up (at most max_interval_sec).
+                backlog = self._ocr_busy.is_set() or self._frames.qsize() > 0
+                if backlog and now_m < last_capture + float(cfg.max_interval_sec):
+                    if not deferred:
+                        deferred = True
+                        sched.deferred += 1
+                    self._stopping.wait(0.05)
+                    continue
+                interval = sched.next_interval(cfg.interval_sec, cfg.max_interval_sec, llm_busy=self.question_in_flight)
+            else:
+                interval = max(0.05, float(cfg.interval_sec or 2.0))
+            next_due = now_m + interval
+            last_capture = now_m
+            deferred = False
+
+            try:
+                with get_metrics().span("capture"):
+                    frame = self._capture_fn(cfg)
+            except Exception as e:
+                self._log("error", f"capture failed: {type(e).__name__}: {e}")
+                continue
+
+            cap = CaptureResult(frame=frame, ts=_now_iso())
+            with self._out_lock:
+                self._latest_capture = cap
+            self._frames.put_latest(cap)
+            metrics = get_metrics()
+            metrics.set_gauge("queue_depth", self._frames.qsize(), queue="frames")
+            metrics.set_gauge("capture_interval_s", interval)
+            if sched is not None:
+                sched.on_capture()
+                metrics.set_gauge("capture_rate_per_min", sched.rate_per_min)
+
+    def _ocr_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                cap = self._frames.get(timeout=0.25)
+            except queue.Empty:
+                continue
+            if cap is _STOP:
+                break
+            self._ocr_busy.set()
+            try:
+                self._process_frame(cap)
+            finally:
+                self._ocr_busy.clear()
+
+    def _process_frame(self, cap: CaptureResult) -> None:
+        self._detector.threshold = self._get_config().change_threshold
+        change = self._detector.check(cap.frame.pixels)
+        if self.scheduler is not None:
+            self.scheduler.observe(change.changed)
+
+        if not change.changed:
+            # Static frame: previous ocr_text/highlights stay valid.
+            with self._out_lock:
+                self._ocr_skipped += 1
+                self.ocr_completed += 1
+            return
+
+        if self.ocr_fn is None:
+            res = OcrResult(capture=cap, available=False)
+        else:
+            try:
+                res = self._run_ocr(cap)
+            except Exception as e:
+                res = OcrResult(capture=cap, error=f"{type(e).__name__}: {e}")
+            if res.error:
+                # Don't let a failed read pin the reference: retry on the next frame.
+                self._detector.invalidate()
+        res.slide_transition = change.slide_transition
+        res.change_score = change.score
+
+        with self._out_lock:
+            prev = self._latest_ocr
+            if prev is not None and prev.slide_transition:
+                # undrained transition must not be lost when overwritten
+                res.slide_transition = True
+            self._latest_ocr = res
+            self.ocr_completed += 1
+
+    def _run_ocr(self, cap: CaptureResult) -> OcrResult:
+        pixels = cap.frame.pixels
+        if self.preprocess_fn is not None:
+            # before the cache key: hashing the small binarized image is cheaper,
+            # and frames differing only by noise/antialiasing share an entry
+            t0 = time.perf_counter()
+            pixels = self.preprocess_fn(pixels)
+            get_metrics().observe("ocr_preprocess_ms", (time.perf_counter() - t0) * 1000.0)
+        cache = self.ocr_cache
+        key = frame_key(pixels) if cache is not None else ""
+        if cache is not None:
+            hit = cache.get(key)
+            if hit is not None:
+                return OcrResult(capture=cap, text=hit.text, cache_hit=True)
+
+        def _read(_left: Optional[float]) -> Tuple[str, float]:
+            text, ms = self.ocr_fn(pixels)  # type: ignore[misc]
+            if text == OCR_UNAVAILABLE:
+                raise OcrUnavailable("OCR unavailable")  # counts against the "ocr" breaker
+            return text, ms
+
+        try:
+            # The guard lives here, in the parent: run_ocr itself runs in the worker processes,
+            # where a breaker would neither be shared nor visible in the metrics panel
+            with get_metrics().span("ocr"):
+                text, ms = get_guard("ocr").call(_read)
+        except (CircuitOpen, OcrUnavailable) as e:
+            # Not slide text: report a failure so the detector retries this
+            # frame and the previous OCR text is kept
+            return OcrResult(capture=cap, available=False, error=str(e))
+        text = text or ""
+        if cache is not None:
+            cache.put(key, text, ms)
+        return OcrResult(capture=cap, text=text, latency_ms=float(ms))
+
+    def _question_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                req = self._questions.get(timeout=0.25)
+            except queue.Empty:
+                continue
+            if req is _STOP:
+                break
+
+            t0 = time.monotonic()
+            parts: List[str] = []
+            ttft = [0.0]
+
+            def _on_token(delta: str) -> None:
+                if not parts:
+                    ttft[0] = (time.monotonic() - t0) * 1000.0
+                parts.append(delta)
+                with self._out_lock:
+                    self._question_partial = "".join(parts)
+                    self._question_ttft_ms = ttft[0]
+
+            try:
+                q, ms, err = self._question_fn(
+                    model=req.model,
+                    temperature=req.temperature,
+                    ocr_context=req.ocr_context,
+                    difficulty=req.difficulty,
+                    question_index=req.question_index,
+                    max_questions=req.max_questions,
+                    provider=req.provider,
+                    timeout_s=req.timeout_s,
+                    on_token=_on_token if req.stream else None,
+                    use_cache=req.use_cache,
+                    project_memory=req.project_memory,
+                    retrieved_context=req.retrieved_context,
+                )
+            except Exception as e:
+                q, ms, err = "", 0.0, f"{type(e).__name__}: {e}"
+            if ttft[0]:
+                get_metrics().observe("llm_ttft_ms", ttft[0])
+
+            with self._out_lock:
+                self._question_results.append(
+                    QuestionResult(request=req, question=q, latency_ms=ms, ttft_ms=ttft[0], error=err)
+                )
+                self._question_partial = None
+            self._question_in_flight.clear()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, FrozenSet, Optional, Tuple
+
+from app.logic.pipeline import QuestionRequest
+
+QuestionFn = Callable[..., Tuple[str, float, str]]
+
+_TOKEN = re.compile(r"[a-z0-9_]{3,}")
+
+
+def context_tokens(text: str) -> FrozenSet[str]:
+    return frozenset(_TOKEN.findall((text or "").lower()))
+
+
+def _memory_tokens(req: QuestionRequest) -> FrozenSet[str]:
+    return context_tokens(f"{req.project_memory}\n{req.retrieved_context}")
+
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two token sets (1.0 when both empty)."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / float(len(a | b) or 1)
+
+
+@dataclass
+class _Candidate:
+    req: QuestionRequest
+    slide_index: int
+    tokens: FrozenSet[str]
+    memory_tokens: FrozenSet[str]
+    future: "Future[Tuple[str, float, str]]"
+    started: float
+
+
+class QuestionPrefetcher:
+    """
+    Speculatively generates the *next* question while the candidate is
+    still answering the current one, so turnover doesn't wait on the LLM.
+
+    A candidate is only reused if it was made for the same question index
+    and difficulty, on the same slide, its OCR context is still at least
+    `min_similarity` similar (Jaccard over tokens), and so is the project
+    memory + retrieved context it was prompted with; otherwise it is dropped.
+    At most one generation runs at a time: a stale candidate that is
+    already running is left to finish before its replacement is submitted.
+    """
+
+    def __init__(self, question_fn: QuestionFn, min_similarity: float = 0.6):
+        self._question_fn = question_fn
+        self.min_similarity = float(min_similarity)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._cand: Optional[_Candidate] = None
+        self._running: Optional["Future[Tuple[str, float, str]]"] = None  # last submitted, even if dropped
+
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _fresh(self, c: _Candidate, req: QuestionRequest, slide_index: int, tokens: FrozenSet[str]) -> bool:
+        return (
+            c.req.question_index == req.question_index
+            and c.req.difficulty == req.difficulty
+            and c.slide_index == slide_index
+            and similarity(c.tokens, tokens) >= self.min_similarity
+            and similarity(c.memory_tokens, _memory_tokens(req)) >= self.min_similarity
+        )
+
+    def _run(self, req: QuestionRequest) -> Tuple[str, float, str]:
+        # Prefetched text is shown all at once, so no token streaming here
+        return self._question_fn(**{k: v for k, v in vars(req).items() if k != "stream"})
+
+    def ensure(self, req: QuestionRequest, slide_index: int) -> None:
+        """Keep a fresh candidate for `req` in flight (or ready); replace stale ones."""
+        tokens = context_tokens(req.ocr_context)
+        with self._lock:
+            c = self._cand
+            if c is not None and self._fresh(c, req, slide_index, tokens):
+                return
+            if c is not None:
+                c.future.cancel()
+                self._cand = None
+                self.discarded += 1
+            if self._running is not None and not self._running.done():
+                return  # still generating a dropped candidate; submit once it is done (next call)
+            fut = self._pool.submit(self._run, replace(req, stream=False))
+            self._running = fut
+            self._cand = _Candidate(req, slide_index, tokens, _memory_tokens(req), fut, time.monotonic())
+
+    def ready_text(self) -> str:
+        """The finished candidate's text ("" if none yet), e.g. for a follow-up preview."""
+        with self._lock:
+            c = self._cand
+        if c is None or not c.future.done() or c.future.cancelled():
+            return ""
+        q, _ms, err = c.future.result()
+        return "" if err else q
+
+    def take(self, req: QuestionRequest, slide_index: int) -> Tuple[str, Optional[Tuple[str, float]]]:
+        """
+        Returns ("hit", (question, latency_ms)) if a fresh candidate is ready,
+        ("pending", None) if a fresh one is still generating (don't issue a
+        duplicate call), or ("miss", None) when the caller must generate.
+        """
+        tokens = context_tokens(req.ocr_context)
+        with self._lock:
+            c = self._cand
+            if c is None or not self._fresh(c, req, slide_index, tokens):
+                if c is not None:
+                    c.future.cancel()
+                    self.discarded += 1
+                self._cand = None
+                self.misses += 1
+                return "miss", None
+            if not c.future.done():
+                return "pending", None
+            self._cand = None
+
+        q, ms, err = c.future.result()
+        if err or not q:
+            with self._lock:
+                self.misses += 1
+            return "miss", None
+        with self._lock:
+            self.hits += 1
+        return "hit", (q, ms)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._cand is not None:
+                self._cand.future.cancel()
+            self._cand = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
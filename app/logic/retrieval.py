@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from app.services.metrics import get_metrics
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9_\-\.]*[a-z0-9]|[a-z0-9]")
+_STOP = frozenset(
+    "the a an and or of to in on for with is are was were be been it this that these those as at by from "
+    "we our you your i my so do does did can will would should could not no yes um uh like just then than "
+    "there here what which who how why when where into about also very".split()
+)
+
+CHARS_PER_TOKEN = 4  # rough budget estimate; no tokenizer dependency
+
+
+def terms(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in _STOP]
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class Snippet:
+    doc_id: int
+    kind: str  # "ocr" | "stt"
+    slide: int
+    ts: str
+    text: str
+    score: float = 0.0
+
+    def render(self) -> str:
+        where = "slide" if self.kind == "ocr" else "said on slide"
+        clock = self.ts.replace("T", " ").split(" ")[-1][:8]
+        return f"[{where} {self.slide}{' @ ' + clock if clock else ''}] {self.text}"
+
+
+class ContextIndex:
+    """
+    In-memory inverted index over one session's distinct OCR snapshots and
+    transcript chunks, with BM25 ranking.
+
+    Adds are incremental (postings + running length totals, nothing is
+    rebuilt); a search touches only the postings of the query terms, so
+    lookups stay in the millisecond range for hundreds of slides.
+    Transcript text is buffered into ~`chunk_words` chunks before indexing.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, chunk_words: int = 60, max_query_terms: int = 32):
+        self.k1 = float(k1)
+        self.b = float(b)
+        self.chunk_words = int(chunk_words)
+        self.max_query_terms = int(max_query_terms)
+
+        self._postings: Dict[str, Dict[int, int]] = {}  # term -> {doc_id: tf}
+        self._docs: List[Snippet] = []
+        self._lengths: List[int] = []
+        self._total_len = 0
+        self._hashes: Dict[str, int] = {}  # normalized text hash -> doc_id
+
+        self._stt_buf: List[str] = []
+        self._stt_words = 0
+        self._stt_slide = 0
+        self._stt_ts = ""
+        self._memo: Optional[tuple] = None  # (key, context) of the last context() call
+        self.last_ms = 0.0  # last context() that actually searched
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # -------------------
+    # Adding
+    # -------------------
+    def add(self, text: str, *, kind: str, slide: int, ts: str) -> Optional[int]:
+        """Index one document; returns its id, or None if empty or an exact (normalized) repeat."""
+        norm = " ".join((text or "").split())
+        toks = terms(norm)
+        if not toks:
+            return None
+        h = hashlib.sha1(f"{kind}\x00{norm.lower()}".encode("utf-8")).hexdigest()
+        if h in self._hashes:
+            return None
+        doc_id = len(self._docs)
+        self._hashes[h] = doc_id
+        self._docs.append(Snippet(doc_id, kind, int(slide), ts or "", norm))
+        self._lengths.append(len(toks))
+        self._total_len += len(toks)
+        for term, tf in Counter(toks).items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        return doc_id
+
+    def add_ocr(self, text: str, *, slide: int, ts: str) -> Optional[int]:
+        return self.add(text, kind="ocr", slide=slide, ts=ts)
+
+    def add_transcript(self, text: str, *, slide: int, ts: str) -> Optional[int]:
+        """Buffered: indexes a chunk once `chunk_words` words have piled up (see flush_transcript)."""
+        text = (text or "").strip()
+        if not text:
+            return None
+        if not self._stt_buf:
+            self._stt_slide, self._stt_ts = int(slide), ts or ""
+        self._stt_buf.append(text)
+        self._stt_words += len(text.split())
+        if self._stt_words >= self.chunk_words:
+            return self.flush_transcript()
+        return None
+
+    def flush_transcript(self) -> Optional[int]:
+        if not self._stt_buf:
+            return None
+        text = " ".join(self._stt_buf)
+        self._stt_buf, self._stt_words = [], 0
+        return self.add(text, kind="stt", slide=self._stt_slide, ts=self._stt_ts)
+
+    # -------------------
+    # Retrieval
+    # -------------------
+    def search(self, query: str, k: int = 5, exclude: Sequence[str] = ()) -> List[Snippet]:
+        """
+        Top-k documents by BM25; `exclude` drops docs with exactly that text.
+        A whole slide as query is capped to its `max_query_terms` rarest
+        indexed terms: they carry nearly all the score, and cost is linear
+        in the postings touched.
+        """
+        n = len(self._docs)
+        if not n:
+            return []
+        avgdl = self._total_len / float(n)
+        qterms = [(t, c) for t, c in Counter(terms(query)).items() if t in self._postings]
+        qterms.sort(key=lambda tc: len(self._postings[tc[0]]))
+        scores: Dict[int, float] = {}
+        for term, qtf in qterms[: self.max_query_terms]:
+            posting = self._postings[term]
+            idf = math.log(1.0 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self._lengths[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + qtf * idf * tf * (self.k1 + 1.0) / (tf + norm)
+        skip = {" ".join(e.split()) for e in exclude if e}
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], -kv[0]))  # ties: most recent first
+        out: List[Snippet] = []
+        for doc_id, score in ranked:
+            doc = self._docs[doc_id]
+            if doc.text in skip:
+                continue
+            out.append(Snippet(doc.doc_id, doc.kind, doc.slide, doc.ts, doc.text, round(score, 4)))
+            if len(out) >= k:
+                break
+        return out
+
+    def context(
+        self,
+        query: str,
+        budget_tokens: int = 400,
+        k: int = 8,
+        exclude: Sequence[str] = (),
+        max_snippet_tokens: int = 160,
+    ) -> str:
+        """
+        Best snippets for the query, rendered one per line, within
+        `budget_tokens` (estimated). One OCR snapshot per slide: successive
+        reveals of a slide would otherwise crowd out everything else.
+        """
+        key = (len(self._docs), query, budget_tokens, k, tuple(exclude), max_snippet_tokens)
+        if self._memo is not None and self._memo[0] == key:
+            return self._memo[1]  # asked every tick (prefetch); only recomputed when index or query change
+        t0 = time.perf_counter()
+        lines: List[str] = []
+        used = 0
+        slides_seen = set()
+        for snip in self.search(query, k=k * 3, exclude=exclude):
+            if snip.kind == "ocr":
+                if snip.slide in slides_seen:
+                    continue
+                slides_seen.add(snip.slide)
+            if len(lines) >= k:
+                break
+            text = snip.text
+            if estimate_tokens(text) > max_snippet_tokens:
+                text = text[: max_snippet_tokens * CHARS_PER_TOKEN].rsplit(" ", 1)[0] + " …"
+            line = Snippet(snip.doc_id, snip.kind, snip.slide, snip.ts, text).render()
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget_tokens:
+                continue
+            lines.append(line)
+            used += cost
+        out = "\n".join(lines)
+        self._memo = (key, out)
+        self.last_ms = (time.perf_counter() - t0) * 1000.0
+        get_metrics().record("retrieve", self.last_ms)
+        return out
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.llm_cache import LLMResponseCache, cache_key
+from app.services.llm_scorer import RUBRIC_KEYS, Scores
+
+ScoreFn = Callable[..., Tuple[Dict[str, Scores], float, str]]
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9_\-']*|\d+(?:\.\d+)?")
+_SENTENCE = re.compile(r"[.!?]+\s+|\n+")
+_FILLERS = {"um", "uh", "erm", "like", "basically", "actually", "so", "just", "kind", "sort"}
+_TECH = {
+    "api", "async", "batch", "buffer", "cache", "class", "cluster", "config", "cpu", "database", "deploy",
+    "docker", "embedding", "endpoint", "gpu", "index", "inference", "latency", "layer", "library", "lock",
+    "memory", "model", "module", "numpy", "pipeline", "pool", "process", "protocol", "queue", "schema",
+    "server", "sql", "thread", "throughput", "token", "training", "vector", "worker",
+}
+_IMPL = {
+    "implemented", "wrote", "built", "used", "function", "method", "call", "calls", "returns", "loop",
+    "parameter", "test", "tests", "benchmark", "measured", "ms", "seconds", "percent", "%", "fix", "refactored",
+}
+
+
+def _words(text: str) -> List[str]:
+    return [w.lower() for w in _WORD.findall(text or "")]
+
+
+def heuristic_scores(question: str, answer: str) -> Scores:
+    """
+    Instant, local 0-5 estimate from surface features (no LLM): shown as the
+    provisional score until the LLM score for the answer lands.
+    """
+    words = _words(answer)
+    if not words:
+        return {k: 0.0 for k in RUBRIC_KEYS}
+    n = len(words)
+    length = min(1.0, n / 80.0)  # ~80 words is a full answer
+    tech = sum(1 for w in words if w in _TECH or "_" in w or any(c.isdigit() for c in w))
+    impl = sum(1 for w in words if w in _IMPL)
+    fillers = sum(1 for w in words if w in _FILLERS)
+
+    sentences = [s for s in _SENTENCE.split(answer.strip()) if s.strip()] or [answer]
+    avg_len = n / len(sentences)
+    # 8-25 words per sentence reads best; very long run-ons or fragments cost
+    shape = 1.0 if 8 <= avg_len <= 25 else max(0.3, 1.0 - abs(avg_len - 16) / 40.0)
+
+    q_words = set(_words(question))
+    novel = len([w for w in set(words) if w not in q_words]) / float(len(set(words)))
+    variety = len(set(words)) / float(n)
+
+    brief = min(1.0, n / 15.0)  # a few words can't be clear or original, whatever their shape
+
+    def _s(x: float) -> float:
+        return round(5.0 * min(1.0, max(0.0, x)), 2)
+
+    return {
+        "technical_depth": _s(length * 0.4 + min(1.0, tech / 6.0) * 0.6),
+        "clarity": _s((shape * 0.7 + (1.0 - min(1.0, fillers / max(1.0, n * 0.1))) * 0.3) * brief),
+        "originality": _s((length * 0.3 + novel * 0.4 + variety * 0.3) * brief),
+        "implementation": _s(length * 0.3 + min(1.0, impl / 4.0) * 0.5 + min(1.0, tech / 8.0) * 0.2),
+    }
+
+
+def answer_hash(question: str, answer: str) -> str:
+    return hashlib.sha1(f"{question.strip()}\x00{answer.strip()}".encode("utf-8")).hexdigest()
+
+
+class _Item:
+    __slots__ = ("key", "question", "answer", "scores", "final", "queued_at", "record")
+
+    def __init__(self, key: str, question: str, answer: str, record: object = None):
+        self.key = key
+        self.question = question
+        self.answer = answer
+        self.scores: Scores = heuristic_scores(question, answer)
+        self.final = False
+        self.queued_at = time.monotonic()
+        self.record = record
+
+
+class RubricEngine:
+    """
+    Running rubric over the answered questions of one session.
+
+    - submit(): heuristic score right away (provisional), answer queued for the LLM.
+    - poll() (from tick, never blocks): sends up to `batch_size` pending
+      answers in ONE scoring call once a batch is full or the oldest has
+      waited `max_wait_s`; folds finished batches in.
+    - Final scores are cached by answer hash (in memory and in the LLM
+      response cache), so an answer is never scored twice, across resumes too.
+
+    rubric() is the mean over all answers, kept as running sums.
+    """
+
+    def __init__(
+        self,
+        score_fn: ScoreFn,
+        *,
+        model: str,
+        provider: str = "openai",
+        batch_size: int = 4,
+        max_wait_s: float = 8.0,
+        cache: Optional[LLMResponseCache] = None,
+    ):
+        self._score_fn = score_fn
+        self.model = model
+        self.provider = provider
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait_s = float(max_wait_s)
+        self._cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rubric")
+
+        self._items: List[_Item] = []
+        self._known: Dict[str, Scores] = {}  # answer hash -> final scores
+        self._pending: List[_Item] = []
+        self._inflight: Optional[Tuple["Future[Tuple[Dict[str, Scores], float, str]]", List[_Item]]] = None
+        self._sums: Scores = {k: 0.0 for k in RUBRIC_KEYS}
+        self._force = False
+
+        self.llm_scored = 0
+        self.heuristic_final = 0  # answers whose heuristic score was made final (see finalize)
+        self.cache_hits = 0
+        self.batches = 0
+        self.last_error = ""
+        self.version = 0  # bumped whenever rubric() changes
+
+    # -------------------
+    # Cache
+    # -------------------
+    def _cache_key(self, key: str) -> str:
+        return cache_key(provider=self.provider, model=self.model, temperature=0.0, prompt=f"rubric:{key}")
+
+    def _cached(self, key: str) -> Optional[Scores]:
+        if key in self._known:
+            return self._known[key]
+        if self._cache is None:
+            return None
+        hit = self._cache.get(self._cache_key(key))
+        if hit is None:
+            return None
+        try:
+            scores = {k: float(v) for k, v in json.loads(hit).items() if k in RUBRIC_KEYS}
+        except (ValueError, AttributeError):
+            return None
+        self._known[key] = scores
+        return scores
+
+    # -------------------
+    # Scoring
+    # -------------------
+    def submit(self, question: str, answer: str, record: object = None) -> Scores:
+        """Add an answer; returns its current (possibly provisional) scores."""
+        item = _Item(answer_hash(question, answer), question, answer, record)
+        cached = self._cached(item.key) if answer.strip() else None
+        if cached is not None:
+            item.scores, item.final = dict(cached), True
+            self.cache_hits += 1
+        elif not answer.strip():
+            item.final = True  # nothing to score: zeros are final
+        else:
+            self._pending.append(item)
+        self._items.append(item)
+        self._publish(item)
+        for k in RUBRIC_KEYS:
+            self._sums[k] += item.scores.get(k, 0.0)
+        self.version += 1
+        return item.scores
+
+    def _publish(self, item: _Item) -> None:
+        if item.record is not None and hasattr(item.record, "scores"):
+            item.record.scores = dict(item.scores)  # type: ignore[attr-defined]
+
+    def _replace(self, item: _Item, scores: Scores) -> None:
+        for k in RUBRIC_KEYS:
+            self._sums[k] += scores.get(k, 0.0) - item.scores.get(k, 0.0)
+        item.scores, item.final = dict(scores), True
+        self._publish(item)
+        self.version += 1
+
+    def poll(self) -> bool:
+        """Non-blocking: land a finished batch, start the next one. True if rubric() changed."""
+        before = self.version
+        if self._inflight is not None and self._inflight[0].done():
+            fut, batch = self._inflight
+            self._inflight = None
+            try:
+                scores, ms, err = fut.result()
+            except Exception as e:
+                scores, ms, err = {}, 0.0, f"{type(e).__name__}: {e}"
+            self.last_error = err
+            self.batches += 1
+            for item in batch:
+                s = scores.get(item.key[:12])
+                if s is None:
+                    if not err:
+                        continue  # model skipped it: stays provisional until finalize()
+                    if not item.final:
+                        self._pending.append(item)  # failed call: retry with the next batch (unless finalized)
+                    continue
+                self._known[item.key] = s
+                if self._cache is not None:
+                    self._cache.put(self._cache_key(item.key), json.dumps(s), ms)
+                self.llm_scored += 1
+                self._replace(item, s)
+            if err:
+                self._force = False  # don't hammer a failing provider; wait for max_wait_s again
+                for item in self._pending:
+                    item.queued_at = time.monotonic()
+
+        if self._inflight is None and self._pending:
+            full = len(self._pending) >= self.batch_size
+            stale = time.monotonic() - self._pending[0].queued_at >= self.max_wait_s
+            if full or stale or self._force:
+                batch, self._pending = self._pending[: self.batch_size], self._pending[self.batch_size:]
+                items = [(it.key[:12], it.question, it.answer) for it in batch]
+                fut = self._pool.submit(self._score_fn, items, model=self.model, provider=self.provider)
+                self._inflight = (fut, batch)
+        if not self._pending and self._inflight is None:
+            self._force = False
+        return self.version != before
+
+    def flush(self, wait_s: float = 0.0) -> None:
+        """Score everything pending without waiting for a full batch; optionally block until done."""
+        self._force = True
+        deadline = time.monotonic() + wait_s
+        self.poll()
+        while wait_s > 0 and (self._pending or self._inflight is not None) and time.monotonic() < deadline:
+            if self._inflight is not None:
+                wait([self._inflight[0]], timeout=max(0.0, deadline - time.monotonic()))
+            self._force = True
+            self.poll()
+            if self.last_error and self._inflight is None:
+                break  # provider down: keep the provisional scores
+
+    def finalize(self) -> int:
+        """
+        After the last flush (e.g. at stop): every answer still provisional,
+        whether the model left it out of its reply or it was never sent,
+        keeps its heuristic score as final. Nothing new is sent; a batch
+        still in flight may still replace those scores. Returns how many.
+        """
+        self._pending = []
+        self._force = False
+        n = 0
+        for item in self._items:
+            if not item.final:
+                item.final = True
+                self._publish(item)
+                n += 1
+        if n:
+            self.heuristic_final += n
+            self.version += 1
+        return n
+
+    # -------------------
+    # Results
+    # -------------------
+    def rubric(self) -> Scores:
+        n = len(self._items)
+        return {k: round(self._sums[k] / n, 2) if n else 0.0 for k in RUBRIC_KEYS}
+
+    @property
+    def idle(self) -> bool:
+        """Nothing queued or being scored."""
+        return not self._pending and self._inflight is None
+
+    @property
+    def provisional(self) -> int:
+        """Answers still showing a heuristic score."""
+        return sum(1 for it in self._items if not it.final)
+
+    def scores(self) -> List[Scores]:
+        return [dict(it.scores) for it in self._items]
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from app.logic.orchestrator import start_session, stop_session, tick
+from app.services.limits import FairSemaphore, TokenBucket
+from app.state import AppState
+
+T = TypeVar("T")
+
+KINDS = ("ocr", "stt", "llm")
+
+
+@dataclass
+class SessionLimits:
+    """
+    Shared worker-pool sizes and throughput limits (calls per second, 0 = unlimited).
+    `concurrency` caps in-flight calls across all sessions; `global_rate_per_s`
+    is shared by all sessions, `session_rate_per_s` applies to each one.
+    """
+
+    concurrency: Dict[str, int] = field(default_factory=lambda: {"ocr": 2, "stt": 2, "llm": 4})
+    global_rate_per_s: Dict[str, float] = field(default_factory=lambda: {"ocr": 0.0, "stt": 0.0, "llm": 0.0})
+    session_rate_per_s: Dict[str, float] = field(default_factory=lambda: {"ocr": 0.0, "stt": 0.0, "llm": 0.0})
+    max_sessions: int = 32
+    tick_interval_s: float = 0.25
+
+
+# ---------------------------------------------------------
+# Shared, fair worker pools
+# ---------------------------------------------------------
+class SharedPools:
+    """
+    One bounded slot pool per kind of work (OCR / STT / LLM), shared by all
+    sessions in the process. Calls pass the session's own rate limit, then
+    the global one, then wait for a slot handed out round-robin by session.
+    """
+
+    def __init__(self, limits: Optional[SessionLimits] = None):
+        self.limits = limits or SessionLimits()
+        self._slots = {k: FairSemaphore(self.limits.concurrency.get(k, 2)) for k in KINDS}
+        self._global = {k: TokenBucket(self.limits.global_rate_per_s.get(k, 0.0)) for k in KINDS}
+        self._per_session: Dict[str, Dict[str, TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def _session_bucket(self, key: str, kind: str) -> TokenBucket:
+        with self._lock:
+            buckets = self._per_session.get(key)
+            if buckets is None:
+                rates = self.limits.session_rate_per_s
+                buckets = self._per_session[key] = {k: TokenBucket(rates.get(k, 0.0)) for k in KINDS}
+            return buckets[kind]
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._per_session.pop(key, None)
+
+    def run(self, kind: str, key: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        self._session_bucket(key, kind).acquire()
+        self._global[kind].acquire()
+        with self._slots[kind].slot(key):
+            return fn(*args, **kwargs)
+
+    def gate(self, key: Optional[str] = None) -> "SessionGate":
+        return SessionGate(self, key or uuid.uuid4().hex[:12])
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {k: {"in_use": s.in_use, "waiting": s.waiting, "capacity": s.capacity} for k, s in self._slots.items()}
+
+
+class SessionGate:
+    """
+    A session's handle on the shared pools. The orchestrator wraps its OCR,
+    STT and LLM callables with wrap() (see AppState._gate).
+    """
+
+    def __init__(self, pools: SharedPools, key: str):
+        self.pools = pools
+        self.key = key
+        self.calls = 0
+        self.wait_ms = 0.0  # time spent queued for rate limits / slots
+
+    def runner(self, kind: str) -> Callable[[Callable[[], T]], T]:
+        """run(fn) for a zero-argument call, e.g. just the provider request inside a cached LLM helper."""
+
+        def _run(fn: Callable[[], T]) -> T:
+            t0 = time.monotonic()
+
+            def _call() -> T:
+                self.wait_ms += (time.monotonic() - t0) * 1000.0
+                self.calls += 1
+                return fn()
+
+            return self.pools.run(kind, self.key, _call)
+
+        return _run
+
+    def wrap(self, kind: str, fn: Callable[..., T]) -> Callable[..., T]:
+        run = self.runner(kind)
+
+        def _gated(*args: Any, **kwargs: Any) -> T:
+            return run(lambda: fn(*args, **kwargs))
+
+        return _gated
+
+
+_POOLS: Optional[SharedPools] = None
+_POOLS_LOCK = threading.Lock()
+
+
+def get_shared_pools() -> SharedPools:
+    """Process-wide pools (used by Streamlit sessions and SessionManager alike)."""
+    global _POOLS
+    with _POOLS_LOCK:
+        if _POOLS is None:
+            _POOLS = SharedPools()
+        return _POOLS
+
+
+# ---------------------------------------------------------
+# Session manager
+# ---------------------------------------------------------
+@dataclass
+class _Hosted:
+    state: AppState
+    lock: threading.RLock = field(default_factory=threading.RLock)
+    next_tick: float = 0.0
+    ticks: int = 0
+    tick_ms: float = 0.0
+
+
+class SessionManager:
+    """
+    Hosts many interview sessions in one process.
+
+    One scheduler thread runs the orchestrator's non-blocking tick() for
+    every RUNNING session, round-robin, every `tick_interval_s`. Heavy work
+    (OCR / STT / LLM) happens on each session's pipeline threads and is
+    throttled through the shared, fair pools.
+    """
+
+    def __init__(self, limits: Optional[SessionLimits] = None, pools: Optional[SharedPools] = None):
+        self.limits = limits or SessionLimits()
+        self.pools = pools or SharedPools(self.limits)
+        self._sessions: Dict[str, _Hosted] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._rr = 0
+
+    # -------------------
+    # Lifecycle
+    # -------------------
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="session-scheduler", daemon=True)
+            self._thread.start()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        for key in self.keys():
+            self.stop(key)
+
+    def create(self, key: Optional[str] = None, **knobs: Any) -> str:
+        """Start a new session; `knobs` override AppState config fields."""
+        state = AppState()
+        for name, value in knobs.items():
+            if name.startswith("_") or not hasattr(state, name):
+                raise AttributeError(f"Unknown AppState knob: {name}")
+            setattr(state, name, value)
+
+        with self._lock:
+            if len(self._sessions) >= self.limits.max_sessions:
+                raise RuntimeError(f"session limit reached ({self.limits.max_sessions})")
+            key = key or uuid.uuid4().hex[:12]
+            if key in self._sessions:
+                raise KeyError(f"session exists: {key}")
+            hosted = self._sessions[key] = _Hosted(state)
+
+        state._gate = self.pools.gate(key)
+        with hosted.lock:
+            start_session(state)
+        self.start()
+        return key
+
+    def stop(self, key: str) -> None:
+        with self._lock:
+            hosted = self._sessions.pop(key, None)
+        if hosted is None:
+            return
+        with hosted.lock:
+            stop_session(hosted.state)
+        self.pools.forget(key)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._sessions)
+
+    # -------------------
+    # Access
+    # -------------------
+    @contextmanager
+    def session(self, key: str) -> Iterator[AppState]:
+        """Exclusive access to a session's state (ticks wait meanwhile)."""
+        with self._lock:
+            hosted = self._sessions[key]
+        with hosted.lock:
+            yield hosted.state
+
+    def call(self, key: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run an orchestrator action (next_question, pause_resume, ...) on a session."""
+        with self.session(key) as state:
+            return fn(state, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hosted = dict(self._sessions)
+        return {
+            "sessions": len(hosted),
+            "pools": self.pools.stats(),
+            "per_session": {
+                k: {
+                    "status": h.state.status,
+                    "ticks": h.ticks,
+                    "tick_ms": round(h.tick_ms, 2),
+                    "questions": len(h.state.qa_history),
+                    "gate_calls": getattr(h.state._gate, "calls", 0),
+                    "gate_wait_ms": round(getattr(h.state._gate, "wait_ms", 0.0), 1),
+                }
+                for k, h in hosted.items()
+            },
+        }
+
+    # -------------------
+    # Scheduler
+    # -------------------
+    def _loop(self) -> None:
+        interval = float(self.limits.tick_interval_s)
+        while not self._stop.is_set():
+            with self._lock:
+                hosted = list(self._sessions.values())
+            if hosted:
+                # rotate the starting point so no session always ticks last
+                self._rr = (self._rr + 1) % len(hosted)
+                hosted = hosted[self._rr:] + hosted[: self._rr]
+
+            now = time.monotonic()
+            for h in hosted:
+                if h.next_tick > now or h.state.status != "RUNNING":
+                    continue
+                if not h.lock.acquire(blocking=False):
+                    continue  # a caller holds it; catch this one next round
+                try:
+                    t0 = time.monotonic()
+                    tick(h.state)
+                    h.tick_ms = (time.monotonic() - t0) * 1000.0
+                    h.ticks += 1
+                except Exception as e:
+                    h.state.log_error(f"tick failed: {type(e).__name__}: {e}")
+                finally:
+                    h.next_tick = time.monotonic() + interval
+                    h.lock.release()
+
+            with self._lock:
+                pending = [h.next_tick for h in self._sessions.values()]
+            sleep = (min(pending) - time.monotonic()) if pending else interval
+            self._stop.wait(min(interval, max(0.005, sleep)))
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+SummarizeFn = Callable[..., Tuple[str, float, str]]
+
+# Summary length per level (words): chunk -> section -> session
+LEVEL_WORDS = {"chunk": 60, "section": 90, "session": 150}
+
+_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def extractive_summary(text: str, max_chars: int) -> str:
+    """LLM-free fallback: keep the most informative distinct sentences/lines, in order, within max_chars."""
+    parts = [p.strip() for p in _SPLIT.split(text or "") if len(p.strip()) >= 6]
+    seen: Set[str] = set()
+    scored: List[Tuple[float, int, str]] = []
+    for i, p in enumerate(parts):
+        key = p.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        words = p.split()
+        scored.append((len(set(w.lower() for w in words)) / (1.0 + 0.02 * len(words)), i, p))
+    keep: List[Tuple[int, str]] = []
+    used = 0
+    for _score, i, p in sorted(scored, reverse=True):
+        if used + len(p) + 1 > max_chars:
+            continue
+        keep.append((i, p))
+        used += len(p) + 1
+    return " ".join(p for _i, p in sorted(keep))
+
+
+def render_memory(session: str, sections: List[str], chunks: List[str], max_chars: int = 0) -> str:
+    """
+    Session summary, then sections, then chunks (oldest first). Within
+    `max_chars` the most condensed levels win: the session summary is kept
+    whole (cut only if it alone is too long), then sections and chunks are
+    added newest first while they fit.
+    """
+    items = [p for p in [session, *sections, *chunks] if p]
+    if not max_chars or len("\n\n".join(items)) <= max_chars:
+        return "\n\n".join(items)
+    if len(session) >= max_chars:
+        return session[:max_chars].rsplit(" ", 1)[0] + " …"
+    rest = [*sections, *chunks]
+    keep: Set[int] = set()
+    used = len(session)
+    for lo, hi in ((0, len(sections)), (len(sections), len(rest))):
+        for i in reversed(range(lo, hi)):
+            if rest[i] and used + 2 + len(rest[i]) <= max_chars:
+                keep.add(i)
+                used += 2 + len(rest[i])
+    return "\n\n".join(p for p in [session, *(rest[i] for i in sorted(keep))] if p)
+
+
+class RollingSummarizer:
+    """
+    Bounded, incrementally updated session memory (chunk -> section -> session).
+
+    Only deltas are fed in: new OCR lines (per slide, deduped) and new
+    transcript text. Once `chunk_chars` of raw notes pile up (or the oldest
+    has waited `max_wait_s`), they are summarized into a chunk summary;
+    `fanout` chunk summaries fold into a section summary, and `fanout`
+    sections fold into the running session summary. Every summarize call
+    has a bounded input and the memory holds fewer than `fanout` items per
+    level, so prompt size is flat in session length.
+
+    One summarize call in flight at a time, on a worker thread; poll()
+    (from tick) never blocks. A failed call falls back to an extractive
+    summary, so the hierarchy never stalls.
+    """
+
+    def __init__(
+        self,
+        summarize_fn: SummarizeFn,
+        *,
+        model: str,
+        provider: str = "openai",
+        chunk_chars: int = 1500,
+        fanout: int = 3,
+        max_wait_s: float = 45.0,
+        min_chars: int = 200,
+    ):
+        self._summarize_fn = summarize_fn
+        self.model = model
+        self.provider = provider
+        self.chunk_chars = int(chunk_chars)
+        self.fanout = max(2, int(fanout))
+        self.max_wait_s = float(max_wait_s)
+        self.min_chars = int(min_chars)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+
+        self._raw: List[str] = []
+        self._raw_chars = 0
+        self._raw_since = 0.0
+        self._seen_lines: Set[str] = set()  # hashes of OCR lines already fed
+        self._last_slide = -1
+
+        self.session = ""
+        self.sections: List[str] = []
+        self.chunks: List[str] = []
+        # (future, level, number of inputs folded, input text)
+        self._inflight: Optional[Tuple["Future[Tuple[str, float, str]]", str, int, str]] = None
+
+        self.calls = 0
+        self.fallbacks = 0
+        self.last_error = ""
+        self.version = 0
+
+    # -------------------
+    # Deltas in
+    # -------------------
+    def _add_raw(self, text: str) -> None:
+        if not self._raw:
+            self._raw_since = time.monotonic()
+        self._raw.append(text)
+        self._raw_chars += len(text) + 1
+
+    def feed_ocr(self, slide_index: int, text: str) -> None:
+        """Only lines not seen before are added (slides re-read every few seconds)."""
+        new: List[str] = []
+        for line in (text or "").splitlines():
+            line = line.strip()
+            if len(line) < 4:
+                continue
+            h = hashlib.sha1(line.lower().encode("utf-8")).hexdigest()[:16]
+            if h in self._seen_lines:
+                continue
+            if len(self._seen_lines) >= 50_000:
+                self._seen_lines.clear()  # bound memory on all-day sessions; worst case a line is re-fed once
+            self._seen_lines.add(h)
+            new.append(line)
+        if not new:
+            return
+        header = f"[Slide {slide_index}] " if slide_index != self._last_slide else "[Slide, cont.] "
+        self._last_slide = slide_index
+        self._add_raw(header + " | ".join(new))
+
+    def feed_transcript(self, text: str) -> None:
+        text = (text or "").strip()
+        if text:
+            self._add_raw(f"[Said] {text}")
+
+    # -------------------
+    # Folding
+    # -------------------
+    def _start(self, level: str, text: str, n: int) -> None:
+        fut = self._pool.submit(
+            self._summarize_fn, text, model=self.model, provider=self.provider,
+            kind=level, max_words=LEVEL_WORDS[level],
+        )
+        self._inflight = (fut, level, n, text)
+
+    def _take_raw(self) -> str:
+        """Up to chunk_chars of the oldest raw notes (bounded input per call)."""
+        out: List[str] = []
+        used = 0
+        while self._raw and (not out or used + len(self._raw[0]) <= self.chunk_chars):
+            item = self._raw.pop(0)
+            out.append(item[: self.chunk_chars])
+            used += len(item) + 1
+        self._raw_chars = sum(len(r) + 1 for r in self._raw)
+        self._raw_since = time.monotonic() if self._raw else 0.0
+        return "\n".join(out)
+
+    def _land(self) -> None:
+        fut, level, n, text = self._inflight  # type: ignore[misc]
+        self._inflight = None
+        try:
+            summary, _ms, err = fut.result()
+        except Exception as e:
+            summary, err = "", f"{type(e).__name__}: {e}"
+        self.calls += 1
+        self.last_error = err
+        if err or not summary.strip():
+            self.fallbacks += 1
+            summary = extractive_summary(text, LEVEL_WORDS[level] * 7)
+        summary = summary.strip()
+        if level == "chunk":
+            self.chunks.append(summary)
+        elif level == "section":
+            del self.chunks[:n]
+            self.sections.append(summary)
+        else:
+            del self.sections[:n]
+            self.session = summary
+        self.version += 1
+
+    def _next_job(self, force: bool) -> None:
+        if len(self.sections) >= self.fanout:
+            n = self.fanout
+            text = (f"Running summary:\n{self.session}\n\nNew section:\n" if self.session else "") + "\n".join(self.sections[:n])
+            level = "session"
+        elif len(self.chunks) >= self.fanout:
+            n = self.fanout
+            text = "\n".join(self.chunks[:n])
+            level = "section"
+        elif self._raw and (
+            self._raw_chars >= self.chunk_chars
+            or (force and self._raw_chars >= 1)
+            or (self._raw_chars >= self.min_chars and time.monotonic() - self._raw_since >= self.max_wait_s)
+        ):
+            n = 0
+            text = self._take_raw()
+            level = "chunk"
+        else:
+            return
+        self._start(level, text, n)
+
+    def poll(self, force: bool = False) -> bool:
+        """Non-blocking: fold a finished summary in, start the next job. True if memory() changed."""
+        before = self.version
+        if self._inflight is not None and self._inflight[0].done():
+            self._land()
+        if self._inflight is None:
+            self._next_job(force)
+        return self.version != before
+
+    @property
+    def idle(self) -> bool:
+        return self._inflight is None and not self._raw
+
+    # -------------------
+    # Memory out
+    # -------------------
+    def memory(self, max_chars: int = 0) -> str:
+        """Session summary, then the not-yet-folded sections and chunks (see render_memory)."""
+        return render_memory(self.session, self.sections, self.chunks, max_chars)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Folded levels only (raw notes since the last chunk are not kept); see restore()."""
+        return {"session": self.session, "sections": list(self.sections), "chunks": list(self.chunks)}
+
+    def restore(self, snap: Dict[str, Any]) -> None:
+        self.session = str(snap.get("session") or "")
+        self.sections = [str(s) for s in snap.get("sections") or []]
+        self.chunks = [str(s) for s in snap.get("chunks") or []]
+        self.version += 1
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -3,11 +3,17 @@ from __future__ import annotations
 import streamlit as st
 
 from app.state import AppState
+from app.logic.sessions import get_shared_pools
+from app.services.guard import guard_stats
+from app.services.metrics import STAGES, ensure_metrics_server, get_metrics
 from app.logic.orchestrator import (
     start_session,
     pause_resume,
     stop_session,
     clear_state,
+    next_question,
+    resume_session,
+    resumable_sessions,
     tick,
     process_uploaded_audio,
 )
@@ -15,12 +21,16 @@ from app.logic.orchestrator import (
 
 def _get_state() -> AppState:
     if "APP_STATE" not in st.session_state:
-        st.session_state["APP_STATE"] = AppState()
+        state = AppState()
+        # Browser sessions share the OCR/STT/LLM pools fairly with each other
+        state._gate = get_shared_pools().gate()
+        st.session_state["APP_STATE"] = state
     return st.session_state["APP_STATE"]
 
 
 st.set_page_config(page_title="AI Project Interviewer (Live)", layout="wide")
 S = _get_state()
+METRICS_URL = ensure_metrics_server()
 
 # -------------------------
 # Sidebar controls
@@ -33,20 +43,51 @@ with st.sidebar:
     S.region_y = int(st.number_input("Region Y", value=int(S.region_y), step=10))
     S.region_w = int(st.number_input("Region W", value=int(S.region_w), step=10))
     S.region_h = int(st.number_input("Region H", value=int(S.region_h), step=10))
-    S.screenshot_interval_sec = float(st.slider("Screenshot interval (sec)", 0.5, 10.0, float(S.screenshot_interval_sec), 0.5))
+    S.screenshot_interval_sec = float(st.slider("Screenshot interval (sec)", 0.1, 10.0, float(S.screenshot_interval_sec), 0.1))
+    S.capture_adaptive = bool(st.checkbox("Adaptive capture rate (back off on static screens)", value=bool(S.capture_adaptive)))
+    if S.capture_adaptive:
+        S.capture_max_interval_sec = float(st.slider(
+            "Max capture interval (sec)", float(S.screenshot_interval_sec), 30.0,
+            max(float(S.capture_max_interval_sec), float(S.screenshot_interval_sec)), 0.5,
+        ))
+    backends = ["mss", "screencapture", "synthetic"]
+    S.capture_backend = st.selectbox("Capture backend", backends, index=backends.index(S.capture_backend))
+    S.ocr_tiled = bool(st.checkbox("Incremental (tiled) OCR", value=bool(S.ocr_tiled)))
+    S.ocr_preprocess = bool(st.checkbox("OCR preprocessing (binarize + adaptive downscale)", value=bool(S.ocr_preprocess)))
+    S.change_threshold = float(st.slider("Change threshold (skip OCR below)", 0.0, 0.05, float(S.change_threshold), 0.0005, format="%.4f"))
 
     st.markdown("### Interview")
     S.max_questions = int(st.slider("Max questions", 1, 20, int(S.max_questions), 1))
     S.auto_difficulty_ramp = bool(st.checkbox("Auto difficulty ramp", value=bool(S.auto_difficulty_ramp)))
+    S.rubric_enabled = bool(st.checkbox("Score answers (running rubric)", value=bool(S.rubric_enabled)))
+    S.summarizer_enabled = bool(st.checkbox("Rolling project summary (bounded prompt)", value=bool(S.summarizer_enabled)))
+    S.retrieval_enabled = bool(st.checkbox("Retrieve earlier slides into the prompt", value=bool(S.retrieval_enabled)))
+    # Sent in full; 8 snippets of <= 160 tokens plus their labels never fill more than ~1350
+    S.retrieval_budget_tokens = int(st.slider(
+        "Retrieved context budget (tokens)", 100, 1350, min(1350, int(S.retrieval_budget_tokens)), 50,
+    ))
 
     st.markdown("### LLM")
+    S.llm_provider = st.selectbox("LLM provider", ["openai", "ollama"], index=["openai", "ollama"].index(S.llm_provider))
     S.llm_model = st.text_input("LLM model", value=S.llm_model)
     S.llm_temperature = float(st.slider("LLM temperature", 0.0, 1.0, float(S.llm_temperature), 0.05))
+    S.llm_cache_enabled = bool(st.checkbox("Cache LLM responses", value=bool(S.llm_cache_enabled)))
+    S.prefetch_enabled = bool(st.checkbox("Prefetch next question", value=bool(S.prefetch_enabled)))
+    S.llm_stream = bool(st.checkbox("Stream question tokens", value=bool(S.llm_stream)))
 
     st.markdown("### STT (Speech-to-Text)")
     S.stt_enabled = bool(st.checkbox("Enable STT", value=bool(S.stt_enabled)))
     S.stt_provider = st.selectbox("STT provider", ["openai", "faster-whisper", "none"], index=["openai","faster-whisper","none"].index(S.stt_provider))
     S.stt_model = st.text_input("STT model (OpenAI)", value=S.stt_model)
+    if S.stt_provider == "faster-whisper":
+        sizes = ["tiny", "base", "small", "medium", "large-v3"]
+        S.whisper_size = st.selectbox("Whisper model size", sizes, index=sizes.index(S.whisper_size) if S.whisper_size in sizes else 2)
+
+    S.stt_live = bool(st.checkbox("Live microphone transcription", value=bool(S.stt_live)))
+    if S.stt_live:
+        sources = ["mic", "synthetic"]
+        S.audio_source = st.selectbox("Audio source", sources, index=sources.index(S.audio_source))
+        S.audio_chunk_seconds = float(st.slider("Max utterance chunk (sec)", 2.0, 20.0, float(S.audio_chunk_seconds), 1.0))
 
     uploaded_audio = st.file_uploader("Upload audio (wav/mp3/m4a)", type=["wav", "mp3", "m4a"])
     if uploaded_audio is not None and st.button("Transcribe uploaded audio", use_container_width=True):
@@ -55,6 +96,14 @@ with st.sidebar:
     st.markdown("### Live loop")
     S.live_refresh_ms = int(st.slider("Refresh interval (ms)", 200, 3000, int(S.live_refresh_ms), 50))
 
+    st.markdown("### Recovery")
+    S.journal_enabled = bool(st.checkbox("Journal sessions (crash recovery)", value=bool(S.journal_enabled)))
+    journals = [sid for sid in resumable_sessions() if sid != S.session_id]
+    if journals:
+        resume_id = st.selectbox("Journaled session", journals)
+        if st.button("Resume session", use_container_width=True):
+            resume_session(S, resume_id)
+
 # -------------------------
 # Header + buttons
 # -------------------------
@@ -79,88 +128,232 @@ with colB:
 status_icon = {"IDLE": "⚪", "RUNNING": "🟢", "PAUSED": "🟡", "STOPPED": "🔴"}.get(S.status, "⚪")
 st.caption(f"{status_icon} **{S.status}**")
 
-# One tick per rerun
-tick(S)
+# -------------------------
+# Partial refresh
+# -------------------------
+# While RUNNING, each panel is a fragment re-run on its own timer instead of
+# re-executing the whole script. A panel rebuilds its content only when its
+# data signature changed; otherwise it re-emits the cached payload (a
+# fragment run drops any element it does not emit, so nothing is skipped
+# outright). "ui_render" is recorded per panel, never for the whole page.
+LIVE = S.status == "RUNNING"
+REFRESH_S = S.live_refresh_ms / 1000.0
+
+
+def _every(factor: float = 1.0):
+    return max(0.2, REFRESH_S * factor) if LIVE else None
+
+
+def _cached(name: str, version, build):
+    """Payload for panel `name`, rebuilt only when `version` differs from the last render."""
+    cache = st.session_state.setdefault("_panel_cache", {})
+    hit = cache.get(name)
+    if hit is None or hit[0] != version:
+        hit = cache[name] = (version, build())
+    return hit[1]
+
+
+@st.fragment(run_every=_every())
+def _live_tick() -> None:
+    # One non-blocking tick per refresh interval; panels below only read state
+    tick(S)
+
+
+_live_tick()
 
 # -------------------------
 # Main layout
 # -------------------------
 c1, c2, c3 = st.columns([1.2, 1.2, 1.0])
 
-with c1:
-    st.subheader("Live Inputs")
+
+@st.fragment(run_every=_every())
+def _snapshot_panel() -> None:
     st.markdown("**Live Screen Snapshot**")
-    if S.latest_frame_path:
+    with get_metrics().span("ui_render"):
+        frame = S.latest_frame
+        if frame is None:
+            st.info("No valid frame yet.")
+            return
         try:
-            st.image(S.latest_frame_path, caption=f"Last frame: {S.latest_frame_ts}", use_container_width=True)
+            # In-memory PNG, encoded once per frame (no disk round trip)
+            png, caption = _cached(
+                "snapshot", (id(frame), S.latest_frame_ts), lambda: (frame.png_bytes(), f"Last frame: {S.latest_frame_ts}")
+            )
+            st.image(png, caption=caption, use_container_width=True)
         except Exception as e:
-            S.log_warn(f"st.image failed for {S.latest_frame_path}: {type(e).__name__}: {e}")
-            st.warning("Latest screenshot file is not a valid image yet (permission/empty file). Check System Log.")
-    else:
-        st.info("No valid frame yet.")
+            S.log_warn(f"st.image failed for latest frame: {type(e).__name__}: {e}")
+            st.warning("Latest frame could not be rendered (permission/empty capture). Check System Log.")
 
-    st.markdown("---")
+
+@st.fragment(run_every=_every())
+def _ocr_panel() -> None:
     st.markdown("**OCR Extract (deduped highlights)**")
-    if S.ocr_highlights:
-        for h in S.ocr_highlights:
-            st.write(f"- {h}")
-    else:
-        st.write("—")
-    st.caption(f"OCR calls: {S.ocr_calls} | OCR latency (last): {S.ocr_latency_ms:.1f} ms")
+    with get_metrics().span("ui_render"):
+        md = _cached("ocr", tuple(S.ocr_highlights), lambda: "\n".join(f"- {h}" for h in S.ocr_highlights) or "—")
+        st.markdown(md)
+        st.caption(f"OCR calls: {S.ocr_calls} | skipped (unchanged): {S.ocr_skips} | OCR latency (last): {S.ocr_latency_ms:.1f} ms")
+        st.caption(
+            f"OCR cache hits: {S.ocr_cache_hits} ({S.ocr_cache_hit_rate:.0%}) | "
+            f"time saved: {S.ocr_cache_saved_ms / 1000.0:.1f} s"
+        )
 
-with c2:
-    st.subheader("Conversation")
+
+@st.fragment(run_every=_every())
+def _transcript_panel() -> None:
     st.markdown("**Live Transcript**")
-    st.write(S.transcript_tail or "—")
-    st.caption(f"STT calls: {S.stt_calls} | STT latency (last): {S.stt_latency_ms:.1f} ms")
+    with get_metrics().span("ui_render"):
+        st.write(_cached("transcript", (id(S.transcript), len(S.transcript)), lambda: S.transcript_tail or "—"))
+        if S.transcript_partial:
+            st.caption(f"🎙 {S.transcript_partial}…")
+        st.caption(f"STT calls: {S.stt_calls} | STT latency (last): {S.stt_latency_ms:.1f} ms")
 
-    st.markdown("---")
+
+# Faster while tokens stream in; the question itself changes rarely otherwise
+@st.fragment(run_every=_every(0.4))
+def _question_panel() -> None:
     st.markdown("**Current Question**")
-    if S.current_question:
-        st.markdown(f"**Q{len(S.qa_history) + 1} ·** `{S.current_difficulty}`")
-        st.write(S.current_question)
-    else:
-        st.info("No question yet.")
+    with get_metrics().span("ui_render"):
+        if S.current_question:
+            head, body = _cached(
+                "question",
+                (S.current_question, len(S.qa_history), S.current_difficulty, S.question_streaming),
+                lambda: (
+                    f"**Q{len(S.qa_history) + 1} ·** `{S.current_difficulty}`",
+                    S.current_question + (" ▌" if S.question_streaming else ""),
+                ),
+            )
+            st.markdown(head)
+            st.write(body)
+            st.caption(f"LLM first token: {S.llm_ttft_ms:.0f} ms | total: {S.llm_latency_ms:.0f} ms")
+            if st.button("Next Question", disabled=S.question_streaming):
+                next_question(S)
+                st.rerun(scope="fragment")
+        else:
+            st.info("No question yet.")
 
-    if S.followup_queue:
-        with st.expander("Follow-up (queued)", expanded=False):
-            for f in S.followup_queue:
-                st.write(f"- {f}")
+        if S.followup_queue:
+            with st.expander("Follow-up (queued)", expanded=False):
+                for f in S.followup_queue:
+                    st.write(f"- {f}")
 
-with c3:
-    st.subheader("Insights")
-    st.markdown("**Project Memory (LLM-updated)**")
-    st.write(S.project_memory or "—")
 
-    st.markdown("---")
-    st.markdown("**Running Rubric (0–5)**")
-    for k in ["technical_depth", "clarity", "originality", "implementation"]:
-        v = float(S.rubric.get(k, 0.0))
-        st.progress(min(max(v / 5.0, 0.0), 1.0), text=f"{k.replace('_',' ').title()}: {v:.1f}/5")
+@st.fragment(run_every=_every(2.0))
+def _insights_panel() -> None:
+    with get_metrics().span("ui_render"):
+        bars = _cached("rubric", tuple(sorted(S.rubric.items())), lambda: [
+            (min(max(v / 5.0, 0.0), 1.0), f"{k.replace('_',' ').title()}: {v:.1f}/5")
+            for k in ["technical_depth", "clarity", "originality", "implementation"]
+            for v in [float(S.rubric.get(k, 0.0))]
+        ])
+        st.markdown("**Project Memory (LLM-updated)**")
+        st.write(S.project_memory or "—")
 
-    st.markdown("---")
-    st.markdown("**System Metrics**")
-    st.json({
+        st.markdown("---")
+        st.markdown("**Running Rubric (0–5)**")
+        for frac, text in bars:
+            st.progress(frac, text=text)
+        if S.rubric_provisional:
+            st.caption(f"Provisional: {S.rubric_provisional} answer(s) on quick heuristic scores, LLM scoring pending.")
+
+
+def _metrics_payload():
+    """System counters, per-stage latency percentiles and provider guard stats."""
+    system = {
         "session_id": S.session_id,
         "status": S.status,
         "last_tick_ts": S.last_tick_ts,
         "latest_frame_ts": S.latest_frame_ts,
-        "latest_frame_path": S.latest_frame_path,
+        "latest_frame_size": S.latest_frame_size,
+        "capture_interval_s": round(S.capture_interval_s, 2),
+        "capture_rate_per_min": round(S.capture_rate_per_min, 1),
+        "captures_deferred": S.captures_deferred,
+        "frames_dropped": S.frames_dropped,
+        "ocr_skips": S.ocr_skips,
+        "ocr_cache_hits": S.ocr_cache_hits,
+        "ocr_cache_hit_rate": round(S.ocr_cache_hit_rate, 3),
+        "ocr_cache_saved_ms": round(S.ocr_cache_saved_ms, 1),
+        "ocr_bands_reocr_ratio": round(S.ocr_bands_reocr_ratio, 3),
+        "ocr_scale_factor": S.ocr_scale_factor,
+        "slide_index": S.slide_index,
+        "context_docs": S.context_docs,
+        "retrieval_ms": round(S.retrieval_ms, 2),
         "ocr_calls": S.ocr_calls,
         "stt_calls": S.stt_calls,
+        "stt_partial_calls": S.stt_partial_calls,
         "llm_calls": S.llm_calls,
+        "llm_cache_hits": S.llm_cache_hits,
+        "llm_cache_hit_rate": round(S.llm_cache_hit_rate, 3),
+        "llm_ttft_ms": round(S.llm_ttft_ms, 1),
+        "llm_latency_ms": round(S.llm_latency_ms, 1),
+        "prefetch_hits": S.prefetch_hits,
+        "prefetch_misses": S.prefetch_misses,
+        "prefetch_discarded": S.prefetch_discarded,
+        "llm_provider": S.llm_provider,
         "llm_model": S.llm_model,
         "stt_provider": S.stt_provider,
-    })
+    }
+    stages = get_metrics().stage_summary()
+    latency = {
+        name: {
+            "p50/p95/p99": f"{s.get('p50', 0):.0f} / {s.get('p95', 0):.0f} / {s.get('p99', 0):.0f}",
+            "calls": s["count"],
+            "error_rate": s["error_rate"],
+        }
+        for name in STAGES
+        if (s := stages.get(name))
+    }
+    return system, latency, guard_stats()
+
+
+@st.fragment(run_every=_every(2.0))
+def _metrics_panel() -> None:
+    st.markdown("**System Metrics**")
+    with get_metrics().span("ui_render"):
+        # Counters and latency windows only move on a tick (second resolution)
+        system, latency, guards = _cached("metrics", (S.session_id, S.status, S.last_tick_ts), _metrics_payload)
+        st.json(system)
+        st.markdown("**Latency p50 / p95 / p99 (ms, last 5 min)**")
+        st.json(latency)
+        if guards:
+            st.markdown("**Provider guard (rate limit · coalescing · circuit breaker)**")
+            for name, g in guards.items():
+                if g["state"] == "open":
+                    st.warning(f"{name} circuit open: failing fast for {g['retry_in_s']:.0f}s ({g['last_error']})")
+            st.json(guards)
+        if METRICS_URL:
+            st.caption(f"Prometheus: {METRICS_URL}/metrics · JSON: {METRICS_URL}/metrics.json")
+
+
+@st.fragment(run_every=_every(2.0))
+def _log_panel() -> None:
+    with get_metrics().span("ui_render"):
+        # len() counts every line ever logged, so it doubles as the log's version
+        text = _cached("log", (id(S.system_log), len(S.system_log)), lambda: "\n".join(S.system_log.tail(200)) or "—")
+        st.text(text)
+
+
+with c1:
+    st.subheader("Live Inputs")
+    _snapshot_panel()
+    st.markdown("---")
+    _ocr_panel()
+
+with c2:
+    st.subheader("Conversation")
+    _transcript_panel()
+    st.markdown("---")
+    _question_panel()
+
+with c3:
+    st.subheader("Insights")
+    _insights_panel()
+    st.markdown("---")
+    _metrics_panel()
 
 st.markdown("---")
 with st.expander("System Log", expanded=True):
-    st.text("\n".join(S.system_log[-200:]) if S.system_log else "—")
-
-# Dependency-free "live" refresh when RUNNING
-if S.status == "RUNNING":
-    st.caption(f"Auto-refresh every {S.live_refresh_ms} ms while RUNNING…")
-    import time
-    time.sleep(S.live_refresh_ms / 1000.0)
-    st.rerun()
+    _log_panel()
 
+if LIVE:
+    st.caption(f"Live panels refresh every {S.live_refresh_ms} ms while RUNNING (no full-page rerun).")
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+
+from app.services.limits import TokenBucket
+from app.services.metrics import get_metrics
+from app.services.providers import _is_retryable
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_CODE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of calling a provider whose breaker is open (fail fast)."""
+
+
+class GuardTimeout(TimeoutError):
+    """No rate-limit token or concurrency slot within the caller's deadline."""
+
+
+@dataclass
+class GuardConfig:
+    """
+    rate_per_s / burst: token bucket per provider (0 = unlimited).
+    max_concurrency: in-flight calls per provider (0 = unlimited).
+    Breaker: opens when `failure_threshold` of the last `window` calls
+    failed; after `cooldown_s` one probe call is let through (half-open).
+    all_errors_fail: count every exception against the breaker, not only
+    provider-side ones (e.g. a missing tesseract binary).
+    """
+
+    rate_per_s: float = 0.0
+    burst: Optional[float] = None
+    max_concurrency: int = 0
+    failure_threshold: int = 5
+    window: int = 10
+    cooldown_s: float = 15.0
+    all_errors_fail: bool = False
+
+
+DEFAULT_GUARDS: Dict[str, GuardConfig] = {
+    "openai": GuardConfig(rate_per_s=5.0, burst=10.0, max_concurrency=8),
+    "ollama": GuardConfig(max_concurrency=2),
+    # Local tesseract: no limits, but stop forking it every frame while it keeps failing
+    "ocr": GuardConfig(failure_threshold=3, window=5, cooldown_s=30.0, all_errors_fail=True),
+}
+
+
+# ---------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------
+class CircuitBreaker:
+    """
+    closed -> open once too many recent calls failed; open -> half_open
+    after `cooldown_s`; in half_open a single probe runs: success closes
+    the circuit, failure re-opens it for another cooldown.
+    """
+
+    def __init__(self, failure_threshold: int = 5, window: int = 10, cooldown_s: float = 15.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_s = float(cooldown_s)
+        self._outcomes: Deque[bool] = deque(maxlen=max(self.failure_threshold, int(window)))
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+
+        self.opens = 0
+        self.rejected = 0
+        self.last_error = ""
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown_s:
+                self._state = HALF_OPEN
+            return self._state
+
+    @property
+    def retry_in_s(self) -> float:
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.cooldown_s - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """True if a call may go out now (in half_open: only the one probe)."""
+        state = self.state
+        with self._lock:
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def release_probe(self) -> None:
+        """The probe was let through but never reached the provider: let the next call probe."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool, error: str = "") -> None:
+        with self._lock:
+            if not ok:
+                self.last_error = error
+            if self._state == HALF_OPEN:
+                self._probing = False
+                if ok:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open_locked()
+                return
+            self._outcomes.append(ok)
+            if self._state == CLOSED and self._outcomes.count(False) >= self.failure_threshold:
+                self._open_locked()
+
+    def _open_locked(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opens += 1
+
+
+# ---------------------------------------------------------
+# Provider guard
+# ---------------------------------------------------------
+class ProviderGuard:
+    """
+    Everything that calls one external provider goes through call():
+    identical in-flight request coalesced -> breaker check -> rate-limit
+    token -> concurrency slot -> fn(left). Like call_with_retries, fn gets
+    the seconds left of the caller's deadline after those waits (None
+    without a deadline) and must use that, not the original timeout.
+
+    Only a returning fn() counts as a success. Unless `all_errors_fail`,
+    only provider-side failures (timeouts, connection errors, 429/5xx)
+    count against the breaker; a bad request is the caller's problem, not
+    an outage, and counts neither way (except on a half-open probe).
+    """
+
+    def __init__(self, name: str, config: Optional[GuardConfig] = None):
+        self.name = name
+        self.config = cfg = config or GuardConfig()
+        self.bucket = TokenBucket(cfg.rate_per_s, cfg.burst)
+        self._slots = threading.BoundedSemaphore(cfg.max_concurrency) if cfg.max_concurrency > 0 else None
+        self.breaker = CircuitBreaker(cfg.failure_threshold, cfg.window, cfg.cooldown_s)
+        self._inflight: Dict[str, "Future[Any]"] = {}
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.coalesced = 0
+        self.throttled = 0  # calls that had to wait for a rate-limit token
+        self.in_flight = 0
+
+    def call(self, fn: Callable[[Optional[float]], T], *, key: str = "", timeout_s: Optional[float] = None) -> T:
+        """
+        Run fn(left) under this provider's limits. Callers passing the same
+        non-empty `key` while one such call is in flight share its result
+        (or its exception) instead of issuing their own. Followers only get
+        the final value, so streaming calls must not pass a key.
+        """
+        if key:
+            with self._lock:
+                leader = self._inflight.get(key)
+                if leader is None:
+                    fut: "Future[Any]" = Future()
+                    self._inflight[key] = fut
+            if leader is not None:
+                self.coalesced += 1
+                get_metrics().inc("provider_coalesced_total", provider=self.name)
+                return leader.result(timeout=timeout_s)
+            try:
+                out = self._guarded(fn, timeout_s)
+            except BaseException as e:
+                fut.set_exception(e)
+                raise
+            else:
+                fut.set_result(out)
+                return out
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+        return self._guarded(fn, timeout_s)
+
+    def _guarded(self, fn: Callable[[Optional[float]], T], timeout_s: Optional[float]) -> T:
+        if not self.breaker.allow():
+            self._publish()
+            raise CircuitOpen(
+                f"{self.name} circuit open ({self.breaker.last_error or 'too many failures'}); "
+                f"retry in {self.breaker.retry_in_s:.0f}s"
+            )
+        t_end = None if timeout_s is None else time.monotonic() + float(timeout_s)
+        probe = self.breaker.state == HALF_OPEN
+        slot = False
+        try:
+            if self.bucket.try_acquire() > 0:
+                self.throttled += 1
+                if not self.bucket.acquire(timeout_s=None if t_end is None else max(0.0, t_end - time.monotonic())):
+                    raise GuardTimeout(f"{self.name} rate limit: no token within {timeout_s}s")
+            if self._slots is not None:
+                if not self._slots.acquire(timeout=None if t_end is None else max(0.0, t_end - time.monotonic())):
+                    raise GuardTimeout(f"{self.name}: {self.config.max_concurrency} calls already in flight")
+                slot = True
+            left = None if t_end is None else t_end - time.monotonic()
+            if left is not None and left <= 0.0:
+                raise GuardTimeout(f"{self.name}: {timeout_s}s deadline spent waiting for a token/slot")
+        except GuardTimeout:
+            if slot:
+                self._slots.release()  # type: ignore[union-attr]
+            if probe:
+                self.breaker.release_probe()
+            raise
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+        self._publish()
+        try:
+            out = fn(left)
+        except Exception as e:
+            # A probe has to prove the provider works, so any error re-opens the circuit.
+            # Otherwise a caller-side error (4xx, bad input) is not evidence either way: not recorded.
+            if probe or self.config.all_errors_fail or _is_retryable(e):
+                self.breaker.record(False, f"{type(e).__name__}: {e}")
+            raise
+        else:
+            self.breaker.record(True)
+            return out
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            if self._slots is not None:
+                self._slots.release()
+            self._publish()
+
+    def _publish(self) -> None:
+        m = get_metrics()
+        m.set_gauge("provider_circuit_state", _STATE_CODE[self.breaker.state], provider=self.name)
+        m.set_gauge("provider_in_flight", self.in_flight, provider=self.name)
+        m.set_gauge("provider_circuit_rejected", self.breaker.rejected, provider=self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        b = self.breaker
+        return {
+            "state": b.state,
+            "retry_in_s": round(b.retry_in_s, 1),
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "coalesced": self.coalesced,
+            "throttled": self.throttled,
+            "rejected": b.rejected,
+            "opens": b.opens,
+            "last_error": b.last_error,
+        }
+
+
+_GUARDS: Dict[str, ProviderGuard] = {}
+_GUARDS_LOCK = threading.Lock()
+
+
+def get_guard(name: str) -> ProviderGuard:
+    """Process-wide guard per provider ("openai", "ollama", "ocr"), shared by all sessions."""
+    with _GUARDS_LOCK:
+        g = _GUARDS.get(name)
+        if g is None:
+            g = _GUARDS[name] = ProviderGuard(name, DEFAULT_GUARDS.get(name))
+        return g
+
+
+def guard_stats() -> Dict[str, Dict[str, Any]]:
+    with _GUARDS_LOCK:
+        guards = list(_GUARDS.values())
+    return {g.name: g.stats() for g in guards}
+
+
+def reset_guards() -> None:
+    with _GUARDS_LOCK:
+        _GUARDS.clear()
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.state import AppState, QARecord
+
+JOURNAL_NAME = "journal.jsonl"
+
+# AppState counters snapshotted by "metrics" events (restored on replay)
+METRIC_FIELDS = (
+    "ocr_calls", "stt_calls", "stt_partial_calls", "llm_calls",
+    "ocr_latency_ms", "stt_latency_ms", "llm_latency_ms", "llm_ttft_ms",
+    "prefetch_hits", "prefetch_misses", "prefetch_discarded",
+    "frames_dropped", "ocr_skips", "ocr_cache_hits", "ocr_cache_hit_rate", "ocr_cache_saved_ms",
+)
+
+# Knobs recorded by the "session" event, so a replay runs with the same settings
+KNOB_FIELDS = (
+    "region_x", "region_y", "region_w", "region_h", "screenshot_interval_sec", "capture_backend",
+    "capture_adaptive", "capture_max_interval_sec", "change_threshold", "stt_enabled", "stt_provider", "stt_model", "whisper_size", "stt_live", "audio_source",
+    "max_questions", "auto_difficulty_ramp", "llm_provider", "llm_model", "llm_temperature",
+)
+
+
+# ---------------------------------------------------------
+# Writer
+# ---------------------------------------------------------
+class SessionJournal:
+    """
+    Append-only JSONL event log for one session: {"t": epoch_s, "k": kind, ...}.
+
+    record() only appends to an in-memory buffer; a daemon thread writes the
+    buffer every `flush_interval_s` (or as soon as `flush_every` events are
+    pending) and fsyncs at most every `fsync_interval_s`. A crash loses at
+    most the last unsynced interval; a torn final line is skipped on replay.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        flush_every: int = 256,
+        flush_interval_s: float = 0.5,
+        fsync_interval_s: float = 2.0,
+    ):
+        self.path = Path(path)
+        self.flush_every = max(1, int(flush_every))
+        self.flush_interval_s = float(flush_interval_s)
+        self.fsync_interval_s = float(fsync_interval_s)
+
+        self.events = 0
+        self.bytes_written = 0
+        self.fsyncs = 0
+
+        self._buf: List[str] = []
+        self._cv = threading.Condition()
+        self._closed = False
+        self._last_sync = time.monotonic()
+        self._due: Dict[str, float] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = self.path.open("a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="session-journal", daemon=True)
+        self._thread.start()
+
+    def record(self, kind: str, **data: Any) -> None:
+        data["t"] = round(time.time(), 3)
+        data["k"] = kind
+        line = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._cv:
+            if self._closed:
+                return
+            self._buf.append(line)
+            self.events += 1
+            if len(self._buf) >= self.flush_every:
+                self._cv.notify()
+
+    def due(self, name: str, every_s: float) -> bool:
+        """True at most once per `every_s` for `name` (periodic events from tick)."""
+        now = time.monotonic()
+        if now < self._due.get(name, 0.0):
+            return False
+        self._due[name] = now + every_s
+        return True
+
+    def _write(self, lines: List[str], sync: bool) -> None:
+        if lines:
+            chunk = "\n".join(lines) + "\n"
+            self._f.write(chunk)
+            self.bytes_written += len(chunk)
+        self._f.flush()
+        if sync:
+            os.fsync(self._f.fileno())
+            self.fsyncs += 1
+            self._last_sync = time.monotonic()
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                if not self._closed and len(self._buf) < self.flush_every:
+                    self._cv.wait(self.flush_interval_s)
+                lines, self._buf = self._buf, []
+                closed = self._closed
+            try:
+                sync = closed or time.monotonic() - self._last_sync >= self.fsync_interval_s
+                if lines or sync:
+                    self._write(lines, sync)
+            except (OSError, ValueError):
+                pass  # journaling is best-effort; never take the session down
+            if closed:
+                return
+
+    def close(self) -> None:
+        """Write and fsync everything buffered, then close the file."""
+        with self._cv:
+            if self._closed:
+                return
+            self._closed = True
+            self._cv.notify()
+        self._thread.join(timeout=5.0)
+        try:
+            self._f.close()
+        except OSError:
+            pass
+
+
+def open_journal(session_dir: Path) -> SessionJournal:
+    return SessionJournal(Path(session_dir) / JOURNAL_NAME)
+
+
+# ---------------------------------------------------------
+# Replay
+# ---------------------------------------------------------
+def read_events(path: Path) -> Iterator[Dict[str, Any]]:
+    """Events in order; unparseable lines (a torn write at crash time) are skipped."""
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def replay(path: Path, state: Optional[AppState] = None) -> AppState:
+    """
+    Rebuild session data from a journal, as fast as the file can be parsed
+    (no capture/OCR/STT/LLM work is redone). Applies onto `state` (its
+    knobs are overwritten by the recorded ones) or a fresh AppState.
+    The last frame's pixels aren't journaled, so latest_frame stays None.
+    """
+    state = state if state is not None else AppState()
+    open_q: Optional[Dict[str, Any]] = None
+    last_ocr = ""
+
+    for ev in read_events(path):
+        kind = ev.get("k")
+        if kind == "session":
+            state.session_id = ev.get("session_id", state.session_id)
+            for name, value in (ev.get("knobs") or {}).items():
+                if name in KNOB_FIELDS:
+                    setattr(state, name, value)
+        elif kind == "status":
+            state.status = ev.get("status", state.status)
+        elif kind == "capture":
+            state.latest_frame_ts = ev.get("ts")
+            size = ev.get("size")
+            state.latest_frame_size = tuple(size) if size else None
+        elif kind == "slide":
+            state.slide_index = int(ev.get("slide", state.slide_index + 1))
+            state.slide_events.append({"slide": state.slide_index, "ts": ev.get("ts"), "score": ev.get("score", 0.0)})
+            del state.slide_events[:-50]
+        elif kind == "ocr":
+            last_ocr = ev.get("text", "")
+        elif kind == "stt":
+            state.transcript.append(ev.get("text", ""))
+        elif kind == "question":
+            open_q = ev
+        elif kind == "answer":
+            state.qa_history.append(QARecord.from_dict(ev))
+            open_q = None
+        elif kind == "rubric":
+            state.rubric = dict(ev.get("rubric") or state.rubric)
+            state.rubric_provisional = int(ev.get("provisional", 0))
+        elif kind == "memory":
+            state._memory_snapshot = {k: ev.get(k) for k in ("session", "sections", "chunks")}
+            state.project_memory = "\n\n".join(
+                p for p in [ev.get("session") or "", *(ev.get("sections") or []), *(ev.get("chunks") or [])] if p
+            )
+        elif kind == "metrics":
+            for name in METRIC_FIELDS:
+                if name in ev:
+                    setattr(state, name, ev[name])
+
+    state.ocr_text = last_ocr
+    state.transcript_tail = state.transcript.tail(800)
+    if open_q is not None:
+        # Asked but never filed: it is still the current question
+        state.current_question = open_q.get("question", "")
+        state.current_difficulty = open_q.get("difficulty", "easy")
+        state.question_asked_ts = open_q.get("asked_ts")
+        state._answer_start = int(open_q.get("answer_start", len(state.transcript)))
+    return state
+
+
+def list_journals(sessions_dir: Path) -> List[str]:
+    """Session ids with a journal under sessions_dir, newest first."""
+    root = Path(sessions_dir)
+    if not root.exists():
+        return []
+    found = [p.parent for p in root.glob(f"*/{JOURNAL_NAME}")]
+    found.sort(key=lambda d: (d / JOURNAL_NAME).stat().st_mtime, reverse=True)
+    return [d.name for d in found]
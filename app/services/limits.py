@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Hashable, Iterator, Optional
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate_per_s` tokens refill continuously up to
+    `burst`. rate_per_s <= 0 means unlimited.
+    """
+
+    def __init__(self, rate_per_s: float, burst: Optional[float] = None):
+        self.rate_per_s = float(rate_per_s)
+        self.burst = float(burst if burst is not None else max(1.0, self.rate_per_s))
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate_per_s <= 0
+
+    def _refill_locked(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate_per_s)
+        self._last = now
+
+    def try_acquire(self, n: float = 1.0) -> float:
+        """Take `n` tokens if available. Returns 0.0 on success, else seconds until they would be."""
+        if self.unlimited:
+            return 0.0
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            if self._tokens >= n:
+                self._tokens -= n
+                return 0.0
+            return (n - self._tokens) / self.rate_per_s
+
+    def acquire(self, n: float = 1.0, timeout_s: Optional[float] = None) -> bool:
+        """Block until `n` tokens are taken; False if that would exceed timeout_s."""
+        t_end = None if timeout_s is None else time.monotonic() + float(timeout_s)
+        while True:
+            wait = self.try_acquire(n)
+            if wait <= 0:
+                return True
+            if t_end is not None and time.monotonic() + wait > t_end:
+                return False
+            time.sleep(wait)
+
+
+class _Ticket:
+    __slots__ = ("granted",)
+
+    def __init__(self) -> None:
+        self.granted = False
+
+
+class FairSemaphore:
+    """
+    Concurrency cap shared by many callers (e.g. interview sessions).
+    Waiters queue per key and freed slots are handed out round-robin across
+    keys, so one busy session can't starve the others.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self._free = self.capacity
+        self._cond = threading.Condition()
+        self._queues: Dict[Hashable, Deque[_Ticket]] = {}
+        self._order: Deque[Hashable] = deque()
+
+    @property
+    def in_use(self) -> int:
+        return self.capacity - self._free
+
+    @property
+    def waiting(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+    def _dispatch_locked(self) -> None:
+        granted = False
+        while self._free > 0 and self._order:
+            key = self._order.popleft()
+            q = self._queues[key]
+            q.popleft().granted = True
+            self._free -= 1
+            granted = True
+            if q:
+                self._order.append(key)  # back of the line
+            else:
+                del self._queues[key]
+        if granted:
+            self._cond.notify_all()
+
+    def acquire(self, key: Hashable, timeout_s: Optional[float] = None) -> bool:
+        t = _Ticket()
+        with self._cond:
+            q = self._queues.get(key)
+            if q is None:
+                q = self._queues[key] = deque()
+                self._order.append(key)
+            q.append(t)
+            self._dispatch_locked()
+            ok = self._cond.wait_for(lambda: t.granted, timeout=timeout_s)
+            if not ok:
+                q.remove(t)
+                if not q:
+                    del self._queues[key]
+                    self._order.remove(key)
+            return ok
+
+    def release(self) -> None:
+        with self._cond:
+            self._free = min(self.capacity, self._free + 1)
+            self._dispatch_locked()
+
+    @contextmanager
+    def slot(self, key: Hashable, timeout_s: Optional[float] = None) -> Iterator[None]:
+        if not self.acquire(key, timeout_s):
+            raise TimeoutError(f"no free slot within {timeout_s}s")
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Optional, Union
+
+DEFAULT_PATH = Path(__file__).resolve().parents[1] / "assets" / "llm_cache.sqlite3"
+
+_NOISE = re.compile(r"[^\w\s?.,:;/()\-+=<>'\"]+")  # OCR junk glyphs
+_REPEAT = re.compile(r"([^\w\s])\1{2,}")           # "-----", "....." -> one char
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(text: str) -> str:
+    """
+    Fold the differences that don't change the question we'd get back:
+    unicode forms, case, whitespace, stray OCR glyphs and punctuation runs.
+    """
+    t = unicodedata.normalize("NFKC", text or "").lower()
+    t = _NOISE.sub(" ", t)
+    t = _REPEAT.sub(r"\1", t)
+    return _SPACE.sub(" ", t).strip()
+
+
+def cache_key(*, provider: str, model: str, temperature: float, prompt: Any) -> str:
+    if not isinstance(prompt, str):
+        prompt = json.dumps(prompt, sort_keys=True, ensure_ascii=False)
+    raw = f"{provider}|{model}|{float(temperature):.2f}|{normalize_prompt(prompt)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    On-disk (sqlite) LLM response cache.
+
+    - Entries expire after `ttl_s`.
+    - Size-bounded: past `max_entries` / `max_bytes`, least recently used rows go first.
+    - Sampling at `temperature > bypass_temperature` is never cached (callers
+      asked for variety, a cached answer would defeat that).
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_PATH,
+        ttl_s: float = 7 * 24 * 3600.0,
+        max_entries: int = 5000,
+        max_bytes: int = 16 * 1024 * 1024,
+        bypass_temperature: float = 0.7,
+    ):
+        self.path = Path(path)
+        self.ttl_s = float(ttl_s)
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.bypass_temperature = float(bypass_temperature)
+
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._puts = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL, latency_ms REAL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache(accessed)")
+            self._db = db
+        return self._db
+
+    def bypass(self, temperature: float) -> bool:
+        return float(temperature) > self.bypass_temperature
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._conn()
+                row = db.execute("SELECT response, latency_ms, created FROM llm_cache WHERE key=?", (key,)).fetchone()
+                if row is not None and now - float(row[2]) > self.ttl_s:
+                    db.execute("DELETE FROM llm_cache WHERE key=?", (key,))
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                db.execute("UPDATE llm_cache SET accessed=? WHERE key=?", (now, key))
+            except sqlite3.Error:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_ms += float(row[1] or 0.0)
+            return str(row[0])
+
+    def put(self, key: str, response: str, latency_ms: float = 0.0) -> None:
+        if not response:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._conn()
+                db.execute(
+                    "INSERT OR REPLACE INTO llm_cache(key, response, latency_ms, created, accessed, size)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, response, float(latency_ms), now, now, len(response.encode("utf-8"))),
+                )
+                self._puts += 1
+                if self._puts % 50 == 1:
+                    self._evict_locked(db, now)
+            except sqlite3.Error:
+                pass  # cache is best-effort
+
+    def _evict_locked(self, db: sqlite3.Connection, now: float) -> None:
+        db.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl_s,))
+        n, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        over_n = int(n) - self.max_entries
+        if over_n > 0:
+            db.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed LIMIT ?)",
+                (over_n,),
+            )
+        while int(total) > self.max_bytes:
+            # drop the oldest tenth until under budget
+            db.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed"
+                " LIMIT MAX(1, (SELECT COUNT(*) FROM llm_cache) / 10))"
+            )
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn().execute("DELETE FROM llm_cache")
+
+
+_CACHE: Optional[LLMResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide cache; disabled with LLM_CACHE=0, relocated with LLM_CACHE_PATH."""
+    global _CACHE
+    if os.getenv("LLM_CACHE", "1") == "0":
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = LLMResponseCache(os.getenv("LLM_CACHE_PATH") or DEFAULT_PATH)
+        return _CACHE
@@ -1,10 +1,14 @@
-import requests
 import time
+from typing import Callable, Optional
+
+from app.services.guard import get_guard
+from app.services.llm_cache import cache_key, get_llm_cache
+from app.services.providers import OllamaProvider, call_with_retries, get_provider, replay_tokens, stream_with_retries
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL = "llama3"
+TEMPERATURE = 0.0  # sent explicitly: Ollama's own default (~0.8) would make cached answers random samples
 
-def generate_llm_question(context: str) -> str:
+def generate_llm_question(context: str, on_token: Optional[Callable[[str], None]] = None) -> str:
     prompt = f"""
 You are an AI interviewer.
 
@@ -15,18 +19,34 @@ Context:
 {context}
 """
 
-    payload = {
-        "model": MODEL,
-        "prompt": prompt,
-        "stream": False
-    }
-
     try:
         t0 = time.time()
-        resp = requests.post(OLLAMA_URL, json=payload, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
-        return data.get("response", "").strip()
+        cache = get_llm_cache()
+        if cache is not None and cache.bypass(TEMPERATURE):
+            cache = None
+        key = cache_key(provider="ollama", model=MODEL, temperature=TEMPERATURE, prompt=prompt) if cache else ""
+        hit = cache.get(key) if cache else None
+        if hit is not None:
+            if on_token is not None:
+                replay_tokens(hit, on_token)
+            return hit
+
+        # Shared keep-alive pool instead of a fresh requests.post per question
+        llm: OllamaProvider = get_provider("ollama")  # type: ignore[assignment]
+        if on_token is not None:
+            # "stream": True -> tokens reach the caller as Ollama produces them
+            text = get_guard("ollama").call(lambda left: stream_with_retries(
+                lambda t: llm.stream_generate(prompt, model=MODEL, temperature=TEMPERATURE, timeout_s=t),
+                on_token,
+                deadline_s=left,
+            ), timeout_s=60)
+        else:
+            text = get_guard("ollama").call(lambda left: call_with_retries(
+                lambda t: llm.generate(prompt, model=MODEL, temperature=TEMPERATURE, timeout_s=t),
+                deadline_s=left,
+            ), timeout_s=60)
+        if cache and text:
+            cache.put(key, text, (time.time() - t0) * 1000.0)
+        return text
     except Exception as e:
         return f"[LLM ERROR] {e}"
-
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from typing import Dict, Sequence, Tuple
+
+from app.services.guard import get_guard
+from app.services.metrics import get_metrics
+from app.services.providers import call_with_retries, get_provider
+
+RUBRIC_KEYS = ("technical_depth", "clarity", "originality", "implementation")
+
+Scores = Dict[str, float]
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.S)
+
+
+def _clamp(v: object) -> float:
+    try:
+        return round(min(5.0, max(0.0, float(v))), 2)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_scores(text: str, ids: Sequence[str]) -> Dict[str, Scores]:
+    """{"<id>": {"technical_depth": 0-5, ...}, ...} from a (possibly chatty) reply; unknown ids dropped."""
+    m = _JSON_OBJECT.search(text or "")
+    if not m:
+        raise ValueError("no JSON object in scorer reply")
+    raw = json.loads(m.group(0))
+    out: Dict[str, Scores] = {}
+    for i in ids:
+        entry = raw.get(i)
+        if isinstance(entry, dict):
+            out[i] = {k: _clamp(entry.get(k, 0.0)) for k in RUBRIC_KEYS}
+    return out
+
+
+def score_answers(
+    items: Sequence[Tuple[str, str, str]],
+    *,
+    model: str,
+    provider: str = "openai",
+    temperature: float = 0.0,
+    timeout_s: float = 30.0,
+) -> Tuple[Dict[str, Scores], float, str]:
+    """
+    Score several (id, question, answer) items in ONE LLM call.
+    Returns (scores_by_id, latency_ms, error_message); items the model
+    skipped are simply missing from scores_by_id.
+    """
+    t0 = time.time()
+    try:
+        llm = get_provider(provider)
+        reason = llm.available()
+        if reason:
+            get_metrics().record("score", 0.0, error=True)
+            return {}, 0.0, reason
+
+        system = (
+            "You are a strict rubric scorer for spoken answers in a software/ML project interview. "
+            "Score every answer 0-5 on: " + ", ".join(RUBRIC_KEYS) + ". "
+            'Return JSON only: {"<id>": {"technical_depth": n, "clarity": n, "originality": n, "implementation": n}, ...}'
+        )
+        blocks = [f"[id={i}]\nQ: {q}\nA: {a or '(no answer)'}" for i, q, a in items]
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": "\n\n".join(blocks)},
+        ]
+        text = get_guard(provider).call(
+            lambda left: call_with_retries(
+                lambda t: llm.chat(messages, model=model, temperature=temperature, timeout_s=t),
+                deadline_s=left,
+            ),
+            timeout_s=timeout_s,
+        )
+        scores = parse_scores(text, [i for i, _q, _a in items])
+        ms = (time.time() - t0) * 1000.0
+        get_metrics().record("score", ms)
+        return scores, ms, ""
+    except Exception as e:
+        ms = (time.time() - t0) * 1000.0
+        get_metrics().record("score", ms, error=True)
+        return {}, ms, f"{type(e).__name__}: {e}"
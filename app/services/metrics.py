@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+PREFIX = "interviewer_"
+STAGES = ("capture", "ocr", "stt", "llm", "score", "summarize", "retrieve", "tick", "ui_render")
+QUANTILES = (0.5, 0.95, 0.99)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class RollingHistogram:
+    """
+    Last `max_samples` observations within `window_s` (percentiles over
+    recent traffic), plus cumulative count/sum for rate-style exports.
+    """
+
+    def __init__(self, max_samples: int = 2048, window_s: float = 300.0):
+        self.window_s = float(window_s)
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=int(max_samples))
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self._samples.append((time.monotonic(), float(value)))
+        self.count += 1
+        self.total += float(value)
+
+    def values(self) -> np.ndarray:
+        cutoff = time.monotonic() - self.window_s
+        return np.fromiter((v for t, v in list(self._samples) if t >= cutoff), dtype=np.float64)
+
+    def summary(self) -> Dict[str, float]:
+        v = self.values()
+        out: Dict[str, float] = {"count": self.count, "window_n": int(v.size)}
+        if v.size:
+            qs = np.percentile(v, [q * 100 for q in QUANTILES])
+            out.update({"mean": round(float(v.mean()), 2), "max": round(float(v.max()), 2)})
+            out.update({f"p{int(q * 100)}": round(float(x), 2) for q, x in zip(QUANTILES, qs)})
+        return out
+
+
+class MetricsRegistry:
+    """
+    Process-wide instrumentation: timing spans / rolling histograms,
+    counters and gauges. Cheap enough to call from every tick and worker.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._hist: Dict[Tuple[str, LabelKey], RollingHistogram] = {}
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._gauges: Dict[Tuple[str, LabelKey], float] = {}
+
+    # -------------------
+    # Recording
+    # -------------------
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            h = self._hist.get(key)
+            if h is None:
+                h = self._hist[key] = RollingHistogram()
+            h.observe(value)
+
+    def inc(self, name: str, n: float = 1.0, **labels: Any) -> None:
+        if not n:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + n
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = float(value)
+
+    def record(self, stage: str, latency_ms: float, error: bool = False) -> None:
+        """A stage call whose latency was measured elsewhere."""
+        self.observe("stage_latency_ms", latency_ms, stage=stage)
+        self.inc("stage_calls_total", stage=stage)
+        if error:
+            self.inc("stage_errors_total", stage=stage)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time a block as one call of `stage`; an exception counts as an error."""
+        t0 = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record(stage, (time.perf_counter() - t0) * 1000.0, error=failed)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    # -------------------
+    # Export
+    # -------------------
+    def stage_summary(self) -> Dict[str, Dict[str, float]]:
+        """Per stage: latency percentiles, call/error counts, error rate."""
+        with self._lock:
+            hist = {dict(k[1]).get("stage"): h for k, h in self._hist.items() if k[0] == "stage_latency_ms"}
+            counters = dict(self._counters)
+        out: Dict[str, Dict[str, float]] = {}
+        for stage, h in hist.items():
+            s = h.summary()
+            calls = counters.get(("stage_calls_total", (("stage", stage),)), 0.0)
+            errors = counters.get(("stage_errors_total", (("stage", stage),)), 0.0)
+            s["errors"] = int(errors)
+            s["error_rate"] = round(errors / calls, 4) if calls else 0.0
+            out[str(stage)] = s
+        return out
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            hist = list(self._hist.items())
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        return {
+            "stages": self.stage_summary(),
+            "histograms": {
+                f"{name}{_fmt_labels(lk)}": h.summary() for (name, lk), h in hist if name != "stage_latency_ms"
+            },
+            "counters": {f"{name}{_fmt_labels(lk)}": v for (name, lk), v in sorted(counters.items())},
+            "gauges": {f"{name}{_fmt_labels(lk)}": v for (name, lk), v in sorted(gauges.items())},
+        }
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (0.0.4). Histograms export as summaries."""
+        with self._lock:
+            hist = sorted(self._hist.items())
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+
+        lines: List[str] = []
+        typed: set = set()
+
+        def _type(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, lk), h in hist:
+            metric = PREFIX + name
+            _type(metric, "summary")
+            v = h.values()
+            if v.size:
+                for q, x in zip(QUANTILES, np.percentile(v, [q * 100 for q in QUANTILES])):
+                    lines.append(f"{metric}{_fmt_labels(lk, ('quantile', str(q)))} {float(x):.3f}")
+            lines.append(f"{metric}_sum{_fmt_labels(lk)} {h.total:.3f}")
+            lines.append(f"{metric}_count{_fmt_labels(lk)} {h.count}")
+        for (name, lk), val in counters:
+            metric = PREFIX + name
+            _type(metric, "counter")
+            lines.append(f"{metric}{_fmt_labels(lk)} {val:g}")
+        for (name, lk), val in gauges:
+            metric = PREFIX + name
+            _type(metric, "gauge")
+            lines.append(f"{metric}{_fmt_labels(lk)} {val:g}")
+        return "\n".join(lines) + "\n"
+
+
+_METRICS = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    return _METRICS
+
+
+# ---------------------------------------------------------
+# Local HTTP endpoint
+# ---------------------------------------------------------
+def _make_handler(registry: MetricsRegistry):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *_args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            path = self.path.split("?")[0]
+            if path == "/metrics":
+                body, ctype = registry.prometheus().encode(), "text/plain; version=0.0.4"
+            elif path == "/metrics.json":
+                body, ctype = json.dumps(registry.snapshot()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def start_metrics_server(
+    host: str = "127.0.0.1",
+    port: int = 9108,
+    registry: Optional[MetricsRegistry] = None,
+) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve /metrics (Prometheus) and /metrics.json in a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _make_handler(registry or _METRICS))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+_SERVER_URL: Optional[str] = None
+_SERVER_LOCK = threading.Lock()
+
+
+def ensure_metrics_server() -> str:
+    """
+    Start the endpoint once per process (METRICS_PORT, default 9108; 0 disables).
+    Returns its base URL, or "" if disabled / the port is taken.
+    """
+    global _SERVER_URL
+    with _SERVER_LOCK:
+        if _SERVER_URL is None:
+            port = int(os.getenv("METRICS_PORT", "9108") or 0)
+            _SERVER_URL = ""
+            if port:
+                try:
+                    _server, _SERVER_URL = start_metrics_server(os.getenv("METRICS_HOST", "127.0.0.1"), port)
+                except OSError:
+                    pass
+        return _SERVER_URL
@@ -1,27 +1,75 @@
 from __future__ import annotations
 
+import threading
 import time
-from typing import Tuple
+from typing import Any, Tuple
 
 from PIL import Image
 
+# Returned when tesseract is missing/broken; callers must not cache it.
+OCR_UNAVAILABLE = "Content: (OCR unavailable)"
 
-def run_ocr(image_path: str) -> Tuple[str, float]:
+
+class OcrUnavailable(RuntimeError):
+    """Raised by callers that turn the OCR_UNAVAILABLE placeholder into a failure (e.g. for the "ocr" guard)."""
+
+
+def _to_image(image: Any) -> Image.Image:
+    """Accept a file path, a PIL image, or an HxW(xC) uint8 numpy array."""
+    if isinstance(image, Image.Image):
+        return image
+    if isinstance(image, (str, bytes)) or hasattr(image, "__fspath__"):
+        return Image.open(image)
+    return Image.fromarray(image)
+
+
+_local = threading.local()
+
+
+def _tesserocr_api():
+    """
+    Warm in-process tesseract (tesserocr binding), one per thread/worker.
+    Returns None when tesserocr is not installed.
+    """
+    if not hasattr(_local, "api"):
+        try:
+            from tesserocr import PyTessBaseAPI  # type: ignore
+
+            _local.api = PyTessBaseAPI()
+        except Exception:
+            _local.api = None
+    return _local.api
+
+
+def _image_to_string(img: Image.Image) -> str:
+    api = _tesserocr_api()
+    if api is not None:
+        api.SetImage(img)
+        return api.GetUTF8Text()
+
+    # Fallback: pytesseract forks a tesseract process per call
+    import pytesseract  # type: ignore
+
+    return pytesseract.image_to_string(img)
+
+
+def run_ocr(image: Any) -> Tuple[str, float]:
     """
     Returns (text, latency_ms).
-    Tries pytesseract if available; else returns a safe placeholder.
+    `image` may be a path, a PIL image or a numpy frame (no disk round trip).
+    Uses a warm tesserocr API if installed, else pytesseract; else returns a safe placeholder.
+    Runs inside the OCR worker processes, so the "ocr" circuit breaker
+    lives with the caller (PipelineEngine), not here.
     """
     t0 = time.time()
     try:
-        import pytesseract  # type: ignore
-
-        img = Image.open(image_path)
-        text = pytesseract.image_to_string(img)
+        img = _to_image(image)
+        text = _image_to_string(img)
         ms = (time.time() - t0) * 1000.0
         text = (text or "").strip()
         return text, ms
     except Exception:
         ms = (time.time() - t0) * 1000.0
         # Hackathon-safe fallback
-        return "Content: (OCR unavailable)", ms
+        return OCR_UNAVAILABLE, ms
 
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+
+@dataclass
+class CachedOcr:
+    text: str
+    latency_ms: float  # what the original OCR call cost (= time saved per hit)
+
+
+def frame_key(pixels: np.ndarray) -> str:
+    """Content hash of a frame (shape + dtype + raw bytes)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{pixels.shape}|{pixels.dtype}".encode())
+    h.update(np.ascontiguousarray(pixels).data)
+    return h.hexdigest()
+
+
+class OcrCache:
+    """
+    Content-addressed OCR result cache.
+
+    - Memory tier: LRU bounded by entry count and total text bytes.
+    - Disk tier (optional): one small JSON file per key under `disk_dir`,
+      so a restarted process can reuse results for the same session.
+      Capped at `max_disk_entries`; the least recently used files (by
+      mtime, refreshed on every disk hit) are removed first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 4 * 1024 * 1024,
+        disk_dir: Optional[Union[str, Path]] = None,
+        max_disk_entries: int = 2048,
+    ):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_entries = max(1, int(max_disk_entries))
+        self._disk_count: Optional[int] = None  # counted on first disk write
+
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, CachedOcr]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    # -------------------
+    # Lookup / insert
+    # -------------------
+    def get(self, key: str) -> Optional[CachedOcr]:
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                self._mem.move_to_end(key)
+
+        if item is None:
+            item = self._disk_get(key)
+            if item is not None:
+                self._mem_put(key, item)
+
+        with self._lock:
+            if item is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.saved_ms += item.latency_ms
+        return item
+
+    def put(self, key: str, text: str, latency_ms: float) -> None:
+        item = CachedOcr(text=text, latency_ms=float(latency_ms))
+        self._mem_put(key, item)
+        self._disk_put(key, item)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    # -------------------
+    # Tiers
+    # -------------------
+    def _mem_put(self, key: str, item: CachedOcr) -> None:
+        size = len(item.text.encode("utf-8"))
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.text.encode("utf-8"))
+            self._mem[key] = item
+            self._bytes += size
+            while self._mem and (len(self._mem) > self.max_entries or self._bytes > self.max_bytes):
+                _k, ev = self._mem.popitem(last=False)
+                self._bytes -= len(ev.text.encode("utf-8"))
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        return None if self.disk_dir is None else self.disk_dir / f"{key}.json"
+
+    def _disk_get(self, key: str) -> Optional[CachedOcr]:
+        p = self._disk_path(key)
+        if p is None or not p.exists():
+            return None
+        try:
+            d = json.loads(p.read_text(encoding="utf-8"))
+            os.utime(p)  # recently used: pruned last
+            return CachedOcr(text=str(d["text"]), latency_ms=float(d.get("latency_ms", 0.0)))
+        except Exception:
+            return None
+
+    def _disk_put(self, key: str, item: CachedOcr) -> None:
+        p = self._disk_path(key)
+        if p is None:
+            return
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            tmp = p.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"text": item.text, "latency_ms": item.latency_ms}), encoding="utf-8")
+            existed = p.exists()
+            tmp.replace(p)
+        except Exception:
+            return  # disk tier is best-effort
+        with self._lock:
+            if self._disk_count is None:
+                self._disk_count = sum(1 for _ in p.parent.glob("*.json"))
+            elif not existed:
+                self._disk_count += 1
+            over = self._disk_count > self.max_disk_entries
+        if over:
+            self._disk_prune()
+
+    def _disk_prune(self) -> None:
+        """Drop the oldest files down to 90% of the cap (so pruning isn't needed on every put)."""
+        assert self.disk_dir is not None
+        try:
+            files = sorted(self.disk_dir.glob("*.json"), key=lambda f: f.stat().st_mtime)
+        except OSError:
+            return
+        excess = len(files) - int(self.max_disk_entries * 0.9)
+        for f in files[: max(0, excess)]:
+            f.unlink(missing_ok=True)
+        with self._lock:
+            self._disk_count = len(files) - max(0, excess)
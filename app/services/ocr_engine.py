@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, List, Optional, Sequence, Tuple
+
+from app.services.ocr import run_ocr
+
+
+def _default_workers() -> int:
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def _warm_worker() -> None:
+    """Pool initializer: load the tesseract model once per worker process."""
+    from app.services.ocr import _tesserocr_api
+
+    _tesserocr_api()
+
+
+class OcrEngine:
+    """
+    Persistent OCR service shared by all sessions.
+
+    - mode="process": warm worker processes (ProcessPoolExecutor) so several
+      frames/tiles are OCR'd on separate cores. Each worker keeps its own
+      tesserocr API loaded, or falls back to pytesseract inside the worker.
+    - mode="thread": in-process threads; only useful with tesserocr, which
+      releases the GIL during recognition.
+
+    `max_inflight` bounds queued + running jobs; submit() blocks past it,
+    which pushes backpressure up to the (drop-oldest) frame queue.
+    """
+
+    def __init__(self, max_workers: int = 0, mode: str = "process", max_inflight: int = 0):
+        self.max_workers = int(max_workers) or _default_workers()
+        self.mode = mode
+        self._slots = threading.BoundedSemaphore(int(max_inflight) or self.max_workers * 2)
+        self._lock = threading.Lock()
+        self._pool: Optional[Executor] = None
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    # spawn: forking a process that already runs pipeline threads is unsafe
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=mp.get_context("spawn"),
+                        initializer=_warm_worker,
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="ocr",
+                        initializer=_warm_worker,
+                    )
+            return self._pool
+
+    def warm(self) -> None:
+        """Start every worker now instead of on the first frame."""
+        pool = self._get_pool()
+        for f in [pool.submit(_warm_worker) for _ in range(self.max_workers)]:
+            f.result()
+
+    def submit(self, image: Any) -> "Future[Tuple[str, float]]":
+        self._slots.acquire()
+        try:
+            fut = self._get_pool().submit(run_ocr, image)
+        except Exception:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _f: self._slots.release())
+        return fut
+
+    def ocr(self, image: Any, timeout: Optional[float] = None) -> Tuple[str, float]:
+        """Blocking OCR of one frame on the pool. Returns (text, latency_ms)."""
+        return self.submit(image).result(timeout=timeout)
+
+    def ocr_many(self, images: Sequence[Any], timeout: Optional[float] = None) -> List[Tuple[str, float]]:
+        """OCR several images/tiles in parallel; results keep input order."""
+        futs = [self.submit(img) for img in images]
+        return [f.result(timeout=timeout) for f in futs]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_ENGINE: Optional[OcrEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_ocr_engine(max_workers: int = 0, mode: str = "process") -> OcrEngine:
+    """Process-wide engine; arguments only apply on first creation."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = OcrEngine(max_workers=max_workers, mode=mode)
+        return _ENGINE
+
+
+def shutdown_ocr_engine() -> None:
+    global _ENGINE
+    with _ENGINE_LOCK:
+        eng, _ENGINE = _ENGINE, None
+    if eng is not None:
+        eng.shutdown()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+from app.services.ocr import OCR_UNAVAILABLE
+
+OcrManyFn = Callable[[Sequence[np.ndarray]], List[Tuple[str, float]]]
+
+
+def _gray(pixels: np.ndarray) -> np.ndarray:
+    if pixels.ndim == 2:
+        return pixels
+    return pixels[..., :3].mean(axis=2)
+
+
+def split_bands(pixels: np.ndarray, band_px: int = 128, search_px: int = 32) -> List[Tuple[int, int]]:
+    """
+    Split a frame into full-width horizontal bands of ~band_px rows.
+    Each cut is snapped to the emptiest row within ±search_px so that
+    text lines are not sliced in half.
+    """
+    h = pixels.shape[0]
+    if h <= band_px:
+        return [(0, h)]
+
+    g = _gray(pixels)
+    bg = np.median(g[:, :: max(1, g.shape[1] // 256)])
+    # "ink" per row: how many pixels differ from the background level
+    ink = (np.abs(g - bg) > 24).sum(axis=1)
+
+    cuts = [0]
+    y = band_px
+    while y < h - band_px // 2:
+        lo, hi = max(cuts[-1] + 1, y - search_px), min(h - 1, y + search_px)
+        y_cut = lo + int(np.argmin(ink[lo:hi + 1]))
+        cuts.append(y_cut)
+        y = y_cut + band_px
+    cuts.append(h)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def _band_key(band: np.ndarray) -> str:
+    h = hashlib.blake2b(digest_size=12)
+    h.update(f"{band.shape}".encode())
+    h.update(np.ascontiguousarray(band).data)
+    return h.hexdigest()
+
+
+class TiledOcr:
+    """
+    Incremental OCR over line bands.
+
+    Bands are keyed by content hash, so only bands whose pixels changed
+    (including content that scrolled into view) are re-OCR'd; the rest reuse
+    their cached text and the page is spliced back together in order.
+    Blank bands are never sent to OCR.
+
+    Callable like run_ocr: tiled(pixels) -> (text, latency_ms).
+    """
+
+    def __init__(self, ocr_many: OcrManyFn, band_px: int = 128, max_cached_bands: int = 512):
+        self._ocr_many = ocr_many
+        self.band_px = int(band_px)
+        self.max_cached_bands = int(max_cached_bands)
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+
+        # Stats for the last call / cumulative
+        self.last_bands_total = 0
+        self.last_bands_ocrd = 0
+        self.bands_total = 0
+        self.bands_ocrd = 0
+
+    def __call__(self, pixels: np.ndarray) -> Tuple[str, float]:
+        t0 = time.time()
+        spans = split_bands(pixels, self.band_px)
+        bands = [pixels[y0:y1] for (y0, y1) in spans]
+        keys = [_band_key(b) for b in bands]
+
+        todo: List[int] = []
+        for i, (k, b) in enumerate(zip(keys, bands)):
+            if k in self._texts:
+                self._texts.move_to_end(k)
+            elif int(b.max()) - int(b.min()) < 24:
+                self._texts[k] = ""  # blank band
+            else:
+                todo.append(i)
+
+        if todo:
+            results = self._ocr_many([bands[i] for i in todo])
+            if any(text == OCR_UNAVAILABLE for text, _ms in results):
+                return OCR_UNAVAILABLE, (time.time() - t0) * 1000.0
+            for i, (text, _ms) in zip(todo, results):
+                self._texts[keys[i]] = (text or "").strip()
+
+        while len(self._texts) > self.max_cached_bands:
+            self._texts.popitem(last=False)
+
+        self.last_bands_total, self.last_bands_ocrd = len(bands), len(todo)
+        self.bands_total += len(bands)
+        self.bands_ocrd += len(todo)
+
+        text = "\n".join(t for t in (self._texts.get(k, "") for k in keys) if t)
+        return text, (time.time() - t0) * 1000.0
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import os
+import random
+import re
+import threading
+import time
+import json
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+Messages = List[Dict[str, str]]
+
+DEFAULT_TIMEOUT_S = 30.0
+
+
+# ---------------------------------------------------------
+# Retries
+# ---------------------------------------------------------
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def _is_retryable(e: BaseException) -> bool:
+    name = type(e).__name__
+    if isinstance(e, (TimeoutError, ConnectionError)):
+        return True
+    if name in {
+        "APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError",
+        "TimeoutException", "ConnectError", "ReadTimeout", "ConnectTimeout",
+        "RemoteProtocolError", "ReadError",
+    }:
+        return True
+    status = getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def call_with_retries(
+    fn: Callable[[float], T],
+    *,
+    deadline_s: float = DEFAULT_TIMEOUT_S,
+    attempts: int = 3,
+    base_delay_s: float = 0.25,
+    max_delay_s: float = 2.0,
+) -> T:
+    """
+    Call fn(timeout_s) until it succeeds, with full-jitter exponential backoff.
+    Each attempt gets the time left until the overall deadline as its timeout;
+    non-retryable errors (4xx, bad input) are raised immediately.
+    """
+    t_end = time.monotonic() + float(deadline_s)
+    last: Optional[BaseException] = None
+    for i in range(max(1, int(attempts))):
+        left = t_end - time.monotonic()
+        if left <= 0:
+            break
+        try:
+            return fn(left)
+        except Exception as e:
+            last = e
+            if not _is_retryable(e) or i == attempts - 1:
+                raise
+        sleep = random.uniform(0.0, min(max_delay_s, base_delay_s * (2 ** i)))
+        if time.monotonic() + sleep >= t_end:
+            break
+        time.sleep(sleep)
+    raise DeadlineExceeded(f"deadline {deadline_s:.1f}s exceeded") from last
+
+
+class _NoRetry(Exception):
+    def __init__(self, error: BaseException):
+        super().__init__(str(error))
+        self.error = error
+
+
+def stream_with_retries(
+    open_stream: Callable[[float], Iterator[str]],
+    on_token: Callable[[str], None],
+    *,
+    deadline_s: float = DEFAULT_TIMEOUT_S,
+    attempts: int = 3,
+) -> str:
+    """
+    Consume a token stream, forwarding each delta to on_token; returns the full text.
+    Retries only until the first token arrives: once text has been shown,
+    restarting would duplicate it, so later failures are raised.
+    """
+    started = [False]
+
+    def _once(left: float) -> str:
+        parts: List[str] = []
+        try:
+            for delta in open_stream(left):
+                started[0] = True
+                parts.append(delta)
+                on_token(delta)
+        except Exception as e:
+            if started[0]:
+                raise _NoRetry(e) from e
+            raise
+        return "".join(parts)
+
+    try:
+        return call_with_retries(_once, deadline_s=deadline_s, attempts=attempts).strip()
+    except _NoRetry as e:
+        raise e.error from None
+
+
+_DELTA = re.compile(r"\S+\s*|\s+")
+
+
+def replay_tokens(text: str, on_token: Callable[[str], None]) -> None:
+    """Feed an already complete text (e.g. a cache hit) to a stream consumer as word-sized deltas."""
+    for delta in _DELTA.findall(text):
+        on_token(delta)
+
+
+
+# ---------------------------------------------------------
+# Providers
+# ---------------------------------------------------------
+def _http_client(base_url: str = "", timeout_s: float = DEFAULT_TIMEOUT_S):
+    import httpx  # type: ignore
+
+    return httpx.Client(
+        base_url=base_url,
+        timeout=httpx.Timeout(timeout_s, connect=5.0),
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60.0),
+    )
+
+
+class LLMProvider:
+    """One long-lived client (connection pool) per backend, shared by all callers."""
+
+    name = "base"
+
+    def chat(self, messages: Messages, *, model: str, temperature: float, timeout_s: float) -> str:
+        raise NotImplementedError
+
+    def stream_chat(self, messages: Messages, *, model: str, temperature: float, timeout_s: float) -> Iterator[str]:
+        """Yield text deltas as they arrive."""
+        raise NotImplementedError
+
+    def available(self) -> str:
+        """Empty string if usable, else the reason (e.g. missing API key)."""
+        return ""
+
+    def close(self) -> None:
+        pass
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    OpenAI (or any OpenAI-compatible server via OPENAI_BASE_URL).
+    The SDK's own retries are disabled; call_with_retries owns retry policy.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None):
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY") or None
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    def available(self) -> str:
+        return "" if (self.api_key or os.getenv("OPENAI_API_KEY")) else "OPENAI_API_KEY not set"
+
+    @property
+    def client(self) -> Any:
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI  # type: ignore
+
+                self._client = OpenAI(
+                    api_key=self.api_key or os.getenv("OPENAI_API_KEY"),
+                    base_url=self.base_url,
+                    max_retries=0,
+                    http_client=_http_client(),
+                )
+            return self._client
+
+    def chat(self, messages: Messages, *, model: str, temperature: float, timeout_s: float) -> str:
+        resp = self.client.with_options(timeout=timeout_s).chat.completions.create(
+            model=model,
+            temperature=float(temperature),
+            messages=messages,
+        )
+        return (resp.choices[0].message.content or "").strip()
+
+    def stream_chat(self, messages: Messages, *, model: str, temperature: float, timeout_s: float) -> Iterator[str]:
+        stream = self.client.with_options(timeout=timeout_s).chat.completions.create(
+            model=model,
+            temperature=float(temperature),
+            messages=messages,
+            stream=True,
+        )
+        try:
+            for chunk in stream:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+        finally:
+            stream.close()
+
+    def transcribe(self, file: Any, *, model: str, timeout_s: float) -> str:
+        resp = self.client.with_options(timeout=timeout_s).audio.transcriptions.create(model=model, file=file)
+        return (resp.text or "").strip()  # type: ignore
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+class OllamaProvider(LLMProvider):
+    """Local Ollama over a keep-alive httpx pool (OLLAMA_URL, default localhost:11434)."""
+
+    name = "ollama"
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = (base_url or os.getenv("OLLAMA_URL") or "http://localhost:11434").rstrip("/")
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        with self._lock:
+            if self._client is None:
+                self._client = _http_client(self.base_url)
+            return self._client
+
+    def generate(self, prompt: str, *, model: str, temperature: Optional[float] = None, timeout_s: float) -> str:
+        payload: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": False}
+        if temperature is not None:
+            payload["options"] = {"temperature": float(temperature)}
+        resp = self.client.post("/api/generate", json=payload, timeout=timeout_s)
+        resp.raise_for_status()
+        return (resp.json().get("response") or "").strip()
+
+    def chat(self, messages: Messages, *, model: str, temperature: float, timeout_s: float) -> str:
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": False,
+            "options": {"temperature": float(temperature)},
+        }
+        resp = self.client.post("/api/chat", json=payload, timeout=timeout_s)
+        resp.raise_for_status()
+        return ((resp.json().get("message") or {}).get("content") or "").strip()
+
+    def _stream(self, path: str, payload: Dict[str, Any], timeout_s: float, pick: Callable[[Dict[str, Any]], str]) -> Iterator[str]:
+        # Ollama streams newline-delimited JSON objects
+        with self.client.stream("POST", path, json=payload, timeout=timeout_s) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                obj = json.loads(line)
+                if obj.get("error"):
+                    raise RuntimeError(f"ollama: {obj['error']}")
+                delta = pick(obj)
+                if delta:
+                    yield delta
+                if obj.get("done"):
+                    break
+
+    def stream_chat(self, messages: Messages, *, model: str, temperature: float, timeout_s: float) -> Iterator[str]:
+        payload = {"model": model, "messages": messages, "stream": True, "options": {"temperature": float(temperature)}}
+        return self._stream("/api/chat", payload, timeout_s, lambda o: (o.get("message") or {}).get("content") or "")
+
+    def stream_generate(self, prompt: str, *, model: str, temperature: Optional[float] = None, timeout_s: float) -> Iterator[str]:
+        payload: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": True}
+        if temperature is not None:
+            payload["options"] = {"temperature": float(temperature)}
+        return self._stream("/api/generate", payload, timeout_s, lambda o: o.get("response") or "")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+_PROVIDERS: Dict[str, LLMProvider] = {}
+_PROVIDERS_LOCK = threading.Lock()
+
+
+def get_provider(name: str = "openai") -> LLMProvider:
+    """Process-wide provider instance (and thus connection pool) per backend."""
+    with _PROVIDERS_LOCK:
+        p = _PROVIDERS.get(name)
+        if p is None:
+            factory = {"openai": OpenAIProvider, "ollama": OllamaProvider}.get(name)
+            if factory is None:
+                raise ValueError(f"Unknown LLM provider: {name}")
+            p = factory()
+            _PROVIDERS[name] = p
+        return p
+
+
+def reset_providers() -> None:
+    """Close pooled clients (e.g. after changing OPENAI_BASE_URL / OLLAMA_URL)."""
+    with _PROVIDERS_LOCK:
+        ps = list(_PROVIDERS.values())
+        _PROVIDERS.clear()
+    for p in ps:
+        p.close()
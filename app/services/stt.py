@@ -2,7 +2,35 @@ from __future__ import annotations
 
 import os
 import time
-from typing import Tuple
+from typing import Any, Tuple
+
+
+def transcribe_audio_array(
+    samples: Any,
+    *,
+    whisper_size: str = "small",
+    compute_type: str = "auto",
+) -> Tuple[str, float, str]:
+    """
+    Local faster-whisper on float32 mono 16 kHz samples (numpy).
+    Uses the shared model registry, so the model is loaded once per process.
+    Returns (text, latency_ms, error_message).
+    """
+    t0 = time.time()
+    try:
+        from app.services.whisper_pool import get_whisper_registry
+
+        with get_whisper_registry().model(whisper_size, compute_type=compute_type) as wm:
+            segments, _info = wm.transcribe(samples)
+            # segments is lazy: consume while holding the model
+            text = " ".join(seg.text.strip() for seg in segments).strip()
+
+        ms = (time.time() - t0) * 1000.0
+        return text, ms, ""
+
+    except Exception as e:
+        ms = (time.time() - t0) * 1000.0
+        return "", ms, f"{type(e).__name__}: {e}"
 
 
 def transcribe_audio_bytes(
@@ -11,6 +39,9 @@ def transcribe_audio_bytes(
     filename: str = "audio.wav",
     provider: str = "openai",
     model: str = "gpt-4o-mini-transcribe",
+    whisper_size: str = "small",
+    compute_type: str = "auto",
+    timeout_s: float = 30.0,
 ) -> Tuple[str, float, str]:
     """
     Returns (text, latency_ms, error_message)
@@ -27,19 +58,19 @@ def transcribe_audio_bytes(
             return "", 0.0, "OPENAI_API_KEY not set"
 
         try:
-            from openai import OpenAI  # type: ignore
+            from app.services.guard import get_guard
+            from app.services.providers import OpenAIProvider, call_with_retries, get_provider
             import io
 
-            client = OpenAI()
-            f = io.BytesIO(audio_bytes)
-            f.name = filename  # important: OpenAI uses file name extension sometimes
+            llm: OpenAIProvider = get_provider("openai")  # type: ignore[assignment]
+
+            def _once(t: float) -> str:
+                f = io.BytesIO(audio_bytes)
+                f.name = filename  # important: OpenAI uses file name extension sometimes
+                return llm.transcribe(f, model=model, timeout_s=t)
 
-            # Newer OpenAI SDK supports `audio.transcriptions.create`
-            resp = client.audio.transcriptions.create(
-                model=model,
-                file=f,
-            )
-            text = (resp.text or "").strip()  # type: ignore
+            # Shared pooled client; a fresh BytesIO per attempt so retries re-send the audio
+            text = get_guard("openai").call(lambda left: call_with_retries(_once, deadline_s=left), timeout_s=timeout_s)
             ms = (time.time() - t0) * 1000.0
             return text, ms, ""
 
@@ -50,23 +81,15 @@ def transcribe_audio_bytes(
     # --- faster-whisper (local) ---
     if provider == "faster-whisper":
         try:
-            from faster_whisper import WhisperModel  # type: ignore
-            import tempfile
-
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as tmp:
-                tmp.write(audio_bytes)
-                tmp.flush()
-
-                wm = WhisperModel("small", device="auto", compute_type="auto")
-                segments, _info = wm.transcribe(tmp.name)
-                text = " ".join(seg.text.strip() for seg in segments).strip()
-
-            ms = (time.time() - t0) * 1000.0
-            return text, ms, ""
+            from app.services.whisper_pool import decode_audio
 
+            samples = decode_audio(audio_bytes)  # in memory, no temp file
         except Exception as e:
             ms = (time.time() - t0) * 1000.0
             return "", ms, f"{type(e).__name__}: {e}"
 
+        text, _ms, err = transcribe_audio_array(samples, whisper_size=whisper_size, compute_type=compute_type)
+        return text, (time.time() - t0) * 1000.0, err
+
     return "", (time.time() - t0) * 1000.0, f"Unknown STT provider: {provider}"
 
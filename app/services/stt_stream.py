@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional, Tuple
+
+import numpy as np
+
+from app.capture.audio import AudioRingBuffer, AudioSource, UtteranceChunker
+
+# (samples float32 mono 16 kHz) -> (text, latency_ms, error_message)
+TranscribeFn = Callable[[np.ndarray], Tuple[str, float, str]]
+
+
+@dataclass
+class SttUpdate:
+    text: str
+    final: bool        # final: append to transcript; partial: replace live line
+    latency_ms: float = 0.0
+    error: str = ""
+
+
+_WORD = re.compile(r"[\w']+")
+
+
+def merge_overlap(prev: str, new: str, max_words: int = 12) -> str:
+    """
+    Drop the leading words of `new` that repeat the tail of `prev`
+    (produced by the overlap carried across forced chunk splits).
+    """
+    pw = [w.lower() for w in _WORD.findall(prev)][-max_words:]
+    nw_raw = new.split()
+    nw = [" ".join(_WORD.findall(w)).lower() for w in nw_raw]
+    for k in range(min(len(pw), len(nw)), 0, -1):
+        if pw[-k:] == nw[:k]:
+            return " ".join(nw_raw[k:])
+    return new
+
+
+class StreamingTranscriber:
+    """
+    Live STT: source -> ring buffer -> VAD chunker -> transcribe -> updates.
+
+    Runs one worker thread that polls the ring every `poll_s`. With
+    `partials`, the growing utterance is re-transcribed every `step_s` so the
+    dashboard shows text within about a second. That is only worth it for a
+    local model: for a paid API every partial is a full billed request.
+    A final update is emitted once the speaker pauses. tick() collects
+    updates with drain(); the worker never touches AppState.
+    """
+
+    def __init__(
+        self,
+        source: AudioSource,
+        transcribe_fn: TranscribeFn,
+        *,
+        max_chunk_s: float = 8.0,
+        step_s: float = 0.8,
+        poll_s: float = 0.1,
+        ring_s: float = 30.0,
+        partials: bool = True,
+    ):
+        self.source = source
+        self._transcribe = transcribe_fn
+        self.ring = AudioRingBuffer(capacity_s=max(ring_s, max_chunk_s * 2))
+        self.chunker = UtteranceChunker(self.ring.sample_rate, step_s=step_s, max_s=max_chunk_s)
+        self.poll_s = poll_s
+        self.partials = bool(partials)
+
+        self._updates: Deque[SttUpdate] = deque(maxlen=256)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._paused = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_final = ""
+        self._skip_to: Optional[int] = None  # set by resume(), applied by the worker (owns the chunker)
+
+    # -------------------
+    # Lifecycle
+    # -------------------
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self.source.start(self.ring)
+        self._thread = threading.Thread(target=self._loop, name="stt-stream", daemon=True)
+        self._thread.start()
+
+    def pause(self) -> None:
+        self._paused.set()
+
+    def resume(self) -> None:
+        with self._lock:
+            self._skip_to = self.ring.written  # drop audio captured while paused
+        self._paused.clear()
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            self.source.stop()
+        finally:
+            if self._thread is not None:
+                self._thread.join(timeout=2.0)
+
+    def drain(self) -> List[SttUpdate]:
+        with self._lock:
+            out = list(self._updates)
+            self._updates.clear()
+        return out
+
+    # -------------------
+    # Worker
+    # -------------------
+    def _loop(self) -> None:
+        while not self._stop.wait(self.poll_s):
+            if self._paused.is_set():
+                continue
+            with self._lock:
+                skip, self._skip_to = self._skip_to, None
+            if skip is not None:
+                self.chunker.skip_to(skip)
+            chunk = self.chunker.feed(self.ring)
+            if chunk is None or (not chunk.final and not self.partials):
+                continue
+
+            samples = self.ring.read(chunk.start, chunk.end)
+            if samples.size == 0:
+                continue
+            try:
+                text, ms, err = self._transcribe(samples)
+            except Exception as e:
+                text, ms, err = "", 0.0, f"{type(e).__name__}: {e}"
+
+            if err:
+                upd = SttUpdate(text="", final=chunk.final, latency_ms=ms, error=err)
+            else:
+                text = text.strip()
+                if chunk.overlap:
+                    # Only forced splits re-send audio; after a real pause a repeated word is speech
+                    text = merge_overlap(self._last_final, text)
+                if chunk.final and text:
+                    self._last_final = text
+                upd = SttUpdate(text=text, final=chunk.final, latency_ms=ms)
+
+            with self._lock:
+                self._updates.append(upd)
@@ -0,0 +1,176 @@
+"""
+Local stand-in for the OpenAI and Ollama HTTP APIs (offline dev, tests, benchmarks).
+
+    python -m app.services.stub_server --port 8099 --latency-ms 400
+    export OPENAI_BASE_URL=http://127.0.0.1:8099/v1 OPENAI_API_KEY=stub
+    export OLLAMA_URL=http://127.0.0.1:8099
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+STUB_QUESTIONS = [
+    "How does the capture stage hand frames to OCR without blocking the UI?",
+    "What happens to in-flight requests when the session is paused?",
+    "Which part of the pipeline dominates end-to-end latency, and why?",
+    "How do you detect that a slide has changed?",
+]
+
+
+class StubConfig:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, token_ms: float = 0.0):
+        self.latency_ms = latency_ms  # before the first byte / token
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.token_ms = token_ms  # per streamed token
+        self.requests = 0
+
+
+def _stub_reply(req: Dict[str, Any]) -> str:
+    """A canned question; per-id JSON scores for rubric batches; a truncation for summaries."""
+    text = " ".join(str(m.get("content", "")) for m in req.get("messages") or [] if isinstance(m, dict))
+    if "rubric scorer" in text:
+        keys = ("technical_depth", "clarity", "originality", "implementation")
+        ids = re.findall(r"\[id=([^\]]+)\]", text)
+        return json.dumps({i: {k: round(random.uniform(2.0, 4.5), 1) for k in keys} for i in ids})
+    if "running notes" in text:
+        m = re.search(r"at most (\d+) words", text)
+        notes = str((req.get("messages") or [{}])[-1].get("content", ""))
+        return " ".join(notes.split()[: int(m.group(1)) if m else 60])
+    return random.choice(STUB_QUESTIONS)
+
+
+def _make_handler(cfg: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+        def log_message(self, *_args: Any) -> None:
+            pass
+
+        def _body(self) -> bytes:
+            n = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(n) if n else b""
+
+        def _send(self, code: int, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, content_type: str, chunks) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for piece in chunks:
+                data = piece.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+                if cfg.token_ms:
+                    time.sleep(cfg.token_ms / 1000.0)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _delay(self) -> bool:
+            cfg.requests += 1
+            ms = cfg.latency_ms + random.uniform(0.0, cfg.jitter_ms)
+            if ms > 0:
+                time.sleep(ms / 1000.0)
+            if cfg.error_rate and random.random() < cfg.error_rate:
+                self._send(503, {"error": {"message": "stub overloaded"}})
+                return False
+            return True
+
+        def do_POST(self) -> None:
+            raw = self._body()
+            if not self._delay():
+                return
+            path = self.path.split("?")[0]
+            try:
+                req = json.loads(raw or b"{}")
+            except ValueError:
+                req = {}
+            q = _stub_reply(req)
+            tokens = [w + " " for w in q.split(" ")]
+
+            if path.endswith("/chat/completions") and req.get("stream"):
+                def sse():
+                    for t in tokens:
+                        yield "data: " + json.dumps({
+                            "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": "stub",
+                            "choices": [{"index": 0, "delta": {"content": t}, "finish_reason": None}],
+                        }) + "\n\n"
+                    yield "data: [DONE]\n\n"
+                self._stream("text/event-stream", sse())
+            elif path in ("/api/generate", "/api/chat") and req.get("stream", True):
+                key = "response" if path == "/api/generate" else "message"
+                def ndjson():
+                    for t in tokens:
+                        val = t if key == "response" else {"role": "assistant", "content": t}
+                        yield json.dumps({"model": "stub", key: val, "done": False}) + "\n"
+                    yield json.dumps({"model": "stub", key: "" if key == "response" else {"role": "assistant", "content": ""}, "done": True}) + "\n"
+                self._stream("application/x-ndjson", ndjson())
+            elif path.endswith("/chat/completions"):
+                self._send(200, {
+                    "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": "stub",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": q}}],
+                    "usage": {"prompt_tokens": len(raw) // 4, "completion_tokens": len(q) // 4,
+                              "total_tokens": (len(raw) + len(q)) // 4},
+                })
+            elif path.endswith("/audio/transcriptions"):
+                self._send(200, {"text": f"stub transcript of {len(raw)} bytes"})
+            elif path == "/api/generate":
+                self._send(200, {"model": "stub", "response": q, "done": True})
+            elif path == "/api/chat":
+                self._send(200, {"model": "stub", "message": {"role": "assistant", "content": q}, "done": True})
+            else:
+                self._send(404, {"error": {"message": f"unknown path {path}"}})
+
+    return Handler
+
+
+def start_stub_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    config: Optional[StubConfig] = None,
+) -> Tuple[ThreadingHTTPServer, str]:
+    """Start in a daemon thread. Returns (server, base_url); port=0 picks a free port."""
+    cfg = config or StubConfig()
+    server = ThreadingHTTPServer((host, port), _make_handler(cfg))
+    server.daemon_threads = True
+    server.stub_config = cfg  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--token-ms", type=float, default=0.0)
+    args = ap.parse_args()
+
+    cfg = StubConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.token_ms)
+    server, url = start_stub_server(args.host, args.port, cfg)
+    print(f"Stub LLM server on {url}  (OpenAI: {url}/v1, Ollama: {url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import io
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000  # what Whisper models expect
+
+ModelKey = Tuple[str, str, str]  # (size, device, compute_type)
+
+
+# ---------------------------------------------------------
+# Audio decoding (bytes -> float32 mono @ 16 kHz, no temp files)
+# ---------------------------------------------------------
+def _resample(x: np.ndarray, sr: int, target: int = SAMPLE_RATE) -> np.ndarray:
+    if sr == target or x.size == 0:
+        return x
+    n = int(round(x.size * target / float(sr)))
+    src = np.linspace(0.0, x.size - 1, num=n, dtype=np.float64)
+    return np.interp(src, np.arange(x.size), x).astype(np.float32)
+
+
+def decode_audio(audio_bytes: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode in memory. wav/flac/ogg go through soundfile; anything else
+    (mp3/m4a) through faster-whisper's PyAV decoder on a BytesIO.
+    """
+    try:
+        import soundfile as sf  # type: ignore
+
+        data, sr = sf.read(io.BytesIO(audio_bytes), dtype="float32", always_2d=True)
+        return _resample(data.mean(axis=1).astype(np.float32), int(sr), sample_rate)
+    except Exception:
+        from faster_whisper.audio import decode_audio as fw_decode  # type: ignore
+
+        return fw_decode(io.BytesIO(audio_bytes), sampling_rate=sample_rate)
+
+
+# ---------------------------------------------------------
+# Model registry
+# ---------------------------------------------------------
+class _ModelPool:
+    """Up to `size` instances of one model; created lazily, handed out exclusively."""
+
+    def __init__(self, key: ModelKey, size: int):
+        self.key = key
+        self.size = max(1, int(size))
+        self._idle: "queue.Queue[Any]" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+    def _load(self) -> Any:
+        from faster_whisper import WhisperModel  # type: ignore
+
+        size, device, compute_type = self.key
+        return WhisperModel(size, device=device, compute_type=compute_type)
+
+    def acquire(self, timeout: Optional[float]) -> Any:
+        with self._lock:
+            self.in_use += 1
+            self.last_used = time.monotonic()
+            create = self._idle.empty() and self._created < self.size
+            if create:
+                self._created += 1
+        try:
+            if create:
+                return self._load()
+            return self._idle.get(timeout=timeout)
+        except Exception:
+            with self._lock:
+                self.in_use -= 1
+                if create:
+                    self._created -= 1
+            raise
+
+    def release(self, model: Any) -> None:
+        self._idle.put(model)
+        with self._lock:
+            self.in_use -= 1
+            self.last_used = time.monotonic()
+
+    def loaded(self) -> int:
+        return self._created
+
+
+class WhisperRegistry:
+    """
+    Process-wide faster-whisper models, loaded once per (size, device, compute_type).
+
+    - `instances_per_model`: small pool so concurrent sessions don't serialize
+      on one model (CTranslate2 models are not re-entrant per instance).
+    - `max_models`: distinct models kept in RAM; least recently used idle
+      models are evicted first. `idle_ttl_s` evicts models nobody touched.
+    """
+
+    def __init__(self, max_models: int = 2, instances_per_model: int = 1, idle_ttl_s: float = 900.0):
+        self.max_models = max(1, int(max_models))
+        self.instances_per_model = max(1, int(instances_per_model))
+        self.idle_ttl_s = float(idle_ttl_s)
+        self._pools: "OrderedDict[ModelKey, _ModelPool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pool(self, key: ModelKey) -> _ModelPool:
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = _ModelPool(key, self.instances_per_model)
+                self._pools[key] = pool
+            self._pools.move_to_end(key)
+            self._evict_locked(keep=key)
+            return pool
+
+    def _evict_locked(self, keep: Optional[ModelKey] = None) -> None:
+        now = time.monotonic()
+        for k in list(self._pools.keys()):
+            p = self._pools[k]
+            if k == keep or p.in_use:
+                continue
+            over_cap = len(self._pools) > self.max_models
+            idle_expired = now - p.last_used > self.idle_ttl_s
+            if over_cap or idle_expired:
+                del self._pools[k]  # instances are freed with the pool
+
+    def evict_idle(self) -> None:
+        with self._lock:
+            self._evict_locked()
+
+    @contextmanager
+    def model(
+        self,
+        size: str = "small",
+        device: str = "auto",
+        compute_type: str = "auto",
+        timeout: Optional[float] = None,
+    ) -> Iterator[Any]:
+        pool = self._pool((size, device, compute_type))
+        m = pool.acquire(timeout)
+        try:
+            yield m
+        finally:
+            pool.release(m)
+
+    def warm(self, size: str = "small", device: str = "auto", compute_type: str = "auto") -> None:
+        """Load the model now (e.g. at session start) so the first chunk isn't slow."""
+        with self.model(size, device, compute_type):
+            pass
+
+    def loaded(self) -> List[Tuple[ModelKey, int]]:
+        with self._lock:
+            return [(k, p.loaded()) for k, p in self._pools.items()]
+
+
+_REGISTRY: Optional[WhisperRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_whisper_registry() -> WhisperRegistry:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = WhisperRegistry()
+        return _REGISTRY
@@ -1,14 +1,231 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import json
+from collections import deque
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
 
 
 def _now_iso() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
+# ---------------------------------------------------------
+# Bounded containers (memory stays flat over all-day sessions)
+# ---------------------------------------------------------
+class SpillDeque:
+    """
+    Fixed-capacity ring of the newest items. Once `attach()`ed to a file,
+    evicted items are appended there as JSON lines (batched) instead of
+    being dropped; `all()` reads them back. len() counts every item ever
+    appended, so it still works as a running total.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 500,
+        encode: Callable[[Any], Any] = lambda x: x,
+        decode: Callable[[Any], Any] = lambda x: x,
+        flush_every: int = 64,
+    ):
+        self.capacity = max(1, int(capacity))
+        self._items: Deque[Any] = deque(maxlen=self.capacity)
+        self._encode = encode
+        self._decode = decode
+        self._flush_every = flush_every
+        self._evicted: List[Any] = []
+        self._total = 0
+        self.spill_path: Optional[Path] = None
+
+    def attach(self, path: Path) -> None:
+        self.spill_path = Path(path)
+
+    def append(self, item: Any) -> None:
+        if len(self._items) == self.capacity and self.spill_path is not None:
+            self._evicted.append(self._items[0])
+            if len(self._evicted) >= self._flush_every:
+                self.flush()
+        self._items.append(item)
+        self._total += 1
+
+    def flush(self) -> None:
+        if not self._evicted or self.spill_path is None:
+            return
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.spill_path.open("a", encoding="utf-8") as f:
+                for item in self._evicted:
+                    f.write(json.dumps(self._encode(item), ensure_ascii=False) + "\n")
+        except OSError:
+            pass  # spilling is best-effort; memory stays bounded either way
+        self._evicted = []
+
+    def tail(self, n: int) -> List[Any]:
+        n = min(max(0, int(n)), len(self._items))
+        return [self._items[i] for i in range(len(self._items) - n, len(self._items))]
+
+    def all(self) -> List[Any]:
+        """Spilled + in-memory items, oldest first."""
+        self.flush()
+        out: List[Any] = []
+        if self.spill_path is not None and self.spill_path.exists():
+            with self.spill_path.open(encoding="utf-8") as f:
+                out = [self._decode(json.loads(line)) for line in f if line.strip()]
+        return out + list(self._items)
+
+    def export(self) -> List[Any]:
+        """all(), encoded to JSON-ready values."""
+        return [self._encode(item) for item in self.all()]
+
+    def carry(self, n: int) -> "SpillDeque":
+        """Fresh, detached ring with the same settings holding the newest `n` items."""
+        self.flush()
+        fresh = SpillDeque(self.capacity, self._encode, self._decode, self._flush_every)
+        for item in self.tail(n):
+            fresh.append(item)
+        return fresh
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __bool__(self) -> bool:
+        return self._total > 0
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(list(self._items))
+
+    def __getitem__(self, i: int) -> Any:
+        return self._items[i]
+
+
+class ChunkedText:
+    """
+    Append-only text kept as a deque of chunks: append and tail() are O(1)
+    in the transcript length (no `+=` recopying). Offsets are absolute, so
+    a position taken with len() stays valid after old chunks spill to disk.
+    """
+
+    def __init__(self, max_chars: int = 256_000, sep: str = "\n"):
+        self.max_chars = int(max_chars)
+        self.sep = sep
+        self._chunks: Deque[str] = deque()
+        self._base = 0  # absolute offset of the first in-memory chunk
+        self._len = 0
+        self.spill_path: Optional[Path] = None
+
+    def attach(self, path: Path) -> None:
+        self.spill_path = Path(path)
+
+    def append(self, text: str) -> None:
+        if not text:
+            return
+        chunk = (self.sep if self._len else "") + text
+        self._chunks.append(chunk)
+        self._len += len(chunk)
+        if self.spill_path is not None:
+            while self._len - self._base > self.max_chars and len(self._chunks) > 1:
+                old = self._chunks.popleft()
+                self._spill(old)
+                self._base += len(old)
+
+    def _spill(self, chunk: str) -> None:
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)  # type: ignore[union-attr]
+            with self.spill_path.open("a", encoding="utf-8") as f:  # type: ignore[union-attr]
+                f.write(chunk)
+        except OSError:
+            pass
+
+    def _spilled(self) -> str:
+        if self.spill_path is None or not self.spill_path.exists():
+            return ""
+        return self.spill_path.read_text(encoding="utf-8")
+
+    def tail(self, n: int) -> str:
+        parts: List[str] = []
+        got = 0
+        for chunk in reversed(self._chunks):
+            parts.append(chunk)
+            got += len(chunk)
+            if got >= n:
+                break
+        return "".join(reversed(parts))[-n:] if n > 0 else ""
+
+    def since(self, offset: int) -> str:
+        """Text from absolute `offset` to the end (reads the spill file if needed)."""
+        offset = max(0, int(offset))
+        if offset < self._base:
+            return self._spilled()[offset:] + "".join(self._chunks)
+        parts: List[str] = []
+        start = self._len
+        for chunk in reversed(self._chunks):
+            parts.append(chunk)
+            start -= len(chunk)
+            if start <= offset:
+                break
+        return "".join(reversed(parts))[offset - start:]
+
+    def text(self) -> str:
+        return self.since(0)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __str__(self) -> str:
+        return self.text()
+
+
+class QARecord:
+    """One answered question (slotted: no per-record __dict__)."""
+
+    __slots__ = ("question", "difficulty", "answer", "asked_ts", "answered_ts", "slide_index", "scores")
+
+    def __init__(
+        self,
+        question: str,
+        difficulty: str,
+        answer: str,
+        asked_ts: Optional[str] = None,
+        answered_ts: Optional[str] = None,
+        slide_index: int = 0,
+        scores: Optional[Dict[str, float]] = None,
+    ):
+        self.question = question
+        self.difficulty = difficulty
+        self.answer = answer
+        self.asked_ts = asked_ts
+        self.answered_ts = answered_ts
+        self.slide_index = slide_index
+        self.scores = scores  # rubric scores for this answer (provisional until LLM-scored)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "QARecord":
+        return cls(**{k: d.get(k) for k in cls.__slots__ if k in d})
+
+    def __repr__(self) -> str:
+        return f"QARecord({self.difficulty}, {self.question[:40]!r})"
+
+
+LOG_CAPACITY = 500
+QA_CAPACITY = 100
+
+
+def _log_ring() -> SpillDeque:
+    return SpillDeque(LOG_CAPACITY)
+
+
+def _qa_ring() -> SpillDeque:
+    return SpillDeque(QA_CAPACITY, encode=QARecord.to_dict, decode=QARecord.from_dict, flush_every=1)
+
+
 @dataclass
 class AppState:
     # -------------------
@@ -19,25 +236,55 @@ class AppState:
     region_w: int = 1280
     region_h: int = 720
 
-    screenshot_interval_sec: float = 2.0
+    screenshot_interval_sec: float = 2.0  # fastest capture interval when adaptive
+    capture_adaptive: bool = True  # back off on static screens / OCR backlog
+    capture_max_interval_sec: float = 6.0
+    capture_backend: str = "mss"  # "mss" | "screencapture" | "synthetic"
+    change_threshold: float = 0.001  # fraction of thumbnail cells that must change to re-OCR
+    ocr_cache_disk: bool = True  # persist OCR cache under assets/ocr_cache/<session_id>
+    ocr_workers: int = 0  # OCR engine pool size (0 = auto); applies when the engine first starts
+    ocr_engine_mode: str = "process"  # "process" | "thread" (thread only helps with tesserocr)
+    ocr_tiled: bool = True  # incremental OCR: only re-read changed line bands
+    ocr_band_px: int = 128
+    ocr_preprocess: bool = True  # gray + contrast + binarize + adaptive downscale before OCR
+    ocr_target_line_px: int = 24  # downscale until text lines are about this tall
 
     # STT
     audio_chunk_seconds: float = 8.0
     stt_enabled: bool = True
     stt_provider: str = "openai"  # "openai" | "faster-whisper" | "none"
     stt_model: str = "gpt-4o-mini-transcribe"
+    whisper_size: str = "small"  # faster-whisper model size
+    whisper_compute_type: str = "auto"
+    stt_live: bool = False  # continuous capture + VAD-gated streaming STT
+    audio_source: str = "mic"  # "mic" | "synthetic"
 
     # Interview
     max_questions: int = 6
     auto_difficulty_ramp: bool = True
 
     # LLM
+    llm_provider: str = "openai"  # "openai" | "ollama"
     llm_model: str = "gpt-4o-mini"
     llm_temperature: float = 0.25
+    llm_timeout_s: float = 20.0  # per-question deadline (all retries included)
+    llm_stream: bool = True  # stream tokens into current_question as they arrive
+    llm_cache_enabled: bool = True  # reuse answers for repeated prompts (bypassed at temperature > 0.7)
+    prefetch_enabled: bool = True  # speculatively generate the next question in the background
+    rubric_enabled: bool = True  # score answers (heuristic now, batched LLM scoring later)
+    rubric_batch_size: int = 4
+    summarizer_enabled: bool = True  # fold OCR/transcript deltas into a bounded project_memory
+    retrieval_enabled: bool = True  # BM25 over earlier slides/transcript -> question prompt
+    retrieval_budget_tokens: int = 400
 
     # UI refresh
     live_refresh_ms: int = 1250
 
+    # Memory: older log lines / transcript / Q&A spill to assets/sessions/<session_id>/
+    spill_to_disk: bool = True
+    # Crash recovery: append-only event journal in the same directory (replay/resume)
+    journal_enabled: bool = True
+
     # -------------------
     # Runtime/session fields (cleared by reset_runtime)
     # -------------------
@@ -46,7 +293,7 @@ class AppState:
     last_tick_ts: Optional[str] = None
 
     # Capture
-    latest_frame_path: str = ""
+    latest_frame: Any = field(default=None, repr=False)  # app.capture.screen.Frame
     latest_frame_ts: Optional[str] = None
     latest_frame_size: Optional[Tuple[int, int]] = None  # (w,h)
 
@@ -54,18 +301,26 @@ class AppState:
     ocr_text: str = ""
     ocr_highlights: List[str] = field(default_factory=list)
 
+    # Slides (from frame change detection)
+    slide_index: int = 0
+    slide_events: List[Dict[str, Any]] = field(default_factory=list)
+
     # STT transcript
-    transcript: str = ""
+    transcript: ChunkedText = field(default_factory=ChunkedText, repr=False)
     transcript_tail: str = ""
+    transcript_partial: str = ""  # live line for the utterance still being spoken
 
     # Q/A
     current_question: str = ""
     current_difficulty: str = "easy"
+    question_streaming: bool = False  # current_question is still being generated
+    question_asked_ts: Optional[str] = None
     followup_queue: List[str] = field(default_factory=list)
-    qa_history: List[Dict[str, Any]] = field(default_factory=list)
+    qa_history: SpillDeque = field(default_factory=_qa_ring, repr=False)  # of QARecord
 
     # Insights
     project_memory: str = ""
+    rubric_provisional: int = 0  # answers still on heuristic scores (LLM score pending)
     rubric: Dict[str, float] = field(default_factory=lambda: {
         "technical_depth": 0.0,
         "clarity": 0.0,
@@ -76,18 +331,59 @@ class AppState:
     # Metrics
     ocr_calls: int = 0
     stt_calls: int = 0
+    stt_partial_calls: int = 0  # live re-transcriptions of the utterance in progress
     llm_calls: int = 0
 
     ocr_latency_ms: float = 0.0
     stt_latency_ms: float = 0.0
     llm_latency_ms: float = 0.0
+    llm_ttft_ms: float = 0.0  # time to first streamed token
+    llm_cache_hits: int = 0  # process-wide response cache
+    llm_cache_hit_rate: float = 0.0
+
+    prefetch_hits: int = 0
+    prefetch_misses: int = 0
+    prefetch_discarded: int = 0  # candidates dropped because the context moved on
+
+    frames_dropped: int = 0  # stale frames discarded by pipeline backpressure
+    ocr_skips: int = 0  # unchanged frames that reused the previous OCR result
+    ocr_cache_hits: int = 0
+    ocr_cache_hit_rate: float = 0.0
+    ocr_cache_saved_ms: float = 0.0
+    ocr_bands_reocr_ratio: float = 0.0  # share of line bands actually re-OCR'd
+    ocr_scale_factor: int = 1  # last adaptive downscale factor
+    capture_interval_s: float = 0.0  # current adaptive capture interval
+    capture_rate_per_min: float = 0.0  # effective captures/min (last 60 s)
+    captures_deferred: int = 0  # captures postponed while OCR was busy
+    context_docs: int = 0  # OCR snapshots + transcript chunks in the retrieval index
+    retrieval_ms: float = 0.0  # last BM25 context lookup
+    provider_circuits: Dict[str, str] = field(default_factory=dict)  # provider -> closed/open/half_open
 
     # Log
-    system_log: List[str] = field(default_factory=list)
+    system_log: SpillDeque = field(default_factory=_log_ring, repr=False)
 
     # Internal monotonic gates (avoid None math)
-    _last_capture_monotonic: float = 0.0
     _last_stt_monotonic: float = 0.0
+    _answer_start: int = 0  # transcript offset when the current question was asked
+    _rubric_version: int = -1  # RubricEngine.version last copied into `rubric`
+    _memory_snapshot: Dict[str, Any] = field(default_factory=dict, repr=False)  # last journaled summary levels
+
+    # Background capture/OCR/LLM engine (app.logic.pipeline.PipelineEngine)
+    _pipeline: Any = field(default=None, repr=False, compare=False)
+    # Live audio -> STT stream (app.services.stt_stream.StreamingTranscriber)
+    _audio_stream: Any = field(default=None, repr=False, compare=False)
+    # Next-question speculation (app.logic.prefetch.QuestionPrefetcher)
+    _prefetcher: Any = field(default=None, repr=False, compare=False)
+    # Shared OCR/STT/LLM pools handle (app.logic.sessions.SessionGate); None = call directly
+    _gate: Any = field(default=None, repr=False, compare=False)
+    # Append-only event log (app.services.journal.SessionJournal); None = not journaling
+    _journal: Any = field(default=None, repr=False, compare=False)
+    # Running rubric scorer (app.logic.rubric.RubricEngine)
+    _rubric: Any = field(default=None, repr=False, compare=False)
+    # Rolling project_memory summarizer (app.logic.summarizer.RollingSummarizer)
+    _summarizer: Any = field(default=None, repr=False, compare=False)
+    # Session-wide OCR/transcript search index (app.logic.retrieval.ContextIndex)
+    _context_index: Any = field(default=None, repr=False, compare=False)
 
     # ---------------------------------------------------------
     # Logging helpers
@@ -101,31 +397,69 @@ class AppState:
     def log_error(self, msg: str) -> None:
         self.system_log.append(f"[{_now_iso()}] ERROR: {msg}")
 
+    # ---------------------------------------------------------
+    # Disk spill
+    # ---------------------------------------------------------
+    def attach_spill(self, session_dir: Path) -> None:
+        """Spill evicted log lines, old transcript and Q&A records under session_dir."""
+        self.system_log.attach(session_dir / "system_log.jsonl")
+        self.transcript.attach(session_dir / "transcript.txt")
+        self.qa_history.attach(session_dir / "qa_history.jsonl")
+
+    def flush_spill(self) -> None:
+        self.system_log.flush()
+        self.qa_history.flush()
+
+    def export(self) -> Dict[str, Any]:
+        """JSON-ready snapshot of knobs + session data (spilled history included; no frame pixels)."""
+        out: Dict[str, Any] = {}
+        for f in fields(self):
+            if f.name.startswith("_") or f.name == "latest_frame":
+                continue
+            value = getattr(self, f.name)
+            if isinstance(value, SpillDeque):
+                value = value.export()
+            elif isinstance(value, ChunkedText):
+                value = value.text()
+            out[f.name] = value
+        return out
+
     # ---------------------------------------------------------
     # Reset helpers
     # ---------------------------------------------------------
     def reset_runtime(self) -> None:
-        """Clear per-session runtime fields but keep config knobs."""
+        """
+        Clear per-session runtime fields but keep config knobs.
+        O(1) in session length: containers are swapped, not emptied.
+        """
+        self.flush_spill()
         self.status = "IDLE"
         self.session_id = ""
         self.last_tick_ts = None
 
-        self.latest_frame_path = ""
+        self.latest_frame = None
         self.latest_frame_ts = None
         self.latest_frame_size = None
 
         self.ocr_text = ""
         self.ocr_highlights = []
 
-        self.transcript = ""
+        self.slide_index = 0
+        self.slide_events = []
+
+        self.transcript = ChunkedText()
         self.transcript_tail = ""
+        self.transcript_partial = ""
 
         self.current_question = ""
         self.current_difficulty = "easy"
+        self.question_streaming = False
+        self.question_asked_ts = None
         self.followup_queue = []
-        self.qa_history = []
+        self.qa_history = _qa_ring()
 
         self.project_memory = ""
+        self.rubric_provisional = 0
         self.rubric = {
             "technical_depth": 0.0,
             "clarity": 0.0,
@@ -135,20 +469,49 @@ class AppState:
 
         self.ocr_calls = 0
         self.stt_calls = 0
+        self.stt_partial_calls = 0
         self.llm_calls = 0
 
         self.ocr_latency_ms = 0.0
         self.stt_latency_ms = 0.0
         self.llm_latency_ms = 0.0
+        self.llm_ttft_ms = 0.0
+        self.llm_cache_hits = 0
+        self.llm_cache_hit_rate = 0.0
+
+        self.prefetch_hits = 0
+        self.prefetch_misses = 0
+        self.prefetch_discarded = 0
+
+        self.frames_dropped = 0
+        self.ocr_skips = 0
+        self.ocr_cache_hits = 0
+        self.ocr_cache_hit_rate = 0.0
+        self.ocr_cache_saved_ms = 0.0
+        self.ocr_bands_reocr_ratio = 0.0
+        self.ocr_scale_factor = 1
+        self.capture_interval_s = 0.0
+        self.capture_rate_per_min = 0.0
+        self.captures_deferred = 0
+        self.context_docs = 0
+        self.retrieval_ms = 0.0
+        self.provider_circuits = {}
 
-        self._last_capture_monotonic = 0.0
         self._last_stt_monotonic = 0.0
+        self._answer_start = 0
+        self._rubric_version = -1
+        self._memory_snapshot = {}
+        self._context_index = None
 
         # Keep last few lines (helps debugging)
-        self.system_log = self.system_log[-80:]
+        self.system_log = self.system_log.carry(80)
 
     def reset_all(self) -> None:
-        """Clear everything including knobs."""
+        """Clear everything including knobs (background threads are stopped first)."""
+        from app.logic.orchestrator import clear_state  # orchestrator imports this module
+
+        clear_state(self)
         fresh = AppState()
+        fresh._gate = self._gate  # pool membership isn't a setting
         self.__dict__.update(fresh.__dict__)
 
@@ -0,0 +1,467 @@
+"""
+Reproducible benchmark: per-stage and end-to-end latency / throughput / memory.
+
+Everything runs offline: synthetic slide frames, synthetic speech, and the
+local OpenAI/Ollama stub server (app/services/stub_server.py) with
+configurable latency. Results are written as JSON; pass --compare to diff
+against an earlier run (e.g. from the previous commit).
+
+    PYTHONPATH=. python scripts/benchmark.py --quick
+    PYTHONPATH=. python scripts/benchmark.py --sizes 1280x720,1920x1080 \\
+        --intervals 0.5,2 --sessions 1,4 --duration 20 --llm-latency-ms 400
+    PYTHONPATH=. python scripts/benchmark.py --compare app/assets/bench/<old>.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+BENCH_DIR = ROOT / "app" / "assets" / "bench"
+
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    if not samples:
+        return {"n": 0}
+    a = np.asarray(samples, dtype=np.float64)
+    return {
+        "n": int(a.size),
+        "mean": round(float(a.mean()), 3),
+        "p50": round(float(np.percentile(a, 50)), 3),
+        "p95": round(float(np.percentile(a, 95)), 3),
+        "p99": round(float(np.percentile(a, 99)), 3),
+        "max": round(float(a.max()), 3),
+    }
+
+
+def timed(fn: Callable[[], Any], n: int, warmup: int = 1) -> Dict[str, float]:
+    """Wall-clock ms per call over n calls (after `warmup` untimed calls)."""
+    for _ in range(warmup):
+        fn()
+    ms = []
+    t_all = time.perf_counter()
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        ms.append((time.perf_counter() - t0) * 1000.0)
+    out = percentiles(ms)
+    out["per_s"] = round(n / max(1e-9, time.perf_counter() - t_all), 2)
+    return out
+
+
+def process_peak_rss_mb() -> float:
+    """High-water mark of the whole benchmark process (never goes down between scenarios)."""
+    # ru_maxrss: KiB on Linux, bytes on macOS
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(r / (1024.0 * 1024.0) if sys.platform == "darwin" else r / 1024.0, 1)
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size right now (Linux /proc only; None elsewhere)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0), 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def parse_sizes(s: str) -> List[Tuple[int, int]]:
+    return [tuple(int(v) for v in part.lower().split("x")) for part in s.split(",") if part]  # type: ignore[misc]
+
+
+def parse_floats(s: str) -> List[float]:
+    return [float(v) for v in s.split(",") if v]
+
+
+def stand_in_ocr(latency_ms: float) -> Callable[[Any], Tuple[str, float]]:
+    """
+    OCR stand-in for machines without tesseract: costs `latency_ms` per
+    1280x720 worth of pixels (tesseract is roughly linear in area) and
+    returns frame-dependent text.
+    """
+
+    def _ocr(image: Any) -> Tuple[str, float]:
+        t0 = time.time()
+        px = np.asarray(image)
+        time.sleep(latency_ms / 1000.0 * (px.shape[0] * px.shape[1]) / (1280 * 720))
+        ink = float((px < 128).mean()) if px.size else 0.0
+        text = f"Slide text stand-in\nink ratio {ink:.3f}\nshape {px.shape[1]}x{px.shape[0]}"
+        return text, (time.time() - t0) * 1000.0
+
+    return _ocr
+
+
+def ocr_accuracy(ocr_fn: Callable[[Any], Tuple[str, float]], frames: Sequence[Any], truth: Sequence[str]) -> float:
+    """Mean character-level similarity (difflib ratio) of OCR output vs the rendered text."""
+    import difflib
+
+    def _norm(t: str) -> str:
+        return " ".join(t.split())
+
+    ratios = [difflib.SequenceMatcher(None, _norm(ocr_fn(f)[0]), _norm(t)).ratio() for f, t in zip(frames, truth)]
+    return round(float(np.mean(ratios)), 4) if ratios else 0.0
+
+
+# ---------------------------------------------------------
+# Per-stage benchmarks
+# ---------------------------------------------------------
+def bench_stages(args: argparse.Namespace, ocr_fn: Callable[[Any], Tuple[str, float]], ocr_kind: str) -> Dict[str, Any]:
+    from app.capture.audio import synth_speech, to_wav_bytes
+    from app.capture.change import ChangeDetector
+    from app.capture.screen import _DEFAULT_SLIDES, SyntheticSource, capture_screen, grab_frame, render_text_frame
+    from app.services.ocr_preprocess import OcrPreprocessor
+    from app.logic.llm_interviewer import generate_question
+    from app.services.stt import transcribe_audio_bytes
+
+    n = args.iterations
+    out: Dict[str, Any] = {
+        "capture": {}, "capture_png": {}, "change_detect": {}, "ocr": {}, "ocr_preprocess": {}, "ocr_preprocessed": {},
+    }
+    pre = OcrPreprocessor(target_line_px=args.ocr_target_line_px)
+    src = SyntheticSource(seconds_per_slide=0.05)
+    tmp = Path(tempfile.mkdtemp(prefix="bench_"))
+
+    for w, h in args.sizes:
+        key = f"{w}x{h}"
+        region = (0, 0, w, h)
+        out["capture"][key] = timed(lambda: grab_frame(region, source=src), n)
+        out["capture_png"][key] = timed(lambda: capture_screen(str(tmp / "f.png"), region, source=src), max(3, n // 4))
+        det = ChangeDetector()
+        frames = [grab_frame(region, source=src).pixels for _ in range(8)]
+        it = iter(range(10 ** 9))
+        out["change_detect"][key] = timed(lambda: det.check(frames[next(it) % len(frames)]), n)
+        # OCR raw vs preprocessed; fonts scale with height like a high-DPI screen
+        font_px = max(12, int(28 * h / 720))
+        slides = [render_text_frame(text, (w, h), font_px) for text in _DEFAULT_SLIDES]
+        it_raw, it_pre = iter(range(10 ** 9)), iter(range(10 ** 9))
+        m = max(3, n // 5)
+        out["ocr"][key] = dict(timed(lambda: ocr_fn(slides[next(it_raw) % len(slides)]), m), kind=ocr_kind)
+        out["ocr_preprocess"][key] = timed(lambda: pre(slides[next(it_pre) % len(slides)]), n)
+        out["ocr_preprocess"][key]["scale_factor"] = pre.last_factor
+        out["ocr_preprocessed"][key] = dict(timed(lambda: ocr_fn(pre(slides[next(it_pre) % len(slides)])), m), kind=ocr_kind)
+        if ocr_kind != "stand-in":
+            out["ocr"][key]["accuracy"] = ocr_accuracy(ocr_fn, slides, _DEFAULT_SLIDES)
+            out["ocr_preprocessed"][key]["accuracy"] = ocr_accuracy(lambda px: ocr_fn(pre(px)), slides, _DEFAULT_SLIDES)
+
+    speech = synth_speech(((2.0, 0.5), (1.5, 0.5)))
+    wav = to_wav_bytes(speech)
+    out["stt_openai_stub"] = timed(
+        lambda: transcribe_audio_bytes(wav, filename="bench.wav", provider="openai"), max(3, n // 5)
+    )
+    if args.whisper:
+        arr = speech
+        from app.services.stt import transcribe_audio_array
+
+        out["stt_faster_whisper"] = timed(lambda: transcribe_audio_array(arr, whisper_size=args.whisper), 3)
+
+    q_kwargs = dict(
+        model="stub", temperature=0.2, ocr_context="Architecture: capture -> OCR -> LLM",
+        difficulty="medium", question_index=2, max_questions=6, use_cache=False,
+    )
+    for provider in ("openai", "ollama"):
+        out[f"llm_{provider}"] = timed(lambda: generate_question(provider=provider, **q_kwargs), max(3, n // 5))
+        ttft: List[float] = []
+
+        def _stream() -> None:
+            t0 = time.perf_counter()
+            first: List[float] = []
+            generate_question(
+                provider=provider,
+                on_token=lambda _t: first or first.append((time.perf_counter() - t0) * 1000.0),
+                **q_kwargs,
+            )
+            ttft.extend(first[:1])
+
+        out[f"llm_{provider}_stream"] = timed(_stream, max(3, n // 5))
+        out[f"llm_{provider}_stream"]["ttft"] = percentiles(ttft)
+    return out
+
+
+# ---------------------------------------------------------
+# End-to-end scenarios
+# ---------------------------------------------------------
+def run_scenario(
+    size: Tuple[int, int],
+    interval_s: float,
+    n_sessions: int,
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    import app.logic.orchestrator as orch
+    from app.logic.sessions import SharedPools
+    from app.services.metrics import get_metrics
+    from app.state import AppState
+
+    get_metrics().reset()
+    pools = SharedPools()
+    states: List[AppState] = []
+    rss_start = current_rss_mb()
+    rss_samples: List[float] = []
+    tracemalloc.start()
+    t_start = time.monotonic()
+    for _ in range(n_sessions):
+        s = AppState()
+        s.capture_backend = "synthetic"
+        s.region_w, s.region_h = size
+        s.screenshot_interval_sec = interval_s
+        s.ocr_cache_disk = False
+        s.ocr_engine_mode = "thread" if args.ocr_stand_in else "process"
+        s.ocr_preprocess = not args.no_preprocess
+        s.ocr_target_line_px = args.ocr_target_line_px
+        s.spill_to_disk = False
+        s.stt_live = not args.no_stt
+        s.audio_source = "synthetic"
+        s.stt_provider = "openai"
+        s.llm_stream = True
+        s.max_questions = 1000
+        s._gate = pools.gate()
+        orch.start_session(s)
+        states.append(s)
+
+    tick_ms: List[float] = []
+    first_q_ms: List[float] = []
+    llm_ms: List[float] = []
+    stt_ms: List[float] = []
+    frames = [0] * n_sessions
+    last_frame_ts: List[Optional[str]] = [None] * n_sessions
+    last_q: List[str] = [""] * n_sessions
+    asked_at = [0.0] * n_sessions
+    last_stt = [0] * n_sessions
+    got_first = [False] * n_sessions
+
+    t_end = t_start + args.duration
+    while time.monotonic() < t_end:
+        loop_t0 = time.monotonic()
+        for i, s in enumerate(states):
+            t0 = time.perf_counter()
+            orch.tick(s)
+            tick_ms.append((time.perf_counter() - t0) * 1000.0)
+
+            if s.latest_frame_ts != last_frame_ts[i]:
+                last_frame_ts[i] = s.latest_frame_ts
+                frames[i] += 1
+            if s.stt_calls != last_stt[i]:
+                last_stt[i] = s.stt_calls
+                stt_ms.append(s.stt_latency_ms)
+            q = s.current_question if not s.question_streaming else ""
+            if q and q != last_q[i]:
+                last_q[i] = q
+                asked_at[i] = time.monotonic()
+                llm_ms.append(s.llm_latency_ms)
+                if not got_first[i]:
+                    got_first[i] = True
+                    first_q_ms.append((asked_at[i] - t_start) * 1000.0)
+            elif q and time.monotonic() - asked_at[i] >= args.answer_s:
+                orch.next_question(s)  # simulated answer; the next question is requested on the next tick
+        rss = current_rss_mb()
+        if rss is not None:
+            rss_samples.append(rss)
+        time.sleep(max(0.0, args.tick_s - (time.monotonic() - loop_t0)))
+
+    elapsed = time.monotonic() - t_start
+    _cur, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "frame_size": f"{size[0]}x{size[1]}",
+        "interval_s": interval_s,
+        "sessions": n_sessions,
+        "duration_s": round(elapsed, 2),
+        "tick_ms": percentiles(tick_ms),
+        "time_to_first_question_ms": percentiles(first_q_ms),
+        "llm_ms": percentiles(llm_ms),
+        "stt_ms": percentiles(stt_ms),
+        "frames_applied_per_s": round(sum(frames) / elapsed, 3),
+        "ocr_calls": sum(s.ocr_calls for s in states),
+        "ocr_skips": sum(s.ocr_skips for s in states),
+        "frames_dropped": sum(s.frames_dropped for s in states),
+        "questions": sum(len(s.qa_history) for s in states),
+        "questions_per_min": round(sum(len(s.qa_history) for s in states) * 60.0 / elapsed, 2),
+        "stt_calls": sum(s.stt_calls for s in states),
+        "errors": sum(sum(1 for line in s.system_log if "ERROR" in line) for s in states),
+        "py_heap_peak_mb": round(peak / (1024.0 * 1024.0), 2),
+        # This scenario's footprint: sampled RSS each tick loop (ru_maxrss would carry earlier scenarios' peak)
+        "rss_start_mb": rss_start,
+        "rss_peak_mb": max(rss_samples) if rss_samples else None,
+        "rss_growth_mb": round(max(rss_samples) - rss_start, 1) if rss_samples and rss_start is not None else None,
+        "process_peak_rss_mb": process_peak_rss_mb(),
+        "instrumented_stages": get_metrics().stage_summary(),
+    }
+    for s in states:
+        orch.stop_session(s)
+    return result
+
+
+# ---------------------------------------------------------
+# Comparison
+# ---------------------------------------------------------
+def _flatten(obj: Any, prefix: str = "") -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            out.update(_flatten(v, f"{prefix}.{k}" if prefix else str(k)))
+    elif isinstance(obj, (int, float)) and not isinstance(obj, bool):
+        out[prefix] = float(obj)
+    return out
+
+
+def _scenario_key(sc: Dict[str, Any]) -> str:
+    return f"{sc['frame_size']}@{sc['interval_s']}s×{sc['sessions']}"
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float = 0.10) -> List[str]:
+    """Lines for metrics that moved more than `threshold` (latency up / throughput down = regression)."""
+    a = _flatten({"stages": old.get("stages", {}), "scenarios": {_scenario_key(s): s for s in old.get("scenarios", [])}})
+    b = _flatten({"stages": new.get("stages", {}), "scenarios": {_scenario_key(s): s for s in new.get("scenarios", [])}})
+    lines = []
+    for k in sorted(set(a) & set(b)):
+        if not any(k.endswith(s) for s in (".p50", ".p95", ".p99", "per_s", "_per_min", "_mb")):
+            continue
+        if a[k] == 0:
+            continue
+        delta = (b[k] - a[k]) / abs(a[k])
+        if abs(delta) < threshold:
+            continue
+        higher_is_better = k.endswith("per_s") or k.endswith("_per_min")
+        worse = delta < 0 if higher_is_better else delta > 0
+        lines.append(f"{'REGRESSION' if worse else 'improved  '} {k}: {a[k]:.3f} -> {b[k]:.3f} ({delta:+.0%})")
+    return lines
+
+
+# ---------------------------------------------------------
+# Main
+# ---------------------------------------------------------
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=parse_sizes, default=parse_sizes("1280x720,1920x1080"))
+    ap.add_argument("--intervals", type=parse_floats, default=parse_floats("0.5,2"))
+    ap.add_argument("--sessions", type=lambda s: [int(v) for v in s.split(",") if v], default=[1, 4])
+    ap.add_argument("--duration", type=float, default=15.0, help="seconds per end-to-end scenario")
+    ap.add_argument("--iterations", type=int, default=40, help="calls per stage micro-benchmark")
+    ap.add_argument("--answer-s", type=float, default=3.0, help="simulated answer time per question")
+    ap.add_argument("--tick-s", type=float, default=0.25, help="UI tick period")
+    ap.add_argument("--llm-latency-ms", type=float, default=300.0)
+    ap.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    ap.add_argument("--token-ms", type=float, default=15.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--ocr-latency-ms", type=float, default=120.0, help="OCR stand-in cost (no tesseract)")
+    ap.add_argument("--ocr-stand-in", action="store_true", help="use the OCR stand-in even if tesseract works")
+    ap.add_argument("--no-preprocess", action="store_true", help="scenarios OCR raw frames")
+    ap.add_argument("--ocr-target-line-px", type=int, default=24)
+    ap.add_argument("--whisper", default="", help="also bench local faster-whisper of this size")
+    ap.add_argument("--no-stt", action="store_true", help="disable live STT in scenarios")
+    ap.add_argument("--llm-cache", action="store_true", help="keep the LLM response cache on")
+    ap.add_argument("--quick", action="store_true", help="one small scenario, few iterations")
+    ap.add_argument("--skip-stages", action="store_true")
+    ap.add_argument("--skip-scenarios", action="store_true")
+    ap.add_argument("--out", default="", help="result JSON path (default app/assets/bench/)")
+    ap.add_argument("--compare", default="", help="earlier result JSON to diff against")
+    args = ap.parse_args()
+
+    if args.quick:
+        args.sizes, args.intervals, args.sessions = args.sizes[:1], args.intervals[:1], args.sessions[:1]
+        args.duration, args.iterations = min(args.duration, 6.0), min(args.iterations, 10)
+
+    if not args.llm_cache:
+        os.environ["LLM_CACHE"] = "0"  # every call should reach the (stub) provider
+
+    from app.services.providers import reset_providers
+    from app.services.stub_server import StubConfig, start_stub_server
+
+    cfg = StubConfig(args.llm_latency_ms, args.llm_jitter_ms, args.error_rate, args.token_ms)
+    server, url = start_stub_server(config=cfg)
+    os.environ["OPENAI_BASE_URL"] = f"{url}/v1"
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OLLAMA_URL"] = url
+    reset_providers()
+
+    from app.services import ocr as ocr_mod
+    from app.services import ocr_engine
+
+    real_ocr_ok = ocr_mod.run_ocr(np.full((64, 256, 3), 255, np.uint8))[0] != ocr_mod.OCR_UNAVAILABLE
+    if args.ocr_stand_in or not real_ocr_ok:
+        args.ocr_stand_in = True
+        ocr_fn, ocr_kind = stand_in_ocr(args.ocr_latency_ms), "stand-in"
+        # the engine looks run_ocr up at call time; thread mode keeps the stand-in in-process
+        ocr_engine.run_ocr = ocr_fn  # type: ignore[assignment]
+    else:
+        ocr_fn, ocr_kind = ocr_mod.run_ocr, "tesseract"
+
+    result: Dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ocr": ocr_kind,
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        },
+        "stages": {},
+        "scenarios": [],
+    }
+
+    if not args.skip_stages:
+        print("stages ...", flush=True)
+        result["stages"] = bench_stages(args, ocr_fn, ocr_kind)
+
+    if not args.skip_scenarios:
+        for size in args.sizes:
+            for interval in args.intervals:
+                for n in args.sessions:
+                    print(f"scenario {size[0]}x{size[1]} interval={interval}s sessions={n} ...", flush=True)
+                    sc = run_scenario(size, interval, n, args)
+                    result["scenarios"].append(sc)
+                    print(
+                        f"  tick p95={sc['tick_ms'].get('p95', 0):.2f} ms  "
+                        f"first question p50={sc['time_to_first_question_ms'].get('p50', 0):.0f} ms  "
+                        f"q/min={sc['questions_per_min']}  frames/s={sc['frames_applied_per_s']}  "
+                        f"heap peak={sc['py_heap_peak_mb']} MB  rss peak={sc['rss_peak_mb']} MB "
+                        f"(+{sc['rss_growth_mb']})",
+                        flush=True,
+                    )
+
+    result["meta"]["stub_requests"] = cfg.requests
+    server.shutdown()
+
+    out = Path(args.out) if args.out else BENCH_DIR / f"bench_{datetime.now():%Y%m%d_%H%M%S}_{result['meta']['commit']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    print(f"saved {out}")
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        lines = compare(old, result)
+        print(f"vs {args.compare} ({old.get('meta', {}).get('commit', '?')}):")
+        print("\n".join(lines) if lines else "  no change beyond 10%")
+        return 1 if any(line.startswith("REGRESSION") for line in lines) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
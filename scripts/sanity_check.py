@@ -0,0 +1,132 @@
+"""
+Quick offline smoke test of every stage (exit code 1 on failure).
+
+Uses synthetic frames / speech and the local OpenAI/Ollama stub server, so
+no API key, microphone or screen is needed:
+
+    PYTHONPATH=. python scripts/sanity_check.py
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+
+Check = Tuple[str, str, str]  # (status, name, detail)
+
+
+def _check(results: List[Check], name: str, fn: Callable[[], Tuple[bool, str]], warn_only: bool = False) -> None:
+    t0 = time.perf_counter()
+    try:
+        ok, detail = fn()
+    except Exception as e:
+        ok, detail = False, f"{type(e).__name__}: {e}"
+    ms = (time.perf_counter() - t0) * 1000.0
+    status = "PASS" if ok else ("WARN" if warn_only else "FAIL")
+    results.append((status, name, f"{detail} ({ms:.0f} ms)"))
+    print(f"[{status}] {name}: {detail} ({ms:.0f} ms)", flush=True)
+
+
+def main() -> int:
+    os.environ["LLM_CACHE"] = "0"
+
+    from app.services.providers import reset_providers
+    from app.services.stub_server import StubConfig, start_stub_server
+
+    server, url = start_stub_server(config=StubConfig(latency_ms=50, token_ms=5))
+    os.environ["OPENAI_BASE_URL"] = f"{url}/v1"
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OLLAMA_URL"] = url
+    reset_providers()
+
+    from app.capture.audio import synth_speech, to_wav_bytes
+    from app.capture.change import ChangeDetector
+    from app.capture.screen import SyntheticSource, grab_frame
+    from app.logic.llm_interviewer import generate_question
+    from app.services.ocr import OCR_UNAVAILABLE, run_ocr
+    from app.services.stt import transcribe_audio_bytes
+
+    results: List[Check] = []
+    src = SyntheticSource(seconds_per_slide=3600)
+    frame = grab_frame((0, 0, 1280, 720), source=src)
+
+    def capture() -> Tuple[bool, str]:
+        return frame.size == (1280, 720) and frame.pixels.dtype == np.uint8, f"frame {frame.size}"
+
+    def change() -> Tuple[bool, str]:
+        det = ChangeDetector()
+        det.check(frame.pixels)
+        same = det.check(frame.pixels.copy())
+        other = det.check(grab_frame((0, 0, 1280, 720), source=SyntheticSource(slides=["Completely\ndifferent"])).pixels)
+        return (not same.changed) and other.changed, f"unchanged={not same.changed} changed={other.changed}"
+
+    def ocr() -> Tuple[bool, str]:
+        text, ms = run_ocr(frame.pixels)
+        if text == OCR_UNAVAILABLE:
+            return False, "tesseract not installed (pipeline falls back to no OCR text)"
+        return bool(text.strip()), f"{len(text)} chars"
+
+    def stt() -> Tuple[bool, str]:
+        text, _ms, err = transcribe_audio_bytes(to_wav_bytes(synth_speech(((1.0, 0.3),))), provider="openai")
+        return bool(text) and not err, err or repr(text[:40])
+
+    def llm(provider: str, stream: bool) -> Callable[[], Tuple[bool, str]]:
+        def _fn() -> Tuple[bool, str]:
+            tokens: List[str] = []
+            q, _ms, err = generate_question(
+                model="stub", temperature=0.2, ocr_context="Architecture overview", difficulty="easy",
+                question_index=1, max_questions=3, provider=provider, use_cache=False,
+                on_token=tokens.append if stream else None,
+            )
+            ok = bool(q) and not err and (not stream or len(tokens) > 1)
+            return ok, err or f"{q[:40]!r}" + (f" ({len(tokens)} tokens)" if stream else "")
+
+        return _fn
+
+    def session() -> Tuple[bool, str]:
+        import app.logic.orchestrator as orch
+        from app.state import AppState
+
+        s = AppState()
+        s.capture_backend = "synthetic"
+        s.screenshot_interval_sec = 0.2
+        s.ocr_cache_disk = False
+        s.ocr_engine_mode = "thread"
+        s.spill_to_disk = False
+        orch.start_session(s)
+        try:
+            t_end = time.monotonic() + 15.0
+            while time.monotonic() < t_end:
+                orch.tick(s)
+                if s.current_question and not s.question_streaming:
+                    break
+                time.sleep(0.1)
+            orch.next_question(s)
+            ok = len(s.qa_history) == 1 and s.latest_frame is not None
+            return ok, f"frame={s.latest_frame_size} questions={len(s.qa_history)}"
+        finally:
+            orch.stop_session(s)
+
+    _check(results, "capture (synthetic)", capture)
+    _check(results, "change detection", change)
+    _check(results, "ocr", ocr, warn_only=True)
+    _check(results, "stt (openai stub)", stt)
+    for provider in ("openai", "ollama"):
+        _check(results, f"llm {provider}", llm(provider, False))
+        _check(results, f"llm {provider} streaming", llm(provider, True))
+    _check(results, "session: capture -> OCR -> question", session)
+
+    server.shutdown()
+    failed = [r for r in results if r[0] == "FAIL"]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed" + (f", {len(failed)} failed" if failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())